@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmarks of the pipeline stages on synthetic cities.
+
+Every stage runs on the same synthetic cities (drone/synthetic_city.py,
+fixed kind / seed) of increasing size, each measurement in a fresh
+interpreter so that its peak memory is its own:
+
+    process_zone          drone recon: exact matching + Euler circuit + plot
+    simulate_for_folder   Perlin snow map at COVERAGE
+    chinese_postman_route route planning of one vehicle
+    simulate_vehicle      stepping of one vehicle until its fuel runs out
+    render*               the four Mapbox HTML renderers
+
+Inputs (graph loading, agent creation) are prepared before the clock
+starts.  A measurement records the best wall time over --repeat runs,
+the peak RSS of the child and the peak RSS gained during the stage
+(VmHWM reset before each run where Linux allows it);
+a stage whose size exceeds its max_edges (process_zone's all-pairs
+matching is quadratic in the odd nodes) or that overruns --timeout is
+recorded as skipped / timeout and the larger sizes of that stage are
+not attempted.  The scaling exponent of each stage is the slope of
+log(time) against log(edges).
+
+Results go to reports/benchmarks/results.json; --save-baseline stores
+them as reports/benchmarks/baseline.json, and later runs are compared
+with it (time or peak memory more than --tolerance above the baseline
+counts as a regression, exit status 1).
+
+Cities are generated once per (kind, size, seed) under resources/bench/.
+
+    python3 benchmark.py                            # every stage, default sizes
+    python3 benchmark.py simulate_vehicle --sizes 1000 10000 100000 1000000
+    python3 benchmark.py --save-baseline
+"""
+import os, sys, json, math, time, platform, argparse, resource, subprocess
+import queue as queue_mod
+import multiprocessing as mp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+for sub in ("drone", "vehicle", "rendering"):
+    sys.path.append(os.path.join(HERE, sub))
+
+BENCH_ROOT = "resources/bench"
+OUT_DIR    = "reports/benchmarks"
+RESULTS    = os.path.join(OUT_DIR, "results.json")
+BASELINE   = os.path.join(OUT_DIR, "baseline.json")
+CONFIG     = "vehicle/config.json"
+SIZES      = (1_000, 10_000, 100_000)
+KIND       = "perturbed"
+ONEWAY     = 0.3
+COVERAGE   = 0.3
+SEED       = 0
+TIMEOUT_S  = 1800
+TOLERANCE  = 0.2
+# en dessous, le bruit de mesure domine : pas de verdict de régression
+MIN_TIME_S = 0.05
+MIN_MEM_MB = 5.0
+
+def _reset_peak():
+    """Remet le pic de RSS (VmHWM) au niveau actuel ; False si le noyau ne le permet pas."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _peak_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024     # ko sous Linux
+
+def city(size, kind=KIND, seed=SEED):
+    """(root, slug) de la ville de référence ; root joue le rôle de resources/."""
+    from synthetic_city import default_slug, generate, write_city
+    slug = default_slug(kind, size, seed)
+    root = os.path.join(BENCH_ROOT, slug)
+    if not os.path.isfile(os.path.join(root, slug, "snow_map.csv")):
+        print(f"🏙️  génération de {slug}")
+        write_city(generate(kind, size, ONEWAY, seed), slug, root, COVERAGE, seed)
+    return root, slug
+
+# ---------------------------------------------------------------------------
+# Each stage: setup(root, slug) -> thunk; only the thunk is timed.
+def _process_zone(root, slug):
+    import generate_eulerian_paths as gep
+    gep.OUTPUT_DIR = os.path.join(root, "parallel_city")
+    return lambda: gep.process_zone(slug)
+
+def _snow(root, slug):
+    from drone_generate_snow import simulate_for_folder
+    folder = os.path.join(root, slug)
+    return lambda: simulate_for_folder(folder, COVERAGE, base=SEED)
+
+def _sim_config():
+    from brain import load_config
+    config = dict(load_config(CONFIG))
+    config.update(result_cache={"enabled": False}, checkpoint={"enabled": False},
+                  profile=False, replan=False)
+    return config
+
+def _postman(root, slug):
+    from simulation import load_graph_with_snow
+    from vehicles import vehicle_classes
+    from placement import depot_nodes
+    config = _sim_config()
+    G = load_graph_with_snow(os.path.join(root, slug))
+    agent = vehicle_classes(config)[0](depot_nodes(G, config)[0], config)
+    return lambda: agent.chinese_postman_route(G)
+
+def _stepping(root, slug):
+    from simulation import load_graph_with_snow, simulate_vehicle
+    from vehicles import vehicle_classes
+    from placement import depot_nodes
+    config = _sim_config()
+    G = load_graph_with_snow(os.path.join(root, slug))
+    cls, start = vehicle_classes(config)[0], depot_nodes(G, config)[0]
+    return lambda: simulate_vehicle(cls, start, config, G, "bench")[0].steps_taken
+
+def _render(module, fn, attrs):
+    def setup(root, slug):
+        mod = __import__(module)
+        for attr, name in attrs.items():
+            setattr(mod, attr, os.path.join(root, name) if name else root)
+        return getattr(mod, fn)
+    return setup
+
+STAGES = {
+    "process_zone":          {"setup": _process_zone, "max_edges": 10_000},
+    "simulate_for_folder":   {"setup": _snow},
+    "chinese_postman_route": {"setup": _postman},
+    "simulate_vehicle":      {"setup": _stepping},
+    "render":                {"setup": _render("render", "render_plotly_mapbox_oriented",
+                                               {"NEIGHBORHOOD_DIR": "", "OUTPUT_PATH": "graph.html"})},
+    "render_oriented":       {"setup": _render("render_oriented", "render_plotly_mapbox_oriented",
+                                               {"NEIGHBORHOOD_DIR": "", "OUTPUT_PATH": "oriented.html"})},
+    "render_snow":           {"setup": _render("render_snow", "main",
+                                               {"ROOT": "", "GLOBAL_SNOW": "snow_map_global.csv",
+                                                "OUT_HTML": "graph_snow.html"})},
+    "render_oriented_snow":  {"setup": _render("render_oriented_snow", "main",
+                                               {"ROOT": "", "GLOBAL_SNOW": "snow_map_global.csv",
+                                                "OUT_HTML": "oriented_snow.html"})},
+}
+
+def _child(stage, root, slug, repeat, queue):
+    """Processus neuf : prépare l'étape puis la chronomètre repeat fois."""
+    sys.stdout = open(os.devnull, "w")                  # les étapes sont bavardes
+    try:
+        rss0 = _peak_mb()
+        thunk = STAGES[stage]["setup"](root, slug)
+        rss1 = _peak_mb()
+        peak = rss1
+        times, out = [], None
+        for _ in range(repeat):
+            _reset_peak()
+            base = _peak_mb()
+            t = time.perf_counter()
+            out = thunk()
+            times.append(time.perf_counter() - t)
+            stage_peak = _peak_mb() - base
+        peak = max(peak, _peak_mb())
+        queue.put({"status": "ok", "time_s": round(min(times), 4),
+                   "times_s": [round(t, 4) for t in times],
+                   "setup_mb": round(rss1 - rss0, 1),
+                   "peak_mb": round(peak, 1), "stage_peak_mb": round(stage_peak, 1),
+                   "steps": out if isinstance(out, int) and not isinstance(out, bool) else None})
+    except Exception as e:
+        queue.put({"status": "error", "error": f"{type(e).__name__}: {e}"})
+
+def measure(stage, size, repeat=1, timeout=TIMEOUT_S, kind=KIND):
+    limit = STAGES[stage].get("max_edges")
+    if limit and size > limit:
+        return {"status": "skipped", "reason": f"> max_edges ({limit})"}
+    root, slug = city(size, kind)
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(stage, root, slug, repeat, queue))
+    proc.start()
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            result = queue.get(timeout=1.0)
+            break
+        except queue_mod.Empty:
+            if not proc.is_alive():                     # tué (mémoire ?) sans résultat
+                result = {"status": "error", "error": f"exit code {proc.exitcode}"}
+                break
+            if time.monotonic() > deadline:
+                proc.kill()
+                result = {"status": "timeout", "timeout_s": timeout}
+                break
+    proc.join()
+    return result
+
+# ---------------------------------------------------------------------------
+def scaling(points):
+    """Pente de log(temps) en fonction de log(arêtes), moindres carrés."""
+    pts = [(math.log(n), math.log(r["time_s"])) for n, r in points
+           if r.get("status") == "ok" and r["time_s"] > 0]
+    if len(pts) < 2:
+        return None
+    mx = sum(x for x, _ in pts) / len(pts)
+    my = sum(y for _, y in pts) / len(pts)
+    den = sum((x - mx) ** 2 for x, _ in pts)
+    return round(sum((x - mx) * (y - my) for x, y in pts) / den, 3) if den else None
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def run(stages, sizes, repeat=1, timeout=TIMEOUT_S, kind=KIND):
+    results = {"meta": {"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(),
+                        "python": platform.python_version(), "machine": platform.machine(),
+                        "cpus": os.cpu_count(), "kind": kind, "seed": SEED,
+                        "oneway": ONEWAY, "coverage": COVERAGE, "repeat": repeat},
+               "stages": {}}
+    for stage in stages:
+        points, given_up = [], None
+        for size in sorted(sizes):
+            if given_up:
+                r = {"status": "skipped", "reason": f"{given_up} at a smaller size"}
+            else:
+                r = measure(stage, size, repeat, timeout, kind)
+                if r["status"] in ("timeout", "error"):
+                    given_up = r["status"]
+            points.append((size, r))
+            shown = f"{r['time_s']:.3f} s, pic {r['stage_peak_mb']:.0f} Mo" if r["status"] == "ok" \
+                else r.get("error") or r.get("reason") or r["status"]
+            print(f"⏱️  {stage:22} {size:>9} arêtes : {shown}")
+        results["stages"][stage] = {"sizes": {str(n): r for n, r in points},
+                                    "scaling_exponent": scaling(points)}
+    return results
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Régressions (étape, taille, mesure, ratio) par rapport à la référence."""
+    regressions = []
+    for stage, cur in results["stages"].items():
+        ref = baseline.get("stages", {}).get(stage)
+        if not ref:
+            continue
+        for size, r in cur["sizes"].items():
+            b = ref["sizes"].get(size)
+            if not b or r.get("status") != "ok" or b.get("status") != "ok":
+                continue
+            for key, floor in (("time_s", MIN_TIME_S), ("stage_peak_mb", MIN_MEM_MB)):
+                if max(r[key], b[key]) < floor:
+                    continue
+                ratio = r[key] / max(b[key], floor)
+                r[f"{key}_vs_baseline"] = round(ratio, 3)
+                if ratio > 1 + tolerance:
+                    regressions.append((stage, size, key, ratio))
+    return regressions
+
+def save(results, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic cities.")
+    p.add_argument("stages", nargs="*", metavar="stage",
+                   help=f"default: all ({', '.join(STAGES)})")
+    p.add_argument("--sizes", type=int, nargs="+", default=list(SIZES),
+                   help="street segments of each synthetic city")
+    p.add_argument("--kind", default=KIND, choices=("grid", "perturbed", "geometric"))
+    p.add_argument("--repeat", type=int, default=1, help="runs per measurement (best kept)")
+    p.add_argument("--timeout", type=float, default=TIMEOUT_S, help="seconds per measurement")
+    p.add_argument("--tolerance", type=float, default=TOLERANCE,
+                   help="allowed slowdown / memory growth vs the baseline")
+    p.add_argument("--save-baseline", action="store_true",
+                   help=f"store these results as {BASELINE}")
+    args = p.parse_args()
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        p.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = run(args.stages or list(STAGES), args.sizes, args.repeat, args.timeout, args.kind)
+    for stage, s in results["stages"].items():
+        if s["scaling_exponent"] is not None:
+            print(f"📈 {stage:22} temps ∝ arêtes^{s['scaling_exponent']}")
+
+    regressions = []
+    if args.save_baseline:
+        save(results, BASELINE)
+        print(f"📌 Référence enregistrée → {BASELINE}")
+    elif os.path.isfile(BASELINE):
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("kind") != args.kind:
+            print(f"⚠ Référence faite sur des villes {baseline['meta'].get('kind')} : pas de comparaison")
+        else:
+            regressions = compare(results, baseline, args.tolerance)
+            results["baseline"] = {"commit": baseline["meta"].get("commit"),
+                                   "date": baseline["meta"].get("date"),
+                                   "regressions": [list(r) for r in regressions]}
+            for stage, size, key, ratio in regressions:
+                print(f"🐢 {stage} @ {size} : {key} ×{ratio:.2f} par rapport à la référence")
+            if not regressions:
+                print("✅ Aucune régression par rapport à la référence")
+    save(results, RESULTS)
+    print(f"📝 Résultats → {RESULTS}")
+    sys.exit(1 if regressions else 0)
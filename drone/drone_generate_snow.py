@@ -76,67 +76,135 @@ Generate a Perlin-noise “snow_map.csv” for **each** neighborhood folder
 under resources/.
 
 For every edge (u,v) we write a line:  u,v,snow   where snow ∈ {0,1}
+
+With --coverage the threshold is calibrated per borough so that the
+requested fraction of edges is snowy; the parameters actually used
+(seed, freq, octaves, threshold) are written to snow_params.json next to
+snow_map.csv so a map can be regenerated exactly.
 """
-import os, csv, pickle, random
+import os, csv, json, pickle, random, argparse
+import numpy as np
 from noise import snoise2
 
 ROOT = "resources"                     # root that holds the borough dirs
 FREQ = 0.75                            # ↑  bigger  → larger snow patches
 THRESHOLD = 0.075                      # ↑  higher → rarer snow
 OCTAVES   = 4
+PARAMS_FILE = "snow_params.json"
 
 def normalise(val, lo, hi):
     return (val - lo) / (hi - lo) if hi > lo else 0.0
 
-def simulate_for_folder(folder):
-    g_pkl = os.path.join(folder, "eulerized_graph.pkl")
-    if not os.path.isfile(g_pkl):
-        return False
-
-    G = pickle.load(open(g_pkl, "rb"))
-    if not G.edges:
-        return False
-
+def edge_midpoints(G):
+    """
+    Edges with coordinates on both ends and their midpoints normalised
+    to [0,1] over the borough bounding box (edges without x/y are skipped).
+    """
     lats = [d["y"] for _, d in G.nodes(data=True) if "y" in d]
     lons = [d["x"] for _, d in G.nodes(data=True) if "x" in d]
     min_lat, max_lat = min(lats), max(lats)
     min_lon, max_lon = min(lons), max(lons)
 
-    base = random.randint(0, 9999)     # new seed per run / folder
-    snow_rows, snowy = [], 0
-
+    edges, mx, my = [], [], []
     for u, v in G.edges():
         try:
             lat = (G.nodes[u]["y"] + G.nodes[v]["y"]) / 2
             lon = (G.nodes[u]["x"] + G.nodes[v]["x"]) / 2
         except KeyError:
             continue
+        edges.append((u, v))
+        mx.append(normalise(lon, min_lon, max_lon))
+        my.append(normalise(lat, min_lat, max_lat))
+    return edges, np.asarray(mx), np.asarray(my)
+
+_snoise2 = np.vectorize(snoise2, otypes=[float])
 
-        mx = normalise(lon, min_lon, max_lon) / FREQ
-        my = normalise(lat, min_lat, max_lat) / FREQ
-        intensity = snoise2(mx, my, octaves=OCTAVES, base=base)
-        snow = int(intensity > THRESHOLD)
-        if snow:
-            snowy += 1
-        snow_rows.append((u, v, snow))
+def noise_field(mx, my, base, freq=FREQ, octaves=OCTAVES):
+    """Perlin intensity for every midpoint, evaluated in a single pass."""
+    if not len(mx):
+        return np.empty(0)
+    return _snoise2(mx / freq, my / freq, octaves=octaves, base=base)
+
+def calibrate_threshold(intensity, coverage):
+    """
+    Threshold such that `intensity > threshold` holds for round(coverage·n)
+    edges: an exact order statistic of the field, no trial-and-error runs.
+    """
+    n = len(intensity)
+    k = int(round(min(max(coverage, 0.0), 1.0) * n))
+    if k == 0:
+        return float(intensity.max())
+    s = np.partition(intensity, n - k)
+    # strictly between the largest non-snowy and the smallest snowy value
+    lo = s[:n - k].max() if k < n else np.nextafter(s.min(), -np.inf)
+    return float(lo)
+
+def snow_rows(edges, intensity, threshold):
+    snow = (intensity > threshold).astype(int)
+    return [(u, v, int(s)) for (u, v), s in zip(edges, snow)]
+
+def simulate_for_folder(folder, coverage=None, base=None):
+    g_pkl = os.path.join(folder, "eulerized_graph.pkl")
+    if not os.path.isfile(g_pkl):
+        return False
+
+    G = pickle.load(open(g_pkl, "rb"))
+    if not G.edges:
+        return False
+
+    if base is None:
+        base = random.randint(0, 9999) # new seed per run / folder
+
+    edges, mx, my = edge_midpoints(G)
+    if not edges:
+        return False
+    intensity = noise_field(mx, my, base)
+    threshold = THRESHOLD if coverage is None \
+        else calibrate_threshold(intensity, coverage)
+    rows = snow_rows(edges, intensity, threshold)
+    snowy = sum(s for _, _, s in rows)
 
     out_csv = os.path.join(folder, "snow_map.csv")
     with open(out_csv, "w", newline="") as f:
         writer = csv.writer(f)
         writer.writerow(["u", "v", "snow"])
-        writer.writerows(snow_rows)
+        writer.writerows(rows)
 
-    pct = snowy / len(snow_rows) * 100
-    print(f"✔ {os.path.basename(folder):30} : {snowy}/{len(snow_rows)} "
+    with open(os.path.join(folder, PARAMS_FILE), "w") as f:
+        json.dump({
+            "base": base,
+            "freq": FREQ,
+            "octaves": OCTAVES,
+            "threshold": threshold,
+            "target_coverage": coverage,
+            "coverage": round(snowy / len(rows), 4),
+            "edges": len(rows),
+            "snowy_edges": snowy
+        }, f, indent=2)
+
+    pct = snowy / len(rows) * 100
+    print(f"✔ {os.path.basename(folder):30} : {snowy}/{len(rows)} "
           f"edges snowy ({pct:.1f} %)  -> snow_map.csv")
     return True
 
+def parse_args():
+    p = argparse.ArgumentParser(description="Generate Perlin snow maps.")
+    p.add_argument("--coverage", type=float,
+                   help="target snowy fraction of edges (e.g. 0.3); "
+                        "calibrates the threshold per borough")
+    p.add_argument("--seed", type=int,
+                   help="Perlin base shared by every borough (default: random)")
+    p.add_argument("--borough", action="append",
+                   help="only regenerate this borough folder (repeatable)")
+    return p.parse_args()
+
 def main():
+    args = parse_args()
     processed = 0
-    for slug in os.listdir(ROOT):
+    for slug in args.borough or os.listdir(ROOT):
         folder = os.path.join(ROOT, slug)
         if os.path.isdir(folder):
-            if simulate_for_folder(folder):
+            if simulate_for_folder(folder, args.coverage, args.seed):
                 processed += 1
     if processed:
         print(f"🎯 Snow maps generated for {processed} neighborhoods.")
@@ -145,4 +213,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -96,6 +96,7 @@
 #     print("✅ Traitement complet de la ville de Montréal.")
 
 import os
+import sys
 import json
 import pickle
 import networkx as nx
@@ -105,6 +106,10 @@ from itertools import combinations
 from multiprocessing import Pool, cpu_count
 from tqdm import tqdm
 from functools import partial
+from osm_ingest import load_place_graph
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "vehicle"))
+import memprof
 
 # Liste des zones (quartiers ou districts) à traiter indépendamment
 ZONES = [
@@ -116,7 +121,7 @@ ZONES = [
     "Ville-Marie, Montréal, Québec, Canada",  # exemple supplémentaire
 ]
 
-OUTPUT_DIR = "resources/parallel_city"
+OUTPUT_DIR = "resources"            # resources/<slug>/, là où neige, simulation et rendus lisent
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 def shortest_path_length_safe(G, source, target):
@@ -132,71 +137,84 @@ def compute_pair_distances(G_un, odd_nodes):
         dist = shortest_path_length_safe(G_un, u, v)
         if dist != float("inf"):
             distances[(u, v)] = dist
+    memprof.snapshot()          # liste des paires encore vivante
     return distances
 
 def process_zone(place):
     slug = place.split(",")[0].lower().replace(" ", "-")
+    with memprof.borough(slug, "drone_recon"):
+        _process_zone(place, slug)
+
+def _process_zone(place, slug):
     path_dir = os.path.join(OUTPUT_DIR, slug)
     os.makedirs(path_dir, exist_ok=True)
 
     print(f"\n📍 Traitement : {place}")
-    G = ox.graph_from_place(place, network_type='drive', simplify=True, retain_all=False)
-    G_un = G.to_undirected()
+    with memprof.stage("load_graph"):
+        G = load_place_graph(place)
+    with memprof.stage("to_undirected"):
+        G_un = G.to_undirected()
     with open(os.path.join(path_dir, "raw_graph.pkl"), "wb") as f:
         pickle.dump(G_un, f)
 
     odd_nodes = [n for n, d in G_un.degree if d % 2 == 1]
     print(f"🔎 {place}: {len(odd_nodes)} nœuds impairs")
 
-    distances = compute_pair_distances(G_un, odd_nodes)
+    with memprof.stage("pair_distances"):
+        distances = compute_pair_distances(G_un, odd_nodes)
 
     print(f"⚖️ {place}: matching parfait...")
-    G_match = nx.Graph()
-    for (u, v), dist in distances.items():
-        G_match.add_edge(u, v, weight=dist)
+    with memprof.stage("matching"):
+        G_match = nx.Graph()
+        for (u, v), dist in distances.items():
+            G_match.add_edge(u, v, weight=dist)
 
-    matching = nx.algorithms.matching.min_weight_matching(G_match)
+        matching = nx.algorithms.matching.min_weight_matching(G_match)
+        memprof.snapshot()      # G_match encore vivant
     print(f"🔗 {place}: {len(matching)} paires matchées")
 
     # Ajouter les arêtes au graphe eulérien
-    G_euler = G_un.copy()
-    for u, v in matching:
-        try:
-            path = nx.shortest_path(G_un, source=u, target=v, weight="length")
-            nx.add_path(G_euler, path)
-        except nx.NetworkXNoPath:
-            print(f"⚠️ {place}: pas de chemin entre {u} et {v}")
+    with memprof.stage("eulerize"):
+        G_euler = G_un.copy()
+        for u, v in matching:
+            try:
+                path = nx.shortest_path(G_un, source=u, target=v, weight="length")
+                nx.add_path(G_euler, path)
+            except nx.NetworkXNoPath:
+                print(f"⚠️ {place}: pas de chemin entre {u} et {v}")
 
     with open(os.path.join(path_dir, "eulerized_graph.pkl"), "wb") as f:
         pickle.dump(G_euler, f)
 
     print(f"🧩 {place}: Calcul du circuit eulérien")
-    circuit = list(nx.eulerian_circuit(G_euler))
-    path_json = [{"u": u, "v": v} for u, v in circuit]
-    with open(os.path.join(path_dir, "eulerian_path.json"), "w") as f:
-        json.dump(path_json, f, indent=2)
+    with memprof.stage("circuit"):
+        circuit = list(nx.eulerian_circuit(G_euler))
+        path_json = [{"u": u, "v": v} for u, v in circuit]
+        with open(os.path.join(path_dir, "eulerian_path.json"), "w") as f:
+            json.dump(path_json, f, indent=2)
 
     path_nodes = [u for u, v in circuit] + [circuit[-1][1]]
 
     print(f"🖼️  {place}: Tracé graphique...")
-    fig, ax = ox.plot_graph(
-        G_un,
-        show=False, close=False,
-        edge_color='lightgray',
-        node_size=0,
-        bgcolor='white'
-    )
-
-    coords = [(G_un.nodes[n]['y'], G_un.nodes[n]['x']) for n in path_nodes if n in G_un.nodes and 'x' in G_un.nodes[n] and 'y' in G_un.nodes[n]]
-    if coords:
-        lats, lons = zip(*coords)
-        ax.plot(lons, lats, color='red', linewidth=1.3, alpha=0.7)
-        ax.set_title(f"Chemin eulérien – {place}", fontsize=10)
-        plt.savefig(os.path.join(path_dir, "path_visualization.png"), dpi=300)
-        plt.close()
-        print(f"✅ {place}: Fini")
-    else:
-        print(f"❌ {place}: Aucune coordonnée valide à tracer")
+    with memprof.stage("plot"):
+        fig, ax = ox.plot_graph(
+            G_un,
+            show=False, close=False,
+            edge_color='lightgray',
+            node_size=0,
+            bgcolor='white'
+        )
+
+        coords = [(G_un.nodes[n]['y'], G_un.nodes[n]['x']) for n in path_nodes if n in G_un.nodes and 'x' in G_un.nodes[n] and 'y' in G_un.nodes[n]]
+        if coords:
+            lats, lons = zip(*coords)
+            ax.plot(lons, lats, color='red', linewidth=1.3, alpha=0.7)
+            ax.set_title(f"Chemin eulérien – {place}", fontsize=10)
+            plt.savefig(os.path.join(path_dir, "path_visualization.png"), dpi=300)
+            plt.close()
+            print(f"✅ {place}: Fini")
+        else:
+            print(f"❌ {place}: Aucune coordonnée valide à tracer")
 
 def run_parallel():
     print(f"🚀 Traitement parallèle avec {min(cpu_count(), len(ZONES))} cœurs...")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Offline borough graphs from a local OSM extract.
+
+load_place_graph(place) replaces ox.graph_from_place(place, "drive") in the
+recon scripts.  Lookup order:
+
+  1. resources/graph_cache/<slug>.pkl   if its key still matches
+  2. the extract in $OSM_EXTRACT (.osm / .osm.xml / .osm.pbf) clipped by
+     resources/boundaries/<slug>.geojson
+  3. the network (Overpass), as before
+
+Whatever is built is normalised (integer node ids, a fixed attribute set)
+and cached, so later runs are offline and reproducible.
+
+.osm.pbf extracts are clipped with osmium-tool (`osmium extract`), which
+must be on PATH; plain XML extracts only need osmnx.
+
+    # one-time, online: store the boundary polygons
+    python3 drone/osm_ingest.py --fetch-boundaries "Anjou, Montréal, Québec, Canada"
+    # offline from then on
+    OSM_EXTRACT=quebec.osm.pbf make drone_recon
+"""
+import os, json, pickle, hashlib, shutil, argparse, subprocess, tempfile
+import networkx as nx
+import osmnx as ox
+from slugify import slugify
+
+CACHE_DIR     = "resources/graph_cache"
+BOUNDARY_DIR  = "resources/boundaries"
+EXTRACT_ENV   = "OSM_EXTRACT"
+FORMAT        = 1                       # bump when normalisation changes
+
+NODE_ATTRS = ("x", "y", "street_count")
+EDGE_ATTRS = ("osmid", "length", "oneway", "reversed", "highway",
+              "name", "maxspeed", "lanes")
+
+# Same exclusions as osmnx' "drive" network_type filter
+NON_DRIVE = {
+    "highway": {"abandoned", "bridleway", "bus_guideway", "construction",
+                "corridor", "cycleway", "elevator", "escalator", "footway",
+                "no", "path", "pedestrian", "planned", "platform", "proposed",
+                "raceway", "razed", "service", "steps", "track"},
+    "area": {"yes"},
+    "access": {"private"},
+    "motor_vehicle": {"no"},
+    "motorcar": {"no"},
+    "service": {"alley", "driveway", "emergency_access", "parking",
+                "parking_aisle", "private"},
+}
+
+def place_slug(place):
+    return slugify(place.split(",")[0])
+
+def boundary_path(place):
+    return os.path.join(BOUNDARY_DIR, f"{place_slug(place)}.geojson")
+
+# ---------------------------------------------------------------------------
+def _values(val):
+    return set(val) if isinstance(val, list) else {val}
+
+def _is_drivable(data):
+    return not any(_values(data.get(tag)) & bad
+                   for tag, bad in NON_DRIVE.items())
+
+def normalise(G):
+    """Integer node ids and only the attributes the pipeline uses."""
+    H = nx.MultiDiGraph(crs=G.graph.get("crs", "epsg:4326"))
+    for n, d in G.nodes(data=True):
+        H.add_node(int(n), **{k: d[k] for k in NODE_ATTRS if k in d})
+    for u, v, d in G.edges(data=True):
+        H.add_edge(int(u), int(v), **{k: d[k] for k in EDGE_ATTRS if k in d})
+    return H
+
+def _load_boundary(place):
+    import geopandas as gpd
+    path = boundary_path(place)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(
+            f"{path} missing – run osm_ingest.py --fetch-boundaries once")
+    return gpd.read_file(path).to_crs("epsg:4326").geometry.union_all()
+
+def _xml_for(extract, place, workdir):
+    """XML clipped to the borough (pbf via osmium) or the raw XML extract."""
+    if not extract.endswith(".pbf"):
+        return extract
+    if shutil.which("osmium") is None:
+        raise RuntimeError("osmium-tool is needed to read .osm.pbf extracts")
+    out = os.path.join(workdir, f"{place_slug(place)}.osm")
+    subprocess.run(["osmium", "extract", "-p", boundary_path(place),
+                    extract, "-o", out, "--overwrite"], check=True)
+    return out
+
+def graph_from_extract(extract, place):
+    """Drive network of `place` from a local extract, like graph_from_place."""
+    polygon = _load_boundary(place)
+    for tag in ("motor_vehicle", "motorcar"):
+        if tag not in ox.settings.useful_tags_way:
+            ox.settings.useful_tags_way = [*ox.settings.useful_tags_way, tag]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        G = ox.graph_from_xml(_xml_for(extract, place, tmp),
+                              simplify=False, retain_all=True)
+
+    G.remove_edges_from([(u, v, k) for u, v, k, d in G.edges(keys=True, data=True)
+                         if not _is_drivable(d)])
+    G.remove_nodes_from(list(nx.isolates(G)))
+    G = ox.truncate.truncate_graph_polygon(G, polygon)
+    G = ox.simplify_graph(G)
+    return ox.truncate.largest_component(G, strongly=False)
+
+# ---------------------------------------------------------------------------
+def _cache_key(place, extract):
+    h = hashlib.sha1(f"{FORMAT}|{place}".encode())
+    if extract:
+        st = os.stat(extract)
+        h.update(f"|{os.path.abspath(extract)}|{st.st_size}|{st.st_mtime_ns}".encode())
+        with open(boundary_path(place), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def _cache_paths(place):
+    base = os.path.join(CACHE_DIR, place_slug(place))
+    return base + ".pkl", base + ".json"
+
+def load_place_graph(place, extract=None):
+    """Directed drive graph of `place`, from cache, local extract or network."""
+    extract = extract or os.environ.get(EXTRACT_ENV)
+    if extract and not os.path.isfile(extract):
+        raise FileNotFoundError(extract)
+    pkl, meta = _cache_paths(place)
+
+    if os.path.isfile(pkl) and os.path.isfile(meta):
+        with open(meta) as f:
+            info = json.load(f)
+        # an online graph stays valid until an extract is supplied
+        if (not extract and info.get("source") == "network") or \
+                info.get("key") == _cache_key(place, extract):
+            print(f"📦 {place}: graph from cache ({info['source']})")
+            with open(pkl, "rb") as f:
+                return pickle.load(f)
+
+    if extract:
+        print(f"🗺️  {place}: building graph from {extract}")
+        G = normalise(graph_from_extract(extract, place))
+    else:
+        print(f"📡 {place}: downloading graph")
+        G = normalise(ox.graph_from_place(place, network_type="drive",
+                                          simplify=True, retain_all=False))
+
+    # tmp + os.replace : a concurrent stage never reads a half-written file;
+    # meta last, so a matching key always points at a complete pickle
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{pkl}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(G, f)
+    os.replace(tmp, pkl)
+    tmp = f"{meta}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"place": place, "key": _cache_key(place, extract),
+                   "source": extract or "network",
+                   "nodes": G.number_of_nodes(),
+                   "edges": G.number_of_edges()}, f, indent=2)
+    os.replace(tmp, meta)
+    return G
+
+def fetch_boundary(place):
+    """Save the borough polygon (needs network once)."""
+    os.makedirs(BOUNDARY_DIR, exist_ok=True)
+    ox.geocode_to_gdf(place)[["geometry"]].to_file(boundary_path(place),
+                                                   driver="GeoJSON")
+    print(f"✔ {place} → {boundary_path(place)}")
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Build/cache borough graphs offline.")
+    p.add_argument("places", nargs="+", help='e.g. "Anjou, Montréal, Québec, Canada"')
+    p.add_argument("--extract", help=f"local .osm/.osm.pbf (default: ${EXTRACT_ENV})")
+    p.add_argument("--fetch-boundaries", action="store_true",
+                   help="download and store boundary polygons first")
+    return p.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    for place in args.places:
+        if args.fetch_boundaries:
+            fetch_boundary(place)
+        G = load_place_graph(place, args.extract)
+        print(f"🧩 {place}: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Synthetic OSM-shaped cities, for scaling tests without downloading boroughs.
+
+Three families, from ~1k to ~1M street segments (--edges counts
+undirected segments, the unit of snow_map.csv):
+
+    grid        regular blocks of BLOCK_M metres
+    perturbed   the same grid, intersections jittered and ~8 % of the
+                segments removed (largest component kept, like osmnx)
+    geometric   random geometric graph: intersections uniform in a square,
+                segments between those closer than a radius giving
+                ~MEAN_DEGREE streets per intersection (above the ~4.5
+                percolation threshold, so the giant component keeps
+                ~96 % of the nodes)
+
+The graph has the attributes of osm_ingest.normalise(): integer ids,
+x / y (lon / lat around Montréal), street_count, and per edge osmid,
+length (metres), oneway, reversed, highway, name.  Two-way streets get
+both directions; a --oneway fraction of them keeps only one (on grids,
+alternating direction by row / column, as in Montréal).
+
+Everything a stage reads is written to resources/<slug>/:
+
+    raw_graph.pkl / raw_graph_oriented.pkl
+    eulerized_graph.pkl, eulerian_path.json
+    eulerized_graph_oriented.pkl, eulerian_path_oriented.json
+    snow_map.csv, snow_params.json   (drone_generate_snow at --coverage)
+
+and the directed graph is registered in resources/graph_cache/, so
+load_place_graph(slug) -- hence process_zone(slug) and the oriented
+recon's process(slug) -- run on it offline.  The Eulerization written
+here pairs odd nodes greedily along a serpentine sweep (one shortest
+path per pair, O(n log n)) instead of the exact matching of the recon
+stages, which does not scale past a few thousand odd nodes.
+
+    python3 drone/synthetic_city.py grid --edges 10000
+    python3 drone/synthetic_city.py perturbed --edges 1000000 --oneway 0.3 --coverage 0.4
+"""
+import os, sys, json, math, pickle, random, argparse
+import networkx as nx
+from osm_ingest import CACHE_DIR, FORMAT, _cache_key, _cache_paths
+from drone_generate_snow import simulate_for_folder
+
+ROOT        = "resources"
+KINDS       = ("grid", "perturbed", "geometric")
+BLOCK_M     = 100.0                     # côté d'un pâté de maisons
+JITTER      = 0.25                      # perturbed : décalage max, en fraction de bloc
+DROP        = 0.08                      # perturbed : fraction de segments retirés
+MEAN_DEGREE = 5.5                       # geometric : rues par intersection
+LAT0, LON0  = 45.50, -73.60             # coin sud-ouest (Montréal)
+M_PER_DEG   = 111_320.0
+
+def to_lonlat(x, y):
+    lat = LAT0 + y / M_PER_DEG
+    lon = LON0 + x / (M_PER_DEG * math.cos(math.radians(LAT0)))
+    return lon, lat
+
+# ---------------------------------------------------------------------------
+def _grid(edges, rng, perturbed):
+    """Points (x, y en mètres) et segments (i, j, sens) d'une grille."""
+    target = edges / (1 - DROP) if perturbed else edges
+    side = max(2, round((1 + math.sqrt(1 + 2 * target)) / 2))   # 2·s² - 2·s ≈ target
+    pts = []
+    for r in range(side):
+        for c in range(side):
+            x, y = c * BLOCK_M, r * BLOCK_M
+            if perturbed:
+                x += rng.uniform(-JITTER, JITTER) * BLOCK_M
+                y += rng.uniform(-JITTER, JITTER) * BLOCK_M
+            pts.append((x, y))
+    segs = []
+    for r in range(side):
+        for c in range(side):
+            i = r * side + c
+            if c + 1 < side:
+                segs.append((i, i + 1, r % 2))              # est / ouest selon la rangée
+            if r + 1 < side:
+                segs.append((i, i + side, c % 2))           # nord / sud selon la colonne
+    if perturbed:
+        segs = [s for s in segs if rng.random() >= DROP]
+    return pts, segs
+
+def _geometric(edges, rng):
+    n = max(4, round(2 * edges / MEAN_DEGREE))
+    size = math.sqrt(n) * BLOCK_M
+    radius = math.sqrt(MEAN_DEGREE / (math.pi * n)) * size
+    pts = [(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(n)]
+    cells = {}
+    for i, (x, y) in enumerate(pts):
+        cells.setdefault((int(x // radius), int(y // radius)), []).append(i)
+    segs = []
+    for (cx, cy), members in cells.items():
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):  # demi-voisinage
+            other = cells.get((cx + dx, cy + dy))
+            if not other:
+                continue
+            for a in members:
+                xa, ya = pts[a]
+                for b in other:
+                    if (dx, dy) == (0, 0) and b <= a:
+                        continue
+                    if math.hypot(pts[b][0] - xa, pts[b][1] - ya) <= radius:
+                        segs.append((a, b, rng.random() < 0.5))
+    return pts, segs
+
+def generate(kind="grid", edges=10_000, oneway=0.0, seed=0):
+    """MultiDiGraph au format de osm_ingest.normalise()."""
+    if kind not in KINDS:
+        raise ValueError(f"unknown kind {kind!r} (one of {', '.join(KINDS)})")
+    rng = random.Random(seed)
+    pts, segs = _grid(edges, rng, kind == "perturbed") if kind != "geometric" \
+        else _geometric(edges, rng)
+
+    G = nx.MultiDiGraph(crs="epsg:4326", synthetic={"kind": kind, "edges": edges,
+                                                     "oneway": oneway, "seed": seed})
+    for i, (x, y) in enumerate(pts):
+        lon, lat = to_lonlat(x, y)
+        G.add_node(i, x=lon, y=lat)
+    for osmid, (u, v, flip) in enumerate(segs):
+        (xu, yu), (xv, yv) = pts[u], pts[v]
+        data = {"osmid": osmid, "length": round(math.hypot(xv - xu, yv - yu), 3),
+                "highway": "residential", "name": f"Rue {osmid}"}
+        if rng.random() < oneway:
+            if flip:
+                u, v = v, u
+            G.add_edge(u, v, oneway=True, reversed=False, **data)
+        else:
+            G.add_edge(u, v, oneway=False, reversed=False, **data)
+            G.add_edge(v, u, oneway=False, reversed=True, **data)
+
+    G.remove_nodes_from(list(nx.isolates(G)))
+    if G.number_of_nodes():
+        giant = max(nx.weakly_connected_components(G), key=len)
+        G.remove_nodes_from([n for n in list(G) if n not in giant])
+    G = nx.convert_node_labels_to_integers(G)
+    for n in G:
+        G.nodes[n]["street_count"] = len(set(G.succ[n]) | set(G.pred[n]))
+    return G
+
+# ---------------------------------------------------------------------------
+def _serpentine(G, nodes):
+    """Ordre de balayage en bandes horizontales, sens alterné d'une bande à l'autre."""
+    if not nodes:
+        return []
+    ys = [G.nodes[n]["y"] for n in nodes]
+    lo, hi = min(ys), max(ys)
+    strips = max(1, int(math.sqrt(len(nodes))))
+    height = (hi - lo) / strips or 1.0
+
+    def key(n):
+        s = min(int((G.nodes[n]["y"] - lo) / height), strips - 1)
+        x = G.nodes[n]["x"]
+        return s, x if s % 2 == 0 else -x
+    return sorted(nodes, key=key)
+
+def eulerize_fast(G_un):
+    """
+    Eulérisation gloutonne : les nœuds impairs, pris dans l'ordre du
+    balayage, sont appariés deux à deux et le plus court chemin entre eux
+    est doublé (données de l'arête la plus courte copiées).
+    """
+    G_eu = G_un.copy()
+    odd = _serpentine(G_un, [n for n, d in G_un.degree if d % 2 == 1])
+    for u, v in zip(odd[::2], odd[1::2]):
+        _, path = nx.bidirectional_dijkstra(G_un, u, v, weight="length")
+        for a, b in zip(path, path[1:]):
+            data = min(G_un[a][b].values(), key=lambda d: d.get("length", 1.0))
+            G_eu.add_edge(a, b, **data)
+    return G_eu
+
+def _oriented(G_dir, G_eu_un, circuit):
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "vehicle"))
+    from generate_eulerian_paths_oriented import orient_eulerized_graph, directed_walk
+    return orient_eulerized_graph(G_dir, G_eu_un), directed_walk(G_dir, circuit)
+
+def register(G, slug):
+    """Entrée de resources/graph_cache/ : load_place_graph(slug) renvoie G hors ligne."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    pkl, meta = _cache_paths(slug)
+    with open(pkl, "wb") as f:
+        pickle.dump(G, f, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(meta, "w") as f:
+        json.dump({"place": slug, "key": _cache_key(slug, None), "source": "synthetic",
+                   "format": FORMAT, **G.graph["synthetic"],
+                   "nodes": G.number_of_nodes(), "edges": G.number_of_edges()}, f, indent=2)
+
+def write_city(G, slug, root=ROOT, coverage=None, seed=0, oriented=True):
+    """Écrit les fichiers d'un quartier dans root/<slug>/ ; renvoie le dossier."""
+    folder = os.path.join(root, slug)
+    os.makedirs(folder, exist_ok=True)
+
+    def dump(obj, name):
+        with open(os.path.join(folder, name), "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    register(G, slug)
+    # = G.to_undirected(), sans sa deepcopy des attributs (le tiers du temps à 1M arêtes)
+    G_un = nx.MultiGraph(crs=G.graph["crs"])
+    G_un.add_nodes_from(G.nodes(data=True))
+    G_un.add_edges_from(G.edges(keys=True, data=True))
+    dump(G, "raw_graph_oriented.pkl")
+    dump(G_un, "raw_graph.pkl")
+
+    print(f"🧩 {slug}: Eulérisation ({sum(d % 2 for _, d in G_un.degree)} nœuds impairs)")
+    G_eu = eulerize_fast(G_un)
+    dump(G_eu, "eulerized_graph.pkl")
+    circuit = list(nx.eulerian_circuit(G_eu))
+    with open(os.path.join(folder, "eulerian_path.json"), "w") as f:
+        json.dump([{"u": u, "v": v} for u, v in circuit], f)
+
+    if oriented:
+        G_eu_dir, walk = _oriented(G, G_eu, circuit)
+        dump(G_eu_dir, "eulerized_graph_oriented.pkl")
+        with open(os.path.join(folder, "eulerian_path_oriented.json"), "w") as f:
+            json.dump([{"u": u, "v": v} for u, v in walk], f)
+
+    simulate_for_folder(folder, coverage, base=seed)
+    return folder
+
+def default_slug(kind, edges, seed):
+    return f"synthetic-{kind}-{edges}-s{seed}"
+
+# ---------------------------------------------------------------------------
+def parse_args():
+    p = argparse.ArgumentParser(description="Generate a synthetic OSM-shaped city.")
+    p.add_argument("kind", choices=KINDS)
+    p.add_argument("--edges", type=int, default=10_000,
+                   help="approximate number of street segments (1k … 1M)")
+    p.add_argument("--oneway", type=float, default=0.0, help="fraction of one-way streets")
+    p.add_argument("--coverage", type=float, default=0.3, help="snowy fraction of edges")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--slug", help="folder name (default: synthetic-<kind>-<edges>-s<seed>)")
+    p.add_argument("--root", default=ROOT, help=f"parent folder (default: {ROOT})")
+    p.add_argument("--no-oriented", action="store_true",
+                   help="skip the oriented graph and walk")
+    return p.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    slug = args.slug or default_slug(args.kind, args.edges, args.seed)
+    G = generate(args.kind, args.edges, args.oneway, args.seed)
+    print(f"🏙️  {slug}: {G.number_of_nodes()} nœuds, {G.number_of_edges()} arêtes orientées")
+    folder = write_city(G, slug, args.root, args.coverage, args.seed, not args.no_oriented)
+    print(f"✅ {slug} → {folder}")
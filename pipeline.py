@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Incremental runner for the Makefile stages.
+
+Each stage declares the files it reads and writes (glob patterns, with
+{borough} standing for a borough folder when the stage runs per borough).
+Every stage reads and writes the borough folders resources/<slug>/, so
+a recon that rewrites eulerized_graph.pkl changes the input hash of the
+snow stage of that borough, and so on downstream.
+Inputs are content-hashed; a stage is skipped when both its input hash and
+its outputs are unchanged since the last successful run.  Stages on the
+same dependency level, and the boroughs of a per-borough stage, run in
+parallel.  The command line is part of the input hash, so e.g. a new
+BUDGET=... reruns the simulations.
+
+State lives in resources/.pipeline_state.json.
+
+    python3 pipeline.py                 # everything
+    python3 pipeline.py snow simulate   # these stages (and their deps)
+    python3 pipeline.py --force snow    # ignore the hashes
+"""
+import os, sys, glob, json, hashlib, argparse, subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT       = "resources"
+STATE_PATH = os.path.join(ROOT, ".pipeline_state.json")
+PY         = sys.executable or "python3"
+
+# name -> definition.  "borough" globs the folders a per-borough stage
+# runs on; the folder path replaces {borough} in inputs/outputs/cmd.
+STAGES = {
+    "drone_recon": {
+        "cmd": [PY, "drone/generate_eulerian_paths.py"],
+        "inputs": ["drone/generate_eulerian_paths.py", "drone/osm_ingest.py"],
+        "outputs": ["resources/*/eulerized_graph.pkl",
+                    "resources/*/eulerian_path.json"],
+    },
+    "vehicle_recon_oriented": {
+        "cmd": [PY, "vehicle/generate_eulerian_paths_oriented.py"],
+        "inputs": ["vehicle/generate_eulerian_paths_oriented.py",
+                   "drone/osm_ingest.py"],
+        "outputs": ["resources/*/eulerized_graph_oriented.pkl",
+                    "resources/*/eulerian_path_oriented.json"],
+    },
+    "snow": {
+        "deps": ["drone_recon"],
+        "borough": "resources/*/eulerized_graph.pkl",
+        "cmd": [PY, "drone/drone_generate_snow.py", "--borough", "{slug}"],
+        "inputs": ["drone/drone_generate_snow.py",
+                   "{borough}/eulerized_graph.pkl"],
+        "outputs": ["{borough}/snow_map.csv", "{borough}/snow_params.json"],
+    },
+    "render": {
+        "deps": ["drone_recon"],
+        "cmd": [PY, "rendering/render.py"],
+        "inputs": ["rendering/render.py",
+                   "resources/*/eulerized_graph.pkl",
+                   "resources/*/eulerian_path.json"],
+        "outputs": ["resources/graph.html"],
+    },
+    "render_snow": {
+        "deps": ["snow", "vehicle_recon_oriented"],
+        "cmd": [PY, "rendering/render_snow.py"],
+        "inputs": ["rendering/render_snow.py",
+                   "resources/*/snow_map.csv",
+                   "resources/*/eulerized_graph_oriented.pkl",
+                   "resources/*/eulerian_path_oriented.json"],
+        "outputs": ["resources/graph_snow.html"],
+    },
+    "render_unified": {
+        "deps": ["vehicle_recon_oriented"],
+        "cmd": [PY, "rendering/render_oriented.py"],
+        "inputs": ["rendering/render_oriented.py",
+                   "resources/*/eulerized_graph_oriented.pkl",
+                   "resources/*/eulerian_path_oriented.json"],
+        "outputs": ["resources/oriented.html"],
+    },
+    "render_unified_snow": {
+        "deps": ["snow", "vehicle_recon_oriented"],
+        "cmd": [PY, "rendering/render_oriented_snow.py"],
+        "inputs": ["rendering/render_oriented_snow.py",
+                   "resources/*/snow_map.csv",
+                   "resources/*/eulerized_graph_oriented.pkl",
+                   "resources/*/eulerian_path_oriented.json"],
+        "outputs": ["resources/oriented_snow.html"],
+    },
+    "simulate": {
+        "deps": ["snow"],
+        "borough": "resources/*/snow_map.csv",
+        "cmd": [PY, "vehicle/batch_simulate.py", "-n", "{slug}", "-j", "1",
+                "--budget", os.environ.get("BUDGET", "10000")],
+        "inputs": ["vehicle/*.py", "vehicle/config.json",
+                   "{borough}/eulerized_graph.pkl",
+                   "{borough}/snow_map.csv"],
+        "outputs": ["{borough}/runs/*/vehicle_stats.json"],
+    },
+}
+
+# ---------------------------------------------------------------------------
+class FileHasher:
+    """sha1 of file contents, re-read only when (mtime, size) changed."""
+
+    def __init__(self, known):
+        self.known = known              # path -> [mtime_ns, size, sha1]
+
+    def file(self, path):
+        st = os.stat(path)
+        entry = self.known.get(path)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        self.known[path] = [st.st_mtime_ns, st.st_size, h.hexdigest()]
+        return h.hexdigest()
+
+    def files(self, patterns):
+        paths = sorted({p for pat in patterns
+                        for p in glob.glob(pat) if os.path.isfile(p)})
+        h = hashlib.sha1()
+        for p in paths:
+            h.update(p.encode())
+            h.update(self.file(p).encode())
+        return h.hexdigest(), len(paths)
+
+def load_state():
+    try:
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"stages": {}, "files": {}}
+
+def save_state(state):
+    os.makedirs(ROOT, exist_ok=True)
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, STATE_PATH)
+
+# ---------------------------------------------------------------------------
+def closure(targets):
+    """Targets plus all their dependencies."""
+    seen, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in seen:
+            seen.add(name)
+            todo.extend(STAGES[name].get("deps", []))
+    return seen
+
+def levels(names):
+    """Group stages by dependency depth; a level only needs earlier ones."""
+    depth = {}
+    def d(name):
+        if name not in depth:
+            deps = [x for x in STAGES[name].get("deps", []) if x in names]
+            depth[name] = 1 + max((d(x) for x in deps), default=-1)
+        return depth[name]
+    by_level = {}
+    for name in sorted(names):
+        by_level.setdefault(d(name), []).append(name)
+    return [by_level[k] for k in sorted(by_level)]
+
+def expand(name):
+    """(job key, cmd, inputs, outputs) for each job of a stage."""
+    stage = STAGES[name]
+    if "borough" not in stage:
+        return [(name, stage["cmd"], stage["inputs"], stage["outputs"])]
+    jobs = []
+    for marker in sorted(glob.glob(stage["borough"])):
+        folder = os.path.dirname(marker)
+        slug = os.path.basename(folder)
+        fill = lambda s: s.replace("{borough}", folder).replace("{slug}", slug)
+        jobs.append((f"{name}:{slug}",
+                     [fill(c) for c in stage["cmd"]],
+                     [fill(p) for p in stage["inputs"]],
+                     [fill(p) for p in stage["outputs"]]))
+    return jobs
+
+def run_job(key, cmd):
+    print(f"▶ {key}: {' '.join(cmd)}")
+    res = subprocess.run(cmd, capture_output=True, text=True)
+    out = (res.stdout + res.stderr).strip()
+    if out:
+        print("\n".join(f"  [{key}] {line}" for line in out.splitlines()))
+    return res.returncode
+
+def input_hash(hasher, cmd, inputs):
+    files, _ = hasher.files(inputs)
+    return hashlib.sha1(" ".join(cmd[1:]).encode() + files.encode()).hexdigest()
+
+def run(targets, jobs=None, force=False, dry_run=False):
+    state = load_state()
+    hasher = FileHasher(state.setdefault("files", {}))
+    stages_state = state.setdefault("stages", {})
+    failed = set()
+
+    for level in levels(closure(targets)):
+        todo = []
+        for name in level:
+            if any(d in failed for d in STAGES[name].get("deps", [])):
+                print(f"⏭ {name}: skipped (dependency failed)")
+                failed.add(name)
+                continue
+            for key, cmd, inputs, outputs in expand(name):
+                in_hash = input_hash(hasher, cmd, inputs)
+                out_hash, n_out = hasher.files(outputs)
+                prev = stages_state.get(key, {})
+                if (not force and n_out and prev.get("inputs") == in_hash
+                        and prev.get("outputs") == out_hash):
+                    print(f"✔ {key}: up to date")
+                    continue
+                todo.append((name, key, cmd, inputs, outputs))
+
+        if dry_run:
+            for _, key, cmd, _, _ in todo:
+                print(f"… {key}: would run {' '.join(cmd)}")
+            continue
+
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as ex:
+            codes = list(ex.map(lambda t: run_job(t[1], t[2]), todo))
+
+        for (name, key, cmd, inputs, outputs), code in zip(todo, codes):
+            if code != 0:
+                print(f"❌ {key}: exit code {code}")
+                failed.add(name)
+                stages_state.pop(key, None)
+                continue
+            stages_state[key] = {"inputs": input_hash(hasher, cmd, inputs),
+                                 "outputs": hasher.files(outputs)[0]}
+        save_state(state)
+
+    return not failed
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Run pipeline stages incrementally.")
+    p.add_argument("targets", nargs="*",
+                   help="stages to bring up to date (default: all): "
+                        + ", ".join(STAGES))
+    p.add_argument("-j", "--jobs", type=int, help="parallel jobs")
+    p.add_argument("--force", action="store_true",
+                   help="rerun even if inputs are unchanged")
+    p.add_argument("--dry-run", action="store_true",
+                   help="only print what would run")
+    args = p.parse_args()
+    unknown = [t for t in args.targets if t not in STAGES]
+    if unknown:
+        p.error(f"unknown stage(s): {', '.join(unknown)}")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    ok = run(args.targets or list(STAGES), args.jobs, args.force, args.dry_run)
+    sys.exit(0 if ok else 1)
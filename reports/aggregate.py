@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Grouped statistics over the run store (reports/runs.sqlite).
+
+For each group (strategy, neighborhood or config hash) and metric:
+n, mean, std, p50, p95 and a 95 % confidence interval of the mean
+(normal approximation).  The partial aggregates -- count, sum, sum of
+squares and the values for the percentiles -- are cached in
+reports/aggregate_cache.pkl with the id of the last run folded in, so a
+new call only reads the runs added since (pandas groupby on those rows)
+and merges them.  compares_types_graph.py and compares_types_table.py
+both read this summary.
+
+    python3 reports/aggregate.py              # par stratégie
+    python3 reports/aggregate.py -g neighborhood
+"""
+import os
+import math
+import pickle
+import argparse
+import numpy as np
+import pandas as pd
+import run_store
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHE = os.path.join(HERE, "aggregate_cache.pkl")
+Z95 = 1.96
+NO_GROUP = "<none>"         # runs sans valeur de groupe (import legacy sans config_hash)
+
+def _new_rows(group, metrics, after, path):
+    cols = ", ".join(f"json_extract(summary, '$.{m}') AS {m}" for m in metrics)
+    db = run_store.connect(path)
+    try:
+        return pd.read_sql_query(f"SELECT id, {group} AS grp, {cols} FROM runs "
+                                 "WHERE id > ? ORDER BY id", db, params=(after,))
+    finally:
+        db.close()
+
+def fold(partial, rows, metrics):
+    """Ajoute les lignes (DataFrame id / grp / métriques) aux agrégats partiels."""
+    values = rows[list(metrics)].astype(float)
+    grp = rows["grp"].fillna(NO_GROUP)      # NaN != NaN : un nouveau groupe à chaque appel sinon
+    grouped = values.groupby(grp)
+    counts, sums = grouped.count(), grouped.sum()
+    sumsq = (values ** 2).groupby(grp).sum()
+    for grp, block in grouped:
+        g = partial.setdefault(grp, {})
+        for m in metrics:
+            p = g.setdefault(m, {"n": 0, "sum": 0.0, "sumsq": 0.0, "values": np.empty(0)})
+            p["n"] += int(counts.at[grp, m])
+            p["sum"] += float(sums.at[grp, m])
+            p["sumsq"] += float(sumsq.at[grp, m])
+            p["values"] = np.concatenate([p["values"], block[m].dropna().to_numpy()])
+    return partial
+
+def finalize(partial):
+    out = {}
+    for grp, metrics in partial.items():
+        out[grp] = {}
+        for m, p in metrics.items():
+            n = p["n"]
+            if not n:
+                continue
+            mean = p["sum"] / n
+            var = max(p["sumsq"] - n * mean * mean, 0.0) / (n - 1) if n > 1 else 0.0
+            half = Z95 * math.sqrt(var / n)
+            p50, p95 = np.percentile(p["values"], [50, 95])
+            out[grp][m] = {"n": n, "mean": mean, "std": math.sqrt(var),
+                           "p50": float(p50), "p95": float(p95),
+                           "ci95_lo": mean - half, "ci95_hi": mean + half}
+    return out
+
+def _load(cache):
+    try:
+        with open(cache, "rb") as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return {}
+
+def _save(state, cache):
+    tmp = f"{cache}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f)
+    os.replace(tmp, cache)
+
+def summary(group="strategy", metrics=run_store.METRICS, path=run_store.STORE, cache=CACHE):
+    """{groupe: {métrique: {n, mean, std, p50, p95, ci95_lo, ci95_hi}}}, mis à jour incrémentalement."""
+    if group not in run_store.GROUPS:
+        raise ValueError(f"cannot group by {group}")
+    state = _load(cache) if cache else {}
+    key = (os.path.abspath(path), group, tuple(metrics))
+    entry = state.get(key)
+    sid = run_store.store_id(path)
+    if entry is None or entry["store_id"] != sid:       # store recréé : tout replier
+        entry = {"store_id": sid, "last_id": 0, "partial": {}, "summary": {}}
+    rows = _new_rows(group, metrics, entry["last_id"], path)
+    if len(rows):
+        fold(entry["partial"], rows, metrics)
+        entry["last_id"] = int(rows["id"].max())
+        entry["summary"] = finalize(entry["partial"])
+        state[key] = entry
+        if cache:
+            _save(state, cache)
+    return entry["summary"]
+
+def means(stats):
+    """{groupe: {métrique: moyenne}} (la forme qu'attendent les rapports)."""
+    return {grp: {m: s["mean"] for m, s in metrics.items()} for grp, metrics in stats.items()}
+
+# ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Statistiques groupées du run store.")
+    p.add_argument("-g", "--group", default="strategy", choices=run_store.GROUPS)
+    args = p.parse_args()
+    for grp, metrics in summary(args.group).items():
+        n = max((s["n"] for s in metrics.values()), default=0)
+        print(f"\n📊 {args.group} = {grp}  ({n} runs)")
+        print(f"{'':16}{'mean':>12}{'± ci95':>10}{'p50':>12}{'p95':>12}")
+        for m, s in metrics.items():
+            print(f"{m:16}{s['mean']:>12.2f}{s['ci95_hi'] - s['mean']:>10.2f}"
+                  f"{s['p50']:>12.2f}{s['p95']:>12.2f}")
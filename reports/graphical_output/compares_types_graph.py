@@ -1,10 +1,12 @@
-import json
-from collections import defaultdict
-from statistics import mean
+import os
+import sys
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import aggregate
+
 REFERENCE_SNOW_CLEARED = 500
 
 UNITS = {
@@ -18,28 +20,6 @@ UNITS = {
 
 EXCLUDED_KEYS = {'snow_cleared'}
 
-def load_data(filename):
-    with open(filename, 'r') as f:
-        return json.load(f)
-
-def average_by_strategy(data):
-    grouped = defaultdict(list)
-    for entry in data:
-        strategy = entry['strategy']
-        grouped[strategy].append(entry)
-
-    averages = {}
-    for strategy, entries in grouped.items():
-        averages[strategy] = {}
-        keys = entries[0].keys()
-        for key in keys:
-            if key in EXCLUDED_KEYS or not isinstance(entries[0][key], (int, float)):
-                continue
-            values = [e[key] for e in entries]
-            averages[strategy][key] = mean(values)
-        averages[strategy]['snow_cleared'] = mean([e['snow_cleared'] for e in entries])
-    return averages
-
 def normalize_by_snow(averages, reference):
     normalized = {}
     for strategy, stats in averages.items():
@@ -92,10 +72,8 @@ def plot_histogram(df):
     plt.show()
 
 def main():
-    json_file = 'reports/all_runs.json'
-    data = load_data(json_file)
-
-    averages = average_by_strategy(data)
+    # Même résumé pré-calculé pour le tableau et le graphique (aggregate.py)
+    averages = aggregate.means(aggregate.summary("strategy"))
     normalized = normalize_by_snow(averages, REFERENCE_SNOW_CLEARED)
 
     df = create_dataframe_for_plot(normalized)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Append-only store of simulation summaries (reports/runs.sqlite).
+
+reports/all_runs.json was read, extended and rewritten by every run:
+O(history) per run, and two processes writing at once could lose or
+corrupt runs.  The store is a SQLite database in WAL mode: each run is
+one INSERT in its own transaction, concurrent writers queue on the lock
+(busy timeout) instead of clobbering each other, and readers never block
+writers.  Runs are indexed by neighborhood / strategy / config hash and
+the summary itself is kept as JSON, so the report scripts aggregate in
+SQL instead of loading every run.
+
+all_runs.json is imported once, the first time the store is opened
+(recorded in the meta table); `import` re-runs it explicitly.
+
+    python3 reports/run_store.py import [reports/all_runs.json]
+    python3 reports/run_store.py query -n anjou -s eco
+    python3 reports/run_store.py averages
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STORE = os.path.join(HERE, "runs.sqlite")
+LEGACY_FILE = os.path.join(HERE, "all_runs.json")
+
+# métriques numériques d'un résumé (simulation.run_summary)
+METRICS = ("vehicles_used", "snow_cleared", "visited_nodes", "distance_km", "time_h", "cost_total")
+GROUPS = ("neighborhood", "strategy", "config_hash")
+# réglages d'exécution seulement (mesure, reprise, cache) : sans effet sur le résultat d'un run
+RUNTIME_KEYS = ("profile", "checkpoint", "result_cache")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    created      REAL NOT NULL,
+    neighborhood TEXT,
+    strategy     TEXT,
+    config_hash  TEXT,
+    summary      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_hood_strategy ON runs (neighborhood, strategy);
+CREATE INDEX IF NOT EXISTS runs_config ON runs (config_hash);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+def config_hash(config):
+    """Empreinte stable d'une config (dict) pour regrouper les runs comparables."""
+    config = {k: v for k, v in config.items() if k not in RUNTIME_KEYS}
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+def connect(path=STORE, legacy=LEGACY_FILE):
+    db = sqlite3.connect(path, timeout=30)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    with db:    # identité du store : les caches dérivés (aggregate.py) savent s'il a été recréé
+        db.execute("INSERT OR IGNORE INTO meta VALUES ('store_id', lower(hex(randomblob(8))))")
+    if legacy and os.path.exists(legacy):
+        done = db.execute("SELECT 1 FROM meta WHERE key = 'legacy_import'").fetchone()
+        if not done:
+            import_json(legacy, db, once=True)
+    return db
+
+def _row(summary, created):
+    return (created, summary.get("neighborhood"), summary.get("strategy"),
+            summary.get("config_hash"), json.dumps(summary))
+
+def append(summaries, path=STORE):
+    """Ajoute des résumés en une transaction (sûr avec plusieurs écrivains)."""
+    db = connect(path)
+    try:
+        now = time.time()
+        with db:
+            db.executemany("INSERT INTO runs (created, neighborhood, strategy, config_hash, summary) "
+                           "VALUES (?, ?, ?, ?, ?)", [_row(s, now) for s in summaries])
+    finally:
+        db.close()
+
+def import_json(json_file=LEGACY_FILE, db=None, once=False):
+    """Importe un all_runs.json ; renvoie le nombre de runs importés.
+    once : ne rien faire si un import a déjà eu lieu (ouverture du store)."""
+    own = db is None
+    db = db or connect(legacy=None)
+    try:
+        with open(json_file) as f:
+            runs = json.load(f)
+        if not isinstance(runs, list):
+            runs = []
+        mtime = os.path.getmtime(json_file)
+        # BEGIN IMMEDIATE : deux processus qui ouvrent le store ensemble n'importent qu'une fois
+        db.isolation_level = None
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if once and db.execute("SELECT 1 FROM meta WHERE key = 'legacy_import'").fetchone():
+                db.execute("COMMIT")
+                return 0
+            db.executemany("INSERT INTO runs (created, neighborhood, strategy, config_hash, summary) "
+                           "VALUES (?, ?, ?, ?, ?)", [_row(s, mtime) for s in runs])
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('legacy_import', ?)",
+                       (json.dumps({"file": json_file, "runs": len(runs), "at": time.time()}),))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        finally:
+            db.isolation_level = ""
+        return len(runs)
+    finally:
+        if own:
+            db.close()
+
+def _where(neighborhood=None, strategy=None, config_hash=None):
+    clauses, args = [], []
+    for column, value in (("neighborhood", neighborhood), ("strategy", strategy),
+                          ("config_hash", config_hash)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            args.append(value)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+def query(neighborhood=None, strategy=None, config_hash=None, path=STORE):
+    """Résumés correspondants, un par un (ordre d'insertion)."""
+    db = connect(path)
+    try:
+        where, args = _where(neighborhood, strategy, config_hash)
+        for row in db.execute(f"SELECT summary FROM runs{where} ORDER BY id", args):
+            yield json.loads(row["summary"])
+    finally:
+        db.close()
+
+def store_id(path=STORE):
+    db = connect(path)
+    try:
+        return db.execute("SELECT value FROM meta WHERE key = 'store_id'").fetchone()[0]
+    finally:
+        db.close()
+
+def averages(group="strategy", metrics=METRICS, path=STORE, **filters):
+    """{valeur de group: {métrique: moyenne}} calculé par SQLite."""
+    if group not in GROUPS:
+        raise ValueError(f"cannot group by {group}")
+    cols = ", ".join(f"AVG(json_extract(summary, '$.{m}'))" for m in metrics)
+    where, args = _where(**filters)
+    db = connect(path)
+    try:
+        rows = db.execute(f"SELECT {group}, {cols} FROM runs{where} GROUP BY {group} ORDER BY {group}",
+                          args).fetchall()
+    finally:
+        db.close()
+    return {row[0]: {m: row[i + 1] for i, m in enumerate(metrics) if row[i + 1] is not None}
+            for row in rows}
+
+# ---------------------------------------------------------------------------
+def parse_args():
+    p = argparse.ArgumentParser(description="Store des résumés de simulation.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="importer un all_runs.json")
+    imp.add_argument("json_file", nargs="?", default=LEGACY_FILE)
+    for name in ("query", "averages"):
+        q = sub.add_parser(name)
+        q.add_argument("-n", "--neighborhood")
+        q.add_argument("-s", "--strategy")
+        q.add_argument("--config-hash")
+    return p.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.cmd == "import":
+        print(f"📥 {import_json(args.json_file)} runs importés dans {STORE}")
+    else:
+        filters = dict(neighborhood=args.neighborhood, strategy=args.strategy,
+                       config_hash=args.config_hash)
+        if args.cmd == "query":
+            for summary in query(**filters):
+                print(json.dumps(summary))
+        else:
+            print(json.dumps(averages(**filters), indent=2))
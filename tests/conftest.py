@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Les scripts importent leurs voisins directement : mêmes chemins que lancés depuis la racine
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for folder in ("vehicle", "drone", "reports"):
+    sys.path.append(os.path.join(ROOT, folder))
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+from aggregate import fold, finalize, NO_GROUP
+
+METRICS = ("cost_total", "time_h")
+
+def rows(ids, groups, rng):
+    return pd.DataFrame({"id": ids, "grp": groups,
+                         "cost_total": rng.uniform(100, 900, len(ids)),
+                         "time_h": rng.uniform(1, 12, len(ids))})
+
+def test_fold_twice_matches_single_pass_with_null_groups():
+    rng = np.random.default_rng(0)
+    first = rows([1, 2, 3, 4], ["a", None, "b", None], rng)
+    second = rows([5, 6, 7], [None, "a", None], rng)
+
+    incremental = finalize(fold(fold({}, first, METRICS), second, METRICS))
+    single = finalize(fold({}, pd.concat([first, second], ignore_index=True), METRICS))
+
+    assert sorted(incremental) == sorted(single) == sorted(["a", "b", NO_GROUP])
+    for grp, metrics in single.items():
+        for m, s in metrics.items():
+            for stat, value in s.items():
+                assert np.isclose(incremental[grp][m][stat], value), (grp, m, stat)
+    assert incremental[NO_GROUP]["cost_total"]["n"] == 4
@@ -0,0 +1,20 @@
+import os
+import networkx as nx
+from brain import VehicleAgent, load_config
+
+CONFIG = load_config(os.path.join(os.path.dirname(__file__), "..", "vehicle", "config.json"))
+
+def test_fallback_route_directed_dead_end():
+    # 3→2 est une arête entrante en 2 : elle ne doit pas y retenir l'agent
+    G = nx.MultiDiGraph()
+    G.add_edge(1, 2, length=1.0)
+    G.add_edge(3, 2, length=1.0)
+    assert VehicleAgent(1, CONFIG)._fallback_route(G) == [(1, 2)]
+
+def test_fallback_route_undirected_covers_every_edge():
+    G = nx.MultiGraph()
+    nx.add_path(G, [1, 2, 3, 4], length=1.0)
+    G.add_edge(2, 5, length=1.0)
+    route = VehicleAgent(1, CONFIG)._fallback_route(G)
+    assert {(min(u, v), max(u, v)) for u, v in route} == {(1, 2), (2, 3), (3, 4), (2, 5)}
+    assert all(b == c for (_, b), (c, _) in zip(route, route[1:]))
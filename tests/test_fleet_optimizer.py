@@ -0,0 +1,17 @@
+import fleet_optimizer as fo
+
+def test_compositions_bound_the_total():
+    fleets = list(fo.compositions(3, 4, 3))
+    assert len(fleets) == len(set(fleets))
+    assert all(sum(f) <= 4 and max(f) <= 3 for f in fleets)
+    assert (0, 0, 0) in fleets and (3, 1, 0) in fleets and (4, 0, 0) not in fleets
+    assert len(fleets) == 32                # C(7, 3) = 35 sans les trois (4, 0, 0)
+
+def test_memo_keeps_the_most_recent(monkeypatch):
+    monkeypatch.setattr(fo, "_memo", fo.OrderedDict())
+    monkeypatch.setattr(fo, "MEMO_SIZE", 3)
+    for i in range(5):
+        fo.remember(i, {"cost": i})
+    fo.remember(2, {"cost": 2})
+    fo.remember(5, {"cost": 5})
+    assert list(fo._memo) == [4, 2, 5]
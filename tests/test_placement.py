@@ -0,0 +1,19 @@
+import networkx as nx
+from placement import depot_nodes
+
+def street(n=10, snowy=(7, 8, 9)):
+    """Rue de n nœuds d'ouest en est, neige seulement au bout est."""
+    G = nx.MultiGraph()
+    for i in range(n):
+        G.add_node(i, x=-73.60 + i * 0.001, y=45.50)
+    for i in range(n - 1):
+        G.add_edge(i, i + 1, length=80.0, snow=i in snowy)
+    return G
+
+def test_count_one_places_a_depot():
+    G = street()
+    assert depot_nodes(G, {"depots": {"count": 1}}) == [8]
+
+def test_first_node_only_without_depots():
+    G = street()
+    assert depot_nodes(G, {}) == [0]
@@ -0,0 +1,18 @@
+import numpy as np
+from drone_generate_snow import noise_field, calibrate_threshold
+
+def field(seed, n=4000):
+    rng = np.random.default_rng(seed)
+    return noise_field(rng.random(n), rng.random(n), base=seed)
+
+def test_calibrate_threshold_hits_coverage():
+    intensity = field(7)
+    for coverage in (0.05, 0.3, 0.5, 0.9):
+        threshold = calibrate_threshold(intensity, coverage)
+        reached = np.mean(intensity > threshold)
+        assert abs(reached - coverage) <= 0.005, (coverage, reached)
+
+def test_calibrate_threshold_bounds():
+    intensity = field(3)
+    assert not np.any(intensity > calibrate_threshold(intensity, 0.0))
+    assert np.all(intensity > calibrate_threshold(intensity, 1.0))
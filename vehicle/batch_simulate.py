@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Non-interactive simulation of every borough × strategy, in a process pool.
+
+Each run writes its vehicle_cleared.csv / vehicle_path.ndjson.gz /
+vehicle_stats.json under resources/<borough>/runs/<strategy>/ and its
+summary is appended to the run store (reports/runs.sqlite) once all runs are done.
+
+    python3 vehicle/batch_simulate.py --budget 8000
+    python3 vehicle/batch_simulate.py -n anjou verdun -s economie_argent --seed 1
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from simulation import (ROOT, CONFIG_PATH, SUMMARY_FILE, run_simulation,
+                        run_summary, append_run_summaries)
+
+STRATEGIES = ("economie_argent", "economie_temps")
+
+def has_inputs(slug):
+    folder = os.path.join(ROOT, slug)
+    return all(os.path.isfile(os.path.join(folder, f))
+               for f in ("eulerized_graph.pkl", "snow_map.csv"))
+
+def run_one(job):
+    neighborhood, strategy, budget, config, seed = job
+    out_dir = os.path.join(ROOT, neighborhood, "runs", strategy)
+    return run_simulation(neighborhood, strategy,
+                          budget if strategy == "economie_temps" else None,
+                          config, seed, output_dir=out_dir)
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Batch snow-clearing simulations.")
+    p.add_argument("-n", "--neighborhoods", nargs="+",
+                   help="borough folders under resources/ (default: all ready ones)")
+    p.add_argument("-s", "--strategies", nargs="+", choices=STRATEGIES,
+                   default=list(STRATEGIES))
+    p.add_argument("-b", "--budget", type=float,
+                   help="budget for economie_temps (required for that strategy)")
+    p.add_argument("-c", "--config", default=CONFIG_PATH)
+    p.add_argument("--seed", type=int)
+    p.add_argument("-j", "--workers", type=int, help="processes (default: CPUs)")
+    p.add_argument("--no-summary", action="store_true",
+                   help=f"do not append to {SUMMARY_FILE}")
+    args = p.parse_args()
+    if "economie_temps" in args.strategies and not args.budget:
+        p.error("--budget is required for economie_temps")
+    return args
+
+def main():
+    args = parse_args()
+    hoods = args.neighborhoods or sorted(n for n in os.listdir(ROOT) if has_inputs(n))
+    jobs = [(n, s, args.budget, args.config, args.seed)
+            for n in hoods for s in args.strategies]
+    if not jobs:
+        print("⚠ No neighborhood with eulerized_graph.pkl + snow_map.csv found.")
+        return
+
+    print(f"🚀 {len(jobs)} simulations ({len(hoods)} quartiers × "
+          f"{len(args.strategies)} stratégies)")
+    t0 = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as ex:
+        futures = {ex.submit(run_one, job): job for job in jobs}
+        for fut in as_completed(futures):
+            neighborhood, strategy = futures[fut][:2]
+            try:
+                stats = fut.result()
+            except Exception as e:
+                print(f"❌ {neighborhood} / {strategy}: {e}")
+                continue
+            g = stats["global_stats"]
+            print(f"✔ {neighborhood:40} {strategy:16} "
+                  f"{g['total_cost']:>10.2f} €  {g['max_time_hours']:>7.2f} h  "
+                  f"({stats['runtime_s']:.1f} s)")
+            results.append(stats)
+
+    if results and not args.no_summary:
+        append_run_summaries([run_summary(s) for s in results])
+        print(f"📝 {len(results)} résumés ajoutés dans {SUMMARY_FILE}")
+    print(f"🏁 Terminé en {time.perf_counter() - t0:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,38 @@
+import heapq
 import random
 import json
 import networkx as nx
 from itertools import combinations
+from memory import make_memory
+import profiler
+import memprof
+
+def load_config(config):
+    """Accepte un chemin vers config.json ou un dict déjà chargé"""
+    if isinstance(config, dict):
+        return config
+    with open(config) as f:
+        return json.load(f)
+
+def snow_scan(G):
+    """True s'il reste une arête enneigée (arrêt à la première trouvée)"""
+    p = profiler.active
+    if p:
+        p.count("snow_scans")
+    if hasattr(G, "snow_remaining"):
+        return G.snow_remaining() > 0
+    for i, (u, v, key) in enumerate(G.edges(keys=True)):
+        if G[u][v][key].get('snow', False):
+            if p:
+                p.count("edges_scanned", i + 1)
+            return True
+    if p:
+        p.count("edges_scanned", G.number_of_edges())
+    return False
 
 class VehicleAgent:
-    def __init__(self, start_node, config_path):
-        with open(config_path) as f:
-            config = json.load(f)
+    def __init__(self, start_node, config):
+        config = load_config(config)
 
         self.current_node = start_node
         self.start_node = start_node
@@ -15,29 +41,49 @@ class VehicleAgent:
         self.fuel_per_meter = config["fuel_per_meter"]
         self.snow_capacity = config["snow_capacity"]
         self.return_to_base = config.get("return_to_base", False)
+        self.replan = config.get("replan", False)
 
         self.distance_traveled = 0.0
 
-        self.memory = []
+        self.memory = make_memory(config)   # arêtes récentes, politique config["memory_policy"]
         self.path = [start_node]
         self.planned_route = []  # Route calculée par le postier chinois
         self.route_index = 0     # Index actuel dans la route
+        self.route_cache = None  # {nœud de départ: route} partagé entre simulations
+        self.rng = random.Random()  # hasard propre à l'agent, graine fixée par la simulation
+
+        # Re-planification (replan.py) : version de la neige vue et latence de chaque réparation
+        self.seen_snow_version = None
+        self.replan_latencies_ms = []
 
         # Stats
         self.steps_taken = 0
         self.snow_cleared = 0
         self.fuel_used = 0.0
 
+        # Retours au dépôt (return_to_base) : plein et vidage
+        self.depot_returns = 0
+        self.fuel_at_refill = 0.0   # fuel_used au dernier plein
+        self.load = 0               # arêtes déneigées depuis le dernier vidage
+
     def chinese_postman_route(self, G):
         """
         Calcule la route optimale du postier chinois pour parcourir toutes les arêtes
         """
-        # Créer une copie du graphe pour les calculs
-        graph_copy = G.copy()
-
         # Étape 1: Vérifier si le graphe est eulérien
-        odd_degree_nodes = [node for node in graph_copy.nodes()
-                            if graph_copy.degree(node) % 2 == 1]
+        odd_degree_nodes = [node for node in G.nodes()
+                            if G.degree(node) % 2 == 1]
+
+        # Graphe en mémoire partagée : circuit calculé sans copie
+        if not odd_degree_nodes and hasattr(G, "eulerian_circuit"):
+            try:
+                return G.eulerian_circuit(self.current_node)
+            except nx.NetworkXError:
+                pass
+
+        # Créer une copie du graphe pour les calculs
+        with memprof.stage("postman_copy"):
+            graph_copy = G.copy()
 
         if not odd_degree_nodes:
             # Le graphe est déjà eulérien, on peut faire un circuit eulérien
@@ -48,7 +94,8 @@ class VehicleAgent:
                 return self._fallback_route(graph_copy)
 
         # Étape 2: Trouver les paires de nœuds de degré impair avec distance minimale
-        min_weight_pairs = self._find_minimum_weight_matching(graph_copy, odd_degree_nodes)
+        with profiler.phase("matching"), memprof.stage("postman_matching"):
+            min_weight_pairs = self._find_minimum_weight_matching(graph_copy, odd_degree_nodes)
 
         # Étape 3: Ajouter les arêtes nécessaires pour rendre le graphe eulérien
         for node1, node2 in min_weight_pairs:
@@ -95,6 +142,7 @@ class VehicleAgent:
                         distances[(node1, node2)] = dist
                     except nx.NetworkXNoPath:
                         distances[(node1, node2)] = float('inf')
+        memprof.snapshot()
 
         # Trouver l'appariement de poids minimum (algorithme simple pour petits graphes)
         return self._minimum_weight_perfect_matching(odd_nodes, distances)
@@ -139,54 +187,109 @@ class VehicleAgent:
 
     def _fallback_route(self, G):
         """
-        Route de secours si l'algorithme du postier chinois échoue
+        Route de secours si l'algorithme du postier chinois échoue : on suit
+        les arêtes non visitées et, dans une impasse, on rejoint le nœud le
+        plus proche (en longueur) qui en a encore.
         """
-        edges = list(G.edges())
-        if not edges:
+        p = profiler.active
+        if p:
+            p.count("fallback_routes")
+        # Index des arêtes restantes : paires non visitées et leur nombre par nœud
+        unvisited = {(min(u, v), max(u, v)) for u, v in G.edges()}
+        if not unvisited:
             return []
+        directed = G.is_directed()
+
+        def exits(pair):
+            """Extrémités d'où la paire peut être empruntée (sens des arêtes si orienté)"""
+            u, v = pair
+            if not directed:
+                return {u, v}
+            return {a for a, b in ((u, v), (v, u)) if G.has_edge(a, b)}
+
+        remaining = {}
+        for pair in unvisited:
+            for n in exits(pair):
+                remaining[n] = remaining.get(n, 0) + 1
+
+        def visit(pair):
+            unvisited.discard(pair)
+            for n in exits(pair):
+                remaining[n] -= 1
 
-        # Créer une route simple qui visite toutes les arêtes
         route = []
         current = self.current_node
-        visited_edges = set()
-
-        while len(visited_edges) < len(edges):
+        while unvisited:
             # Trouver une arête non visitée depuis le nœud actuel
-            found = False
-            for neighbor in G[current]:
-                edge_key = (min(current, neighbor), max(current, neighbor))
-                if edge_key not in visited_edges:
-                    route.append((current, neighbor))
-                    visited_edges.add(edge_key)
-                    current = neighbor
-                    found = True
-                    break
-
-            if not found:
-                # Se déplacer vers un nœud avec des arêtes non visitées
-                for edge in edges:
-                    edge_key = (min(edge[0], edge[1]), max(edge[0], edge[1]))
-                    if edge_key not in visited_edges:
-                        # Aller vers ce nœud (chemin le plus court)
-                        try:
-                            path_to_edge = nx.shortest_path(G, current, edge[0])
-                            for i in range(len(path_to_edge) - 1):
-                                route.append((path_to_edge[i], path_to_edge[i + 1]))
-                            current = edge[0]
-                            break
-                        except nx.NetworkXNoPath:
-                            continue
+            if remaining.get(current, 0):
+                for neighbor in G[current]:
+                    edge_key = (min(current, neighbor), max(current, neighbor))
+                    if edge_key in unvisited:
+                        route.append((current, neighbor))
+                        visit(edge_key)
+                        current = neighbor
+                        break
                 else:
-                    break
+                    remaining[current] = 0          # compte périmé : ne pas y revenir
+                    neighbor = None
+                if neighbor is not None:
+                    continue
+
+            # Impasse : plus court chemin vers le nœud le plus proche ayant des arêtes restantes
+            path = self._path_to_remaining(G, current, remaining)
+            if path is None:
+                break
+            route.extend(zip(path[:-1], path[1:]))
+            current = path[-1]
 
         return route
 
+    @staticmethod
+    def _path_to_remaining(G, source, remaining):
+        """Dijkstra multi-cibles (longueur des arêtes), arrêté au premier nœud avec remaining > 0"""
+        p = profiler.active
+        if p:
+            p.count("dijkstra_calls")
+        dist, parent = {source: 0.0}, {source: None}
+        heap, done, tie = [(0.0, 0, source)], set(), 1
+        while heap:
+            d, _, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            if remaining.get(u, 0):
+                path = [u]
+                while parent[path[-1]] is not None:
+                    path.append(parent[path[-1]])
+                return path[::-1]
+            for v in G[u]:
+                length = min(data.get("length", 1.0) for data in G[u][v].values()) \
+                    if G.is_multigraph() else G[u][v].get("length", 1.0)
+                if v not in done and d + length < dist.get(v, float("inf")):
+                    dist[v], parent[v] = d + length, u
+                    heapq.heappush(heap, (d + length, tie, v))
+                    tie += 1
+        return None
+
     def plan_route(self, G):
         """
         Planifie la route complète en utilisant l'algorithme du postier chinois
         """
+        # La route ne dépend que de la topologie : réutilisable tant que le graphe est le même
+        cache = self.route_cache
+        if cache is not None and self.current_node in cache:
+            p = profiler.active
+            if p:
+                p.count("route_cache_hits")
+            self.planned_route = list(cache[self.current_node])
+            self.route_index = 0
+            return len(self.planned_route) > 0
+
         print(f"🧭 Planification de la route avec l'algorithme du postier chinois...")
-        self.planned_route = self.chinese_postman_route(G)
+        with profiler.phase("planning"):
+            self.planned_route = self.chinese_postman_route(G)
+        if cache is not None:
+            cache[self.current_node] = tuple(self.planned_route)
         self.route_index = 0
         print(f"✅ Route planifiée: {len(self.planned_route)} segments")
         return len(self.planned_route) > 0
@@ -237,11 +340,14 @@ class VehicleAgent:
         """
         Comportement de fallback (ancien algorithme)
         """
+        p = profiler.active
+        if p:
+            p.count("fallback_steps")
         neighbors = self.observe(G)
         if not neighbors:
             return None
 
-        random.shuffle(neighbors)
+        self.rng.shuffle(neighbors)
 
         # Priorité aux arêtes avec de la neige non visitées
         for neighbor in neighbors:
@@ -252,19 +358,19 @@ class VehicleAgent:
                     for key in edge_data:
                         if edge_data[key].get("snow", False):
                             edge = (self.current_node, neighbor)
-                            if edge not in self.memory and (neighbor, self.current_node) not in self.memory:
+                            if edge not in self.memory:
                                 return neighbor
                 else:
                     # Graphe simple
                     if edge_data.get("snow", False):
                         edge = (self.current_node, neighbor)
-                        if edge not in self.memory and (neighbor, self.current_node) not in self.memory:
+                        if edge not in self.memory:
                             return neighbor
 
         # Arêtes non visitées
         for neighbor in neighbors:
             edge = (self.current_node, neighbor)
-            if edge not in self.memory and (neighbor, self.current_node) not in self.memory:
+            if edge not in self.memory:
                 return neighbor
 
         # Dernier recours
@@ -274,16 +380,12 @@ class VehicleAgent:
         """
         Vérifie s'il reste encore de la neige à déneiger dans le graphe
         """
-        for u, v, key in G.edges(keys=True):
-            if G[u][v][key].get('snow', False):
-                return True
-        return False
+        return snow_scan(G)
 
     def move_to(self, next_node, edge_length):
         edge = (self.current_node, next_node)
-        self.memory.append(edge)
-        if len(self.memory) > self.memory_size:
-            self.memory.pop(0)
+        hours = self.distance_traveled / getattr(self, "speed_kmph", 1)
+        self.memory.add(edge, hours)
 
         self.path.append(next_node)
         self.current_node = next_node
@@ -291,11 +393,22 @@ class VehicleAgent:
         self.fuel_used += edge_length * self.fuel_per_meter
         self.distance_traveled += edge_length
 
+    def fuel_left(self):
+        return self.fuel_capacity - (self.fuel_used - self.fuel_at_refill)
+
+    def refill(self):
+        """Plein et vidage au dépôt"""
+        self.fuel_at_refill = self.fuel_used
+        self.load = 0
+        self.depot_returns += 1
+
     def can_continue(self, G=None):
-        if self.fuel_used >= self.fuel_capacity:
-            return False
-        if self.snow_cleared >= self.snow_capacity:
-            return False
+        # Avec return_to_base, le véhicule repasse au dépôt au lieu de s'arrêter
+        if not self.return_to_base:
+            if self.fuel_used >= self.fuel_capacity:
+                return False
+            if self.snow_cleared >= self.snow_capacity:
+                return False
 
         # Si le graphe est fourni, vérifier s'il reste de la neige
         if G is not None and not self.has_snow_remaining(G):
@@ -309,8 +422,12 @@ class VehicleAgent:
             "snow_cleared": self.snow_cleared,
             "fuel_used": round(self.fuel_used, 2),
             "fuel_capacity": self.fuel_capacity,
+            "depot_returns": self.depot_returns,
             "path_length": len(self.path),
+            "started_at": self.start_node,
             "ended_at": self.current_node,
             "planned_route_length": len(self.planned_route),
-            "route_completion": round((self.route_index / len(self.planned_route)) * 100, 2) if self.planned_route else 0
+            "route_completion": round((self.route_index / len(self.planned_route)) * 100, 2) if self.planned_route else 0,
+            "replans": len(self.replan_latencies_ms),
+            "replan_ms_max": round(max(self.replan_latencies_ms, default=0.0), 3)
         }
\ No newline at end of file
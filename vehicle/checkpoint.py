@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Checkpoint and resume of long simulations.
+
+With config["checkpoint"]["enabled"], run_simulation hands a Checkpointer
+to each vehicle; every 64 steps it compares the clock with the next due
+time and, when due, writes one binary snapshot (pickle of plain
+fields and numpy arrays, written to a temporary file then renamed):
+
+- the run: arguments, config, depots, fleet, seed, snow version;
+- the snow flags as a bitset (np.packbits, in G.edges(keys=True) order);
+- every finished agent and the running one: position, route and route
+  cursor, counters, memory, RNG state, visited nodes;
+- the number of path-log lines already flushed, so the log is cut back
+  to that point on resume.
+
+The next checkpoint is due after max(interval_s, cost / max_overhead)
+seconds, so checkpointing never takes more than max_overhead of the run
+whatever the graph size.  The file is removed when the run completes.
+Each run has its own file (process id and run counter in the name), so
+concurrent runs of the same borough, strategy and seed (job server,
+sweep workers) never write or remove each other's checkpoints; nested
+runs (fleet verification) are not checkpointed.
+
+    python3 vehicle/checkpoint.py                     # latest checkpoint
+    python3 vehicle/checkpoint.py resources/anjou/checkpoints/economie_argent_seed0_4242-1.ckpt
+"""
+import os
+import glob
+import time
+import itertools
+import pickle
+import argparse
+import numpy as np
+import profiler
+
+INTERVAL_S = 60.0
+MAX_OVERHEAD = 0.02
+ROOT = "resources/"
+
+AGENT_FIELDS = ("start_node", "current_node", "route_index", "distance_traveled",
+                "steps_taken", "snow_cleared", "fuel_used", "depot_returns",
+                "fuel_at_refill", "load", "seen_snow_version", "replan_latencies_ms")
+
+_runs = itertools.count(1)
+
+def checkpoint_path(neighborhood, strategy, seed):
+    """Fichier propre à ce run : deux runs concurrents n'ont jamais le même."""
+    return os.path.join(ROOT, neighborhood, "checkpoints",
+                        f"{strategy}_seed{seed}_{os.getpid()}-{next(_runs)}.ckpt")
+
+# ---------------------------------------------------------------------------
+def snow_bits(G):
+    if hasattr(G, "snow_remaining"):
+        return np.packbits(np.asarray(G.snow, dtype=bool))
+    flags = np.fromiter((bool(d.get("snow", False)) for *_, d in G.edges(keys=True, data=True)),
+                        dtype=bool, count=G.number_of_edges())
+    return np.packbits(flags)
+
+def restore_snow(G, bits):
+    flags = np.unpackbits(bits, count=G.number_of_edges()).astype(bool)
+    if hasattr(G, "snow_remaining"):
+        G.snow[:] = flags
+        return
+    for (*_, d), flag in zip(G.edges(keys=True, data=True), flags.tolist()):
+        d["snow"] = flag
+
+def agent_state(agent):
+    state = {f: getattr(agent, f) for f in AGENT_FIELDS}
+    state.update(type_name=agent.type_name,
+                 route=np.array(agent.planned_route, dtype=np.int64).reshape(-1, 2),
+                 memory=agent.memory,
+                 rng=agent.rng.getstate(),
+                 track={"name": agent.path.name, "length": agent.path.length,
+                        "last": agent.path.last, "seq": agent.path.seq,
+                        "visited": np.fromiter(agent.path.visited, dtype=np.int64)})
+    return state
+
+def restore_agent(state, classes, config, track):
+    """Agent reconstruit depuis agent_state ; track : VehicleTrack qui reprend le chemin."""
+    cls = next(c for c in classes if c.type_name == state["type_name"])
+    agent = cls(state["start_node"], config)
+    for f in AGENT_FIELDS:
+        setattr(agent, f, state[f])
+    agent.planned_route = [tuple(e) for e in state["route"].tolist()]
+    agent.memory = state["memory"]
+    agent.rng.setstate(state["rng"])
+    t = state["track"]
+    track.length, track.last, track.seq = t["length"], t["last"], t["seq"]
+    track.visited = set(t["visited"].tolist())
+    agent.path = track
+    return agent
+
+# ---------------------------------------------------------------------------
+class Checkpointer:
+    def __init__(self, path, interval_s=INTERVAL_S, max_overhead=MAX_OVERHEAD):
+        self.path = path
+        self.interval_s = interval_s
+        self.max_overhead = max_overhead
+        self.next_at = time.perf_counter() + interval_s
+        self.saves = 0
+        self.seconds = 0.0
+        self.calls = 0
+        self.run = None
+
+    @classmethod
+    def from_config(cls, config, path):
+        spec = config.get("checkpoint") or {}
+        if not spec.get("enabled"):
+            return None
+        return cls(path, spec.get("interval_s", INTERVAL_S), spec.get("max_overhead", MAX_OVERHEAD))
+
+    def bind(self, G, args, agents, cleared, writer):
+        """Contexte du run (listes / ensembles partagés, mis à jour en place)."""
+        self.run = {"G": G, "args": args, "agents": agents, "cleared": cleared, "writer": writer}
+
+    def __call__(self, agent, cleared_edges):
+        """Appelé à chaque pas du véhicule courant ; l'horloge n'est lue qu'un pas sur 64."""
+        self.calls += 1
+        if self.calls & 63:
+            return
+        now = time.perf_counter()
+        if now < self.next_at:
+            return
+        with profiler.phase("checkpoint"):
+            self.save(agent, cleared_edges)
+        took = time.perf_counter() - now
+        self.saves += 1
+        self.seconds += took
+        self.next_at = time.perf_counter() + max(self.interval_s, took / self.max_overhead)
+
+    def save(self, agent, cleared_edges):
+        run = self.run
+        writer = run["writer"]
+        if writer is not None:
+            agent.path.flush()
+            writer.f.flush()
+        snap = {
+            "args": run["args"],
+            "snow": snow_bits(run["G"]),
+            "snow_version": run["G"].graph.get("snow_version", 0),
+            "finished": [agent_state(a) for a in run["agents"]],
+            "current": agent_state(agent),
+            "current_cleared": np.array(sorted(cleared_edges), dtype=np.int64).reshape(-1, 2),
+            "cleared": np.array(sorted(run["cleared"]), dtype=np.int64).reshape(-1, 2),
+            "log_lines": writer.lines if writer is not None else 0,
+            "saved_at": time.time(),
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(snap, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+
+    def done(self):
+        """Run terminé : le point de reprise ne sert plus."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def load(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def latest(root=ROOT):
+    files = glob.glob(os.path.join(root, "*", "checkpoints", "*.ckpt"))
+    return max(files, key=os.path.getmtime) if files else None
+
+def resume(path):
+    """Reprend le run sauvegardé dans path et renvoie ses statistiques."""
+    from simulation import load_graph_with_snow, run_simulation
+    snap = load(path)
+    args = snap["args"]
+    G = load_graph_with_snow(os.path.join(ROOT, args["neighborhood"]))
+    restore_snow(G, snap["snow"])
+    G.graph["snow_version"] = snap["snow_version"]
+    return run_simulation(args["neighborhood"], args["strategy"], args["budget"], args["config"],
+                          args["seed"], args["output_dir"], G=G, fleet=args["fleet"],
+                          resume=snap, checkpoint_file=path)
+
+# ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Reprendre une simulation depuis son dernier checkpoint.")
+    p.add_argument("path", nargs="?", help="fichier .ckpt (défaut : le plus récent)")
+    args = p.parse_args()
+    path = args.path or latest()
+    if not path:
+        raise SystemExit("⚠ Aucun checkpoint trouvé.")
+    snap = load(path)
+    print(f"♻️  Reprise de {path} ({len(snap['finished'])} véhicules terminés, "
+          f"{snap['current']['steps_taken']} pas pour le véhicule en cours)")
+    stats = resume(path)
+    g = stats["global_stats"]
+    print(f"🏁 {g['total_snow_cleared']} arêtes déneigées, {g['remaining_snow']} restantes, "
+          f"{g['total_cost']:.2f} €, {g['max_time_hours']:.2f} h")
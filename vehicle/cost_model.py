@@ -0,0 +1,89 @@
+"""
+Vehicle cost model, read from the "vehicle_types" section of config.json:
+
+    "hour_breakpoint": 8,
+    "vehicle_types": {
+      "I":  {"fixed_cost": 500, "km_cost": 1.1, "hour_rates": [1.1, 1.3], "speed_kmph": 10},
+      "II": {"fixed_cost": 800, "km_cost": 1.3, "hour_rates": [1.3, 1.5], "speed_kmph": 20}
+    }
+
+A vehicle costs fixed_cost + km_cost * km + its hours billed by
+hour_rates.  A flat list of rates changes rate every hour_breakpoint hours
+([1.1, 1.3]: 1.1 €/h for the first 8 h, 1.3 €/h after); a list of
+[start_hour, rate] pairs sets the tiers explicitly, in hours into the
+vehicle's shift (not clock hours), e.g. overtime after 8 h and 14 h:
+[[0, 1.1], [8, 1.3], [14, 2.0]].  Any number of types can be declared; a
+fleet is a tuple of counts in the order of this section.
+
+CostModel prices whole numpy arrays of (type, distance[, hours]) rows at
+once, for the optimisers and sweeps; vehicles.py uses it for a single
+vehicle.
+"""
+import numpy as np
+from brain import load_config
+
+# Tarifs d'origine (Type I / Type II), utilisés si la config n'a pas de "vehicle_types"
+DEFAULT_TYPES = {
+    "I": {"fixed_cost": 500, "km_cost": 1.1, "hour_rates": [1.1, 1.3],
+          "speed_kmph": 10, "icon": "🚗"},
+    "II": {"fixed_cost": 800, "km_cost": 1.3, "hour_rates": [1.3, 1.5],
+           "speed_kmph": 20, "icon": "🚛"},
+}
+
+def vehicle_types(config):
+    """{name: spec} in fleet order."""
+    return load_config(config).get("vehicle_types") or DEFAULT_TYPES
+
+def rate_tiers(spec, hour_breakpoint=8):
+    """(start hours, rates) of a type's hourly billing."""
+    rates = spec["hour_rates"]
+    if rates and isinstance(rates[0], (list, tuple)):
+        starts, values = zip(*sorted(rates))
+    else:
+        starts, values = [i * hour_breakpoint for i in range(len(rates))], rates
+    return list(starts), list(values)
+
+def cheapest_fleet(config):
+    """One vehicle of the type with the lowest fixed cost."""
+    types = list(vehicle_types(config).values())
+    best = min(range(len(types)), key=lambda i: types[i]["fixed_cost"])
+    return tuple(int(i == best) for i in range(len(types)))
+
+class CostModel:
+    def __init__(self, config):
+        config = load_config(config)
+        types = vehicle_types(config)
+        self.names = list(types)
+        self.fixed = np.array([t["fixed_cost"] for t in types.values()], dtype=float)
+        self.km = np.array([t["km_cost"] for t in types.values()], dtype=float)
+        self.speed = np.array([t["speed_kmph"] for t in types.values()], dtype=float)
+
+        tiers = [rate_tiers(t, config.get("hour_breakpoint", 8)) for t in types.values()]
+        width = max(len(starts) for starts, _ in tiers)
+        # tier i of type t bills min(max(h - lo, 0), span) hours at rates[t, i]
+        self.lo = np.zeros((len(tiers), width))
+        self.span = np.zeros((len(tiers), width))
+        self.rates = np.zeros((len(tiers), width))
+        for t, (starts, values) in enumerate(tiers):
+            n = len(starts)
+            self.lo[t, :n] = starts
+            self.span[t, :n] = np.diff(starts + [np.inf])
+            self.rates[t, :n] = values
+
+    def index(self, name):
+        return self.names.index(name)
+
+    def hours(self, types, distance):
+        return np.asarray(distance, dtype=float) / self.speed[types]
+
+    def cost(self, types, distance, hours=None):
+        """Cost of each row, rounded to the cent like VehicleAgent.compute_cost."""
+        types = np.asarray(types, dtype=np.int64)
+        distance = np.asarray(distance, dtype=float)
+        if hours is None:
+            hours = self.hours(types, distance)
+        billed = np.minimum(np.maximum(np.asarray(hours)[..., None] - self.lo[types], 0),
+                            self.span[types])
+        total = (self.fixed[types] + self.km[types] * distance
+                 + (billed * self.rates[types]).sum(axis=-1))
+        return np.round(total, 2)
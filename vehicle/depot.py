@@ -0,0 +1,84 @@
+"""
+Depot return trips for refuelling and dumping snow ("return_to_base").
+
+DepotTree is a reverse single-source Dijkstra from the depot(s), computed
+once per borough and shared by all vehicles: for every node it stores the
+distance to the nearest depot and the next hop towards it.  An agent
+knows its return cost anywhere in O(1), so it can turn back exactly when
+one more edge would leave it without enough fuel to get home, and the
+way back to where it left its route is the same tree path reversed
+(one forward tree per depot is added lazily on directed graphs).
+
+Dijkstra only uses G[u] (G.pred / G.succ on a directed graph) and
+step_length(), so it runs on networkx graphs and on shared GraphViews.
+"""
+import heapq
+import profiler
+
+def _dijkstra(G, sources, reverse):
+    """dist and hop: hop[n] is the neighbour of n on its shortest path to
+    (reverse) or from (forward) the nearest source; None at the sources."""
+    from simulation import step_length
+    p = profiler.active
+    if p:
+        p.count("dijkstra_calls")
+    if G.is_directed():
+        nbrs = G.pred if reverse else G.succ
+    else:
+        nbrs = G
+    dist, hop = {}, {}
+    heap = [(0.0, i, s, None) for i, s in enumerate(sources)]
+    heapq.heapify(heap)
+    tie = len(heap)
+    while heap:
+        d, _, v, h = heapq.heappop(heap)
+        if v in dist:
+            continue
+        dist[v], hop[v] = d, h
+        for w in nbrs[v]:
+            if w not in dist:
+                length = step_length(G, w, v) if reverse else step_length(G, v, w)
+                heapq.heappush(heap, (d + length, tie, w, v))
+                tie += 1
+    return dist, hop
+
+def _follow(hop, node):
+    path = [node]
+    while hop[path[-1]] is not None:
+        path.append(hop[path[-1]])
+    return path
+
+class DepotTree:
+    def __init__(self, G, depots):
+        self.depots = list(depots)
+        self.directed = G.is_directed()
+        self.dist, self.next_hop = _dijkstra(G, self.depots, reverse=True)
+        self._out = {}                    # depot -> forward hops (directed graphs)
+
+    def distance(self, node):
+        """Distance from node to the nearest depot (inf if unreachable)."""
+        return self.dist.get(node, float("inf"))
+
+    def path_home(self, node):
+        """[node, ..., depot] along the tree."""
+        return _follow(self.next_hop, node)
+
+    def path_out(self, G, depot, node):
+        """[depot, ..., node]: shortest way back to work after a depot stop."""
+        if not self.directed:
+            path = self.path_home(node)[::-1]
+            if path[0] == depot:
+                return path
+        if depot not in self._out:
+            self._out[depot] = _dijkstra(G, [depot], reverse=False)[1]
+        return _follow(self._out[depot], node)[::-1]
+
+def depot_tree(G, depots, cache=None):
+    """DepotTree for these depots, reused from `cache` (a route_cache dict) when possible."""
+    key = ("depot_tree", tuple(depots))
+    if cache is not None and key in cache:
+        return cache[key]
+    tree = DepotTree(G, depots)
+    if cache is not None:
+        cache[key] = tree
+    return tree
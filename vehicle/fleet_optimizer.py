@@ -0,0 +1,254 @@
+"""
+Fleet sizing for the "economie_temps" strategy: fastest fleet (count per
+vehicle type of config.json) whose *simulated* cost fits the budget.
+
+1. Surrogate.  Every vehicle follows the same Chinese-postman route from
+   the depot, so one dry walk of that route over the current snow gives
+   the cumulative distance D[t] and snow cleared C[t] after t steps.  A
+   vehicle stops at the first step where its fuel or snow capacity is
+   reached (or no snow is left) and the next one deadheads to that point:
+   with D and C monotone this is a few searchsorted calls per vehicle,
+   and the vehicles of all candidate fleets are priced in one vectorised
+   CostModel call.
+2. Verification.  The fastest candidates predicted to fit the budget are
+   simulated for real, in parallel on private copies of the graph (views
+   of the same shared memory when G is a GraphView), until one is
+   confirmed or max_runs simulations have been spent.
+   Evaluations are memoised per (snow state, config, depot, mix), keeping
+   the MEMO_SIZE most recent.
+"""
+import json
+import hashlib
+import itertools
+import numpy as np
+from collections import OrderedDict
+from multiprocessing import Pool, parent_process
+from brain import VehicleAgent, load_config
+from cost_model import CostModel, cheapest_fleet
+from shared_graph import SharedGraph, GraphView
+
+MAX_PER_TYPE = 50
+CHUNK = 4096                         # fleets priced per evaluate_many call
+MEMO_SIZE = 4096
+_memo = OrderedDict()                # ((snow sig, config, depots, seed), mix) -> result, LRU
+
+def remember(key, result):
+    _memo[key] = result
+    _memo.move_to_end(key)
+    while len(_memo) > MEMO_SIZE:
+        _memo.popitem(last=False)
+
+def compositions(n_types, total, cap):
+    """Every fleet of n_types counts (each <= cap) with at most `total` vehicles."""
+    if n_types == 0:
+        yield ()
+        return
+    for n in range(min(cap, total) + 1):
+        for rest in compositions(n_types - 1, total - n, cap):
+            yield (n, *rest)
+
+# ---------------------------------------------------------------------------
+def snow_signature(G):
+    if isinstance(G, GraphView):
+        return hashlib.sha1(G.snow.tobytes()).hexdigest()
+    h = hashlib.sha1()
+    for u, v, k, d in G.edges(keys=True, data=True):
+        if d.get("snow", False):
+            h.update(f"{u},{v},{k};".encode())
+    h.update(str(G.number_of_edges()).encode())
+    return h.hexdigest()
+
+def route_profile(G, config, start_node):
+    """
+    Dry walk of the planned route: cumulative distance and cumulative
+    snowy edges cleared after each step (G is not modified).
+    """
+    from simulation import step_length
+    agent = VehicleAgent(start_node, config)
+    agent.plan_route(G)
+
+    directed = G.is_directed()
+    cleared = set()
+    dist, snow = [0.0], [0]
+    for u, v in agent.planned_route:
+        pair = (u, v) if directed else frozenset((u, v))
+        gained = 0
+        if pair not in cleared:
+            gained = sum(1 for k in G[u][v] if G[u][v][k].get("snow", False))
+            cleared.add(pair)
+        dist.append(dist[-1] + step_length(G, u, v))
+        snow.append(snow[-1] + gained)
+    return np.array(dist), np.array(snow)
+
+class Surrogate:
+    def __init__(self, G, config, start_node, profile=None):
+        """profile: route_profile() already computed for start_node (it does
+        not depend on the config, so it can be shared between configs)."""
+        self.config = load_config(config)
+        self.model = CostModel(self.config)
+        self.D, self.C = profile or route_profile(G, self.config, start_node)
+        self.total = int(self.C[-1])
+        self.start_node = start_node
+
+    def vehicle_distances(self, fleet):
+        """(type index, distance) of each launched vehicle, in simulation order."""
+        cfg, D, C = self.config, self.D, self.C
+        fuel_limit = cfg["fuel_capacity"] / cfg["fuel_per_meter"] if cfg["fuel_per_meter"] else np.inf
+        snow_capacity = cfg["snow_capacity"]
+        if cfg.get("return_to_base"):
+            # depot trips lift both limits; their deadhead is left to the verification runs
+            fuel_limit = snow_capacity = np.inf
+        t_fuel = int(np.searchsorted(D, fuel_limit, "left"))
+        t_done = int(np.searchsorted(C, self.total, "left"))
+        out, cleared = [], 0
+        for t_idx, count in enumerate(fleet):
+            for _ in range(count):
+                if cleared >= self.total:
+                    return out, cleared
+                t_cap = int(np.searchsorted(C, cleared + snow_capacity, "left"))
+                t = min(t_fuel, t_cap, t_done, len(D) - 1)
+                out.append((t_idx, float(D[t])))
+                cleared = int(C[t])
+        return out, cleared
+
+    def evaluate_many(self, fleets):
+        """Estimates for a list of fleets; all vehicles priced in one CostModel call."""
+        owner, types, dists, cleared, launched = [], [], [], [], []
+        for i, fleet in enumerate(fleets):
+            vehicles, c = self.vehicle_distances(fleet)
+            owner += [i] * len(vehicles)
+            types += [t for t, _ in vehicles]
+            dists += [d for _, d in vehicles]
+            cleared.append(c)
+            launched.append(len(vehicles))
+        owner = np.array(owner, dtype=np.int64)
+        types = np.array(types, dtype=np.int64)
+        cost = np.bincount(owner, self.model.cost(types, dists), minlength=len(fleets))
+        hours = np.zeros(len(fleets))
+        np.maximum.at(hours, owner, self.model.hours(types, dists))
+        return [{"cost": round(float(cost[i]), 2), "time_h": round(float(hours[i]), 2),
+                 "cleared": cleared[i], "completed": cleared[i] >= self.total,
+                 "vehicles": launched[i]} for i in range(len(fleets))]
+
+    def evaluate(self, fleet):
+        return self.evaluate_many([fleet])[0]
+
+    def mixes(self, max_per_type=MAX_PER_TYPE):
+        """
+        (fleet, estimate) for every fleet of at most the number of vehicles
+        the snow capacity can justify (in total, not per type), skipping
+        fleets with vehicles that would never be launched (the smaller
+        equivalent fleet costs the same).  Priced CHUNK fleets at a time.
+        """
+        per_vehicle = max(1, min(self.config["snow_capacity"], self.total))
+        n_max = -(-self.total // per_vehicle) + 1
+        fleets = (f for f in compositions(len(self.model.names), n_max, max_per_type) if any(f))
+        while True:
+            chunk = list(itertools.islice(fleets, CHUNK))
+            if not chunk:
+                return
+            for fleet, est in zip(chunk, self.evaluate_many(chunk)):
+                if est["vehicles"] == sum(fleet):
+                    yield fleet, est
+
+# ---------------------------------------------------------------------------
+def _fresh(G):
+    """Copy of G whose snow flags can be cleared without touching G."""
+    return G.shared.view(G.snow.copy()) if isinstance(G, GraphView) else G.copy()
+
+def simulate_mix(G, neighborhood, config, mix, route_cache=None, start_node=None, depots=None,
+                 seed=None):
+    """One real simulation of `mix` on a private copy of G's snow (depots, when
+    given, replace start_node: vehicles spread over them as in the real run)."""
+    from simulation import run_simulation
+    config = {**load_config(config), "checkpoint": {"enabled": False},  # nested run
+              "result_cache": {"enabled": False}}
+    stats = run_simulation(neighborhood, "economie_temps", None, config, seed,
+                           G=_fresh(G), fleet=mix, route_cache=route_cache,
+                           start_node=start_node, depots=depots)
+    g = stats["global_stats"]
+    return {"cost": g["total_cost"], "time_h": g["max_time_hours"],
+            "cleared": g["total_snow_cleared"],
+            "completed": stats["snow_clearing_completed"]}
+
+_worker = {}
+
+def init_verify(source, neighborhood, config, depots=None, seed=None):
+    import os, sys
+    sys.stdout = open(os.devnull, "w")
+    if source[0] == "shared":                   # (tag, meta, snow): attach, nothing unpickled
+        G = SharedGraph.attach(source[1]).view(source[2])
+    else:                                       # (tag, G): one pickled copy per worker
+        G = source[1]
+    _worker.update(G=G, neighborhood=neighborhood, config=config, depots=depots, seed=seed,
+                   routes={})
+
+def graph_source(G):
+    """What verification workers need to rebuild G (see init_verify)."""
+    return ("shared", G.shared.meta, G.snow) if isinstance(G, GraphView) else ("graph", G)
+
+def verify_job(job):
+    """Pool task: job = (mix, config or None for the worker's, start node or None)."""
+    mix, config, start_node = job
+    w = _worker
+    return job, simulate_mix(w["G"], w["neighborhood"], config or w["config"], mix,
+                             w["routes"], start_node, w["depots"], w["seed"])
+
+def simulate_mixes(G, neighborhood, config, mixes, workers=None, start_node=None, depots=None,
+                   seed=None):
+    """Real simulations of `mixes`, in parallel when possible."""
+    if parent_process() is not None:        # already inside a worker (sweep, monte carlo, job server)
+        return {m: simulate_mix(G, neighborhood, config, m, start_node=start_node,
+                                depots=depots, seed=seed)
+                for m in mixes}
+    jobs = [(m, None, start_node) for m in mixes]
+    with Pool(processes=min(workers or len(mixes), len(mixes)), initializer=init_verify,
+              initargs=(graph_source(G), neighborhood, config, depots, seed)) as pool:
+        return {job[0]: r for job, r in pool.map(verify_job, jobs)}
+
+def rank(result):
+    """Complete first, then most snow cleared, fastest, cheapest."""
+    return (not result["completed"], -result["cleared"], result["time_h"], result["cost"])
+
+def optimize_fleet(G, budget, config, neighborhood=None, max_runs=8, batch=4,
+                   workers=None, start_node=None, depots=None, seed=None):
+    """
+    Fastest fleet (count per vehicle type) whose simulated cost is <= budget.
+    Returns (fleet, info) where info holds the surrogate and simulated
+    numbers; falls back to cheapest_fleet() when nothing can be verified.
+    With depots, the surrogate walks from the first one and the
+    verification runs spread the vehicles over all of them, as the real
+    run does, with the run's agent seed.  G is not modified.
+    """
+    config = load_config(config)
+    if depots:
+        start_node = depots[0]
+    if start_node is None:
+        start_node = next(iter(G.nodes()))
+    surrogate = Surrogate(G, config, start_node)
+    if surrogate.total == 0:
+        return cheapest_fleet(config), {"reason": "no snow"}
+
+    sig = (snow_signature(G), json.dumps(config, sort_keys=True), tuple(depots or [start_node]), seed)
+    candidates = [(m, est) for m, est in surrogate.mixes() if est["cost"] <= budget]
+    candidates.sort(key=lambda c: rank(c[1]))
+
+    runs = 0
+    while candidates and runs < max_runs:
+        chunk = [m for m, _ in candidates[:min(batch, max_runs - runs)]]
+        candidates = candidates[len(chunk):]
+        sims = {m: _memo[(sig, m)] for m in chunk if (sig, m) in _memo}
+        todo = [m for m in chunk if m not in sims]
+        if todo:
+            sims.update(simulate_mixes(G, neighborhood, config, todo, workers, start_node,
+                                       depots, seed))
+            runs += len(todo)
+        for m, r in sims.items():
+            remember((sig, m), r)
+        ok = [(m, r) for m, r in sims.items() if r["cost"] <= budget]
+        if ok:
+            mix, sim = min(ok, key=lambda x: rank(x[1]))
+            return mix, {"simulated": sim, "surrogate": surrogate.evaluate(mix),
+                         "simulation_runs": runs}
+
+    return cheapest_fleet(config), {"reason": "no candidate verified within budget", "simulation_runs": runs}
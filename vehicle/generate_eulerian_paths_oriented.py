@@ -2,17 +2,21 @@
 """
 Create directed-legal Eulerian walks for five Montréal boroughs.
 
-Outputs per borough:
+Outputs per borough, in resources/<slug>/ beside the snow map:
     raw_graph_oriented.pkl
     eulerized_graph_oriented.pkl   (directed!)
     eulerian_path_oriented.json
     path_visualization_oriented.png   (quick diagnostic)
 """
-import os, json, pickle, math
+import os, sys, json, pickle, math
 import networkx as nx, osmnx as ox, matplotlib.pyplot as plt
 from concurrent.futures import ThreadPoolExecutor
 from slugify import slugify
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "drone"))
+from osm_ingest import load_place_graph
+import memprof
+
 BOROUGHS = [
     "Plateau-Mont-Royal, Montréal, Québec, Canada",
     "Outremont, Montréal, Québec, Canada",
@@ -20,7 +24,7 @@ BOROUGHS = [
     "Anjou, Montréal, Québec, Canada",
     "Rivière-des-Prairies–Pointe-aux-Trembles, Montréal, Québec, Canada",
 ]
-OUT_ROOT = "resources/neighborhoods"
+OUT_ROOT = "resources"
 os.makedirs(OUT_ROOT, exist_ok=True)
 
 # -------------------------------------------------------------------------
@@ -67,39 +71,51 @@ def directed_walk(G_dir, circuit):
 # -------------------------------------------------------------------------
 def process(place):
     slug = slugify(place.split(",")[0])
+    with memprof.borough(slug, "vehicle_recon_oriented"):
+        _process(place, slug)
+
+def _process(place, slug):
     outdir = os.path.join(OUT_ROOT, slug)
     os.makedirs(outdir, exist_ok=True)
-    print(f"[{slug}] downloading directed graph …")
-    G_dir = ox.graph_from_place(place, network_type="drive",
-                                simplify=True, retain_all=False)
+    print(f"[{slug}] loading directed graph …")
+    with memprof.stage("load_graph"):
+        G_dir = load_place_graph(place)
     pickle.dump(G_dir, open(f"{outdir}/raw_graph_oriented.pkl", "wb"))
 
     # 1. undirected Eulerisation
-    G_eu_un = nx.eulerize(G_dir.to_undirected())
+    with memprof.stage("eulerize"):
+        G_eu_un = nx.eulerize(G_dir.to_undirected())
     # 2. re-orient every edge back into legal directions
-    G_eu_dir = orient_eulerized_graph(G_dir, G_eu_un)
+    with memprof.stage("orient"):
+        G_eu_dir = orient_eulerized_graph(G_dir, G_eu_un)
     pickle.dump(G_eu_dir, open(f"{outdir}/eulerized_graph_oriented.pkl", "wb"))
 
     # 3. build directed walk
-    circuit = list(nx.eulerian_circuit(G_eu_un))
-    walk = directed_walk(G_dir, circuit)
+    with memprof.stage("walk"):
+        circuit = list(nx.eulerian_circuit(G_eu_un))
+        walk = directed_walk(G_dir, circuit)
     json.dump([{"u": u, "v": v} for u, v in walk],
               open(f"{outdir}/eulerian_path_oriented.json", "w"), indent=2)
 
     # 4. small diagnostic plot
-    fig, ax = ox.plot_graph(G_dir, show=False, close=False,
-                            edge_color="lightgray", node_size=0, bgcolor="white")
-    xs, ys = [], []
-    for u, v in walk:
-        xs += [G_dir.nodes[u]["x"], G_dir.nodes[v]["x"]]
-        ys += [G_dir.nodes[u]["y"], G_dir.nodes[v]["y"]]
-    ax.plot(xs, ys, color="red", linewidth=1, alpha=0.7)
-    plt.savefig(f"{outdir}/path_visualization_oriented.png", dpi=300)
-    plt.close(fig)
+    with memprof.stage("plot"):
+        fig, ax = ox.plot_graph(G_dir, show=False, close=False,
+                                edge_color="lightgray", node_size=0, bgcolor="white")
+        xs, ys = [], []
+        for u, v in walk:
+            xs += [G_dir.nodes[u]["x"], G_dir.nodes[v]["x"]]
+            ys += [G_dir.nodes[u]["y"], G_dir.nodes[v]["y"]]
+        ax.plot(xs, ys, color="red", linewidth=1, alpha=0.7)
+        plt.savefig(f"{outdir}/path_visualization_oriented.png", dpi=300)
+        plt.close(fig)
     print(f"[{slug}] ✔ saved oriented graph & walk ({len(walk)} segments)")
 # -------------------------------------------------------------------------
 if __name__ == "__main__":
-    with ThreadPoolExecutor() as ex:
-        ex.map(process, BOROUGHS)
+    if memprof.enabled:                    # tracemalloc compte tous les threads
+        for place in BOROUGHS:
+            process(place)
+    else:
+        with ThreadPoolExecutor() as ex:
+            ex.map(process, BOROUGHS)
     print("✅ All oriented boroughs processed")
 
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Local job server: borough graphs stay loaded between simulations.
+
+`make simulate` pays the interpreter start-up, the networkx / pandas
+imports and the graph unpickling on every call.  The server pays them
+once: it loads each borough on its first job (load_graph_with_snow),
+packs it into shared memory (shared_graph.py) and keeps it there; a
+process pool, started with the server, runs the jobs on private snow
+copies of those graphs (SharedGraph.view), so a job costs only its
+compute.  A borough is reloaded when its eulerized_graph.pkl or
+snow_map.csv changes; the old block is freed once its running jobs end.
+
+Protocol: newline-delimited JSON over TCP on 127.0.0.1.  A client sends
+any number of jobs on one connection and gets one line per event as
+jobs complete (in completion order, matched by "id"):
+
+    -> {"id": 1, "type": "simulate", "neighborhood": "anjou",
+        "strategy": "economie_argent", "seed": 3, "config": {"replan": true}}
+    -> {"id": 2, "type": "plan", "neighborhood": "verdun"}
+    <- {"id": 1, "event": "accepted"}
+    <- {"id": 2, "event": "accepted"}
+    <- {"id": 2, "event": "result", "result": {...}, "compute_s": 0.08, "latency_s": 0.09}
+    <- {"id": 1, "event": "result", "result": {...vehicle_stats...}, ...}
+
+simulate: the keyword arguments of run_simulation (strategy, budget,
+seed, fleet, output_dir, start_node, depots), "config" overriding config.json
+fields, and "summary" (default true) to append it to the run store.
+The result cache is off unless the job's "config" turns it on.
+plan: the Chinese postman route of one vehicle from start_node (first
+depot by default): segment count and length_m (sum of the edge lengths
+walked, metres), the route itself with
+"route": true.  {"type": "status"} describes the server,
+{"type": "load", "neighborhood": ...} warms a borough ahead of time.
+The server answers {"event": "done"} and closes once the client has
+shut down its side and every job of the connection has answered.
+
+    python3 vehicle/job_server.py serve -j 4
+    python3 vehicle/job_server.py submit anjou verdun -s economie_argent --seed 1
+    python3 vehicle/job_server.py status
+"""
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import asyncio
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from simulation import (ROOT, CONFIG_PATH, load_graph_with_snow, run_simulation,
+                        run_summary, append_run_summaries)
+from brain import load_config
+from vehicles import vehicle_classes
+from placement import depot_nodes
+from shared_graph import SharedGraph
+
+HOST = "127.0.0.1"
+PORT = 8765
+JOB_TYPES = ("simulate", "plan")
+SIM_ARGS = ("strategy", "budget", "seed", "fleet", "output_dir", "start_node", "depots")
+
+# ---------------------------------------------------------------------------
+# Worker side: one attachment per borough, replaced when the server reloads it
+_attached = {}
+
+def _init_worker():
+    sys.stdout = open(os.devnull, "w")              # agents are chatty
+
+def _view(neighborhood, meta):
+    name, shared = _attached.get(neighborhood, (None, None))
+    if name != meta["name"]:
+        if shared is not None:
+            shared.close()
+        shared = SharedGraph.attach(meta)
+        _attached[neighborhood] = (meta["name"], shared)
+    return shared.view()
+
+def edge_length(G, u, v):
+    """Longueur (m) du passage u -> v : l'arête parallèle la plus courte."""
+    if not G.is_multigraph():
+        return G[u][v].get("length", 1.0)
+    return min(d.get("length", 1.0) for d in G[u][v].values())
+
+def run_job(meta, job, base_config):
+    """Exécuté dans le pool : un job sur une copie privée de la neige du quartier."""
+    t0 = time.perf_counter()
+    hood = job["neighborhood"]
+    G = _view(hood, meta)
+    config = {**base_config, "result_cache": {"enabled": False}, **job.get("config", {})}
+    if job["type"] == "plan":
+        start = job.get("start_node")
+        start = depot_nodes(G, config)[0] if start is None else start
+        agent = vehicle_classes(config)[0](start, config)
+        route = agent.chinese_postman_route(G)
+        result = {"neighborhood": hood, "start_node": start, "segments": len(route),
+                  "length_m": round(sum(edge_length(G, u, v) for u, v in route), 3)}
+        if job.get("route"):
+            result["route"] = route
+    else:
+        kwargs = {k: job[k] for k in SIM_ARGS if k in job}
+        if kwargs.get("fleet"):
+            kwargs["fleet"] = tuple(kwargs["fleet"])
+        result = run_simulation(hood, kwargs.pop("strategy", "economie_argent"),
+                                config=config, G=G, **kwargs)
+        if job.get("summary", True):
+            append_run_summaries([run_summary(result)])
+    return result, time.perf_counter() - t0
+
+# ---------------------------------------------------------------------------
+def _load(hood):
+    return SharedGraph.create(load_graph_with_snow(os.path.join(ROOT, hood)))
+
+class _Warm:
+    """Un quartier chargé en mémoire partagée et le nombre de jobs qui l'utilisent."""
+
+    def __init__(self, shared, stamp):
+        self.shared, self.stamp = shared, stamp
+        self.jobs = 0
+        self.retired = False
+
+    def release(self):
+        self.jobs -= 1
+        if self.retired and not self.jobs:
+            self.shared.close()
+
+class JobServer:
+    def __init__(self, workers=None, config=CONFIG_PATH, host=HOST, port=PORT):
+        self.host, self.port = host, port
+        self.config_path = config
+        self.workers = workers or os.cpu_count()
+        self.pool = None
+        self.warm = {}
+        self.locks = {}
+        self.done = 0
+        self.failed = 0
+        self.running = 0
+        self.started = time.time()
+        self._config = (None, None)
+
+    def config(self):
+        """config.json, relu seulement quand le fichier change."""
+        mtime = os.path.getmtime(self.config_path)
+        if self._config[0] != mtime:
+            self._config = (mtime, load_config(self.config_path))
+        return self._config[1]
+
+    @staticmethod
+    def _stamp(hood):
+        folder = os.path.join(ROOT, hood)
+        return tuple(os.path.getmtime(os.path.join(folder, f))
+                     for f in ("eulerized_graph.pkl", "snow_map.csv"))
+
+    async def graph(self, hood):
+        """_Warm du quartier, chargé (hors boucle) au premier job ou si ses fichiers ont changé."""
+        stamp = self._stamp(hood)
+        async with self.locks.setdefault(hood, asyncio.Lock()):
+            warm = self.warm.get(hood)
+            if warm is None or warm.stamp != stamp:
+                t0 = time.perf_counter()
+                shared = await asyncio.get_running_loop().run_in_executor(None, _load, hood)
+                if warm is not None:
+                    warm.retired = True
+                    if not warm.jobs:
+                        warm.shared.close()
+                warm = self.warm[hood] = _Warm(shared, stamp)
+                print(f"🔥 {hood}: {len(shared.arrays['edge_u'])} arêtes en mémoire partagée "
+                      f"({time.perf_counter() - t0:.2f} s)")
+            return warm
+
+    def status(self):
+        return {"workers": self.workers, "uptime_s": round(time.time() - self.started, 1),
+                "warm": sorted(self.warm), "running": self.running,
+                "done": self.done, "failed": self.failed}
+
+    async def run(self, job):
+        t0 = time.perf_counter()
+        if job.get("type") not in JOB_TYPES:
+            raise ValueError(f"unknown job type {job.get('type')!r}")
+        warm = await self.graph(job["neighborhood"])
+        warm.jobs += 1
+        self.running += 1
+        try:
+            result, compute = await asyncio.get_running_loop().run_in_executor(
+                self.pool, run_job, warm.shared.meta, job, self.config())
+        finally:
+            warm.release()
+            self.running -= 1
+        self.done += 1
+        return {"event": "result", "result": result, "compute_s": round(compute, 4),
+                "latency_s": round(time.perf_counter() - t0, 4)}
+
+    async def handle(self, reader, writer):
+        tasks = []
+
+        async def send(msg):
+            if writer.is_closing():
+                return                              # client parti : ses jobs finissent quand même
+            writer.write((json.dumps(msg, default=str) + "\n").encode())
+            try:
+                await writer.drain()
+            except ConnectionError:
+                writer.close()
+
+        async def answer(job):
+            try:
+                msg = await self.run(job)
+            except Exception as e:
+                self.failed += 1
+                msg = {"event": "error", "error": f"{type(e).__name__}: {e}"}
+            await send({"id": job.get("id"), **msg})
+
+        try:
+            while line := await reader.readline():
+                try:
+                    job = json.loads(line)
+                except json.JSONDecodeError as e:
+                    await send({"event": "error", "error": f"bad JSON: {e}"})
+                    continue
+                kind = job.get("type")
+                if kind == "status":
+                    await send({"id": job.get("id"), "event": "status", **self.status()})
+                elif kind == "load":
+                    try:
+                        await self.graph(job["neighborhood"])
+                        await send({"id": job.get("id"), "event": "loaded"})
+                    except Exception as e:
+                        await send({"id": job.get("id"), "event": "error",
+                                    "error": f"{type(e).__name__}: {e}"})
+                else:
+                    await send({"id": job.get("id"), "event": "accepted"})
+                    tasks.append(asyncio.create_task(answer(job)))
+            await asyncio.gather(*tasks)
+            await send({"event": "done"})
+        except ConnectionError:
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def serve(self):
+        # spawn : les workers naissent au premier job, pendant qu'un thread peut tenir
+        # un verrou (chargement d'un quartier, resource tracker) -- un fork en hériterait
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        # kill / SIGTERM : sortie par le finally, blocs de mémoire partagée libérés
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        print(f"🛰️  Serveur de jobs sur {self.host}:{self.port} ({self.workers} workers)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            for warm in self.warm.values():
+                warm.shared.close()
+
+# ---------------------------------------------------------------------------
+def submit(jobs, host=HOST, port=PORT):
+    """Envoie les jobs et rend chaque événement du serveur à mesure qu'il arrive."""
+    with socket.create_connection((host, port)) as sock, sock.makefile("rwb") as f:
+        for i, job in enumerate(jobs):
+            f.write((json.dumps({"id": i, **job}) + "\n").encode())
+        f.flush()
+        sock.shutdown(socket.SHUT_WR)
+        for line in f:
+            msg = json.loads(line)
+            if msg.get("event") == "done":
+                return
+            yield msg
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Local job server keeping borough graphs warm.")
+    p.add_argument("--host", default=HOST)
+    p.add_argument("--port", type=int, default=PORT)
+    sub = p.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("serve", help="start the server")
+    s.add_argument("-j", "--workers", type=int, help="processes (default: CPUs)")
+    s.add_argument("-c", "--config", default=CONFIG_PATH)
+    s.add_argument("--warm", nargs="*", default=[], help="boroughs to load at start-up")
+    s = sub.add_parser("submit", help="run jobs and print results as they arrive")
+    s.add_argument("neighborhoods", nargs="+")
+    s.add_argument("-t", "--type", choices=JOB_TYPES, default="simulate")
+    s.add_argument("-s", "--strategies", nargs="+", default=["economie_argent"])
+    s.add_argument("-b", "--budget", type=float)
+    s.add_argument("--seed", type=int)
+    sub.add_parser("status", help="server state")
+    return p.parse_args()
+
+async def _serve(args):
+    server = JobServer(args.workers, args.config, args.host, args.port)
+    for hood in args.warm:
+        await server.graph(hood)
+    await server.serve()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.cmd == "serve":
+        try:
+            asyncio.run(_serve(args))
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            print("\n🛑 Serveur arrêté")
+    elif args.cmd == "status":
+        for msg in submit([{"type": "status"}], args.host, args.port):
+            print(json.dumps(msg, indent=2))
+    else:
+        jobs = [{"type": args.type, "neighborhood": n, "strategy": s,
+                 **({"budget": args.budget} if s == "economie_temps" else {}),
+                 **({"seed": args.seed} if args.seed is not None else {})}
+                for n in args.neighborhoods for s in args.strategies]
+        if args.type == "plan":
+            jobs = [{"type": "plan", "neighborhood": n} for n in args.neighborhoods]
+        for msg in submit(jobs, args.host, args.port):
+            if msg["event"] == "result":
+                r = msg["result"]
+                what = (f"{r['segments']} segments, {r['length_m']:.0f} m" if args.type == "plan" else
+                        f"{r['global_stats']['total_cost']:.2f} €, {r['global_stats']['max_time_hours']:.2f} h")
+                print(f"✔ job {msg['id']}: {what}  (calcul {msg['compute_s']:.3f} s, "
+                      f"latence {msg['latency_s']:.3f} s)")
+            elif msg["event"] == "error":
+                print(f"❌ job {msg.get('id')}: {msg['error']}")
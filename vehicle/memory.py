@@ -0,0 +1,123 @@
+"""
+Edge memory of a VehicleAgent (edges it recently drove), chosen by
+config["memory_policy"]:
+
+    "fifo"       the last memory_size moves (default, the original list
+                 behaviour: a deque plus a count per edge)
+    "lru"        the memory_size most recently driven distinct edges
+    "decay"      edges driven less than memory_decay_h hours of driving ago
+    "unlimited"  every edge ever driven
+
+Edges are undirected: (u, v) and (v, u) are the same memory entry.
+Insert, eviction and lookup are O(1) for every policy.
+"""
+from collections import deque, OrderedDict
+
+def _key(edge):
+    u, v = edge
+    return (u, v) if u <= v else (v, u)
+
+class FIFOMemory:
+    def __init__(self, size):
+        self.size = size
+        self.window = deque()
+        self.count = {}
+
+    def add(self, edge, now=0.0):
+        k = _key(edge)
+        self.window.append(k)
+        self.count[k] = self.count.get(k, 0) + 1
+        if len(self.window) > self.size:
+            old = self.window.popleft()
+            self.count[old] -= 1
+            if not self.count[old]:
+                del self.count[old]
+
+    def __contains__(self, edge):
+        return _key(edge) in self.count
+
+    def __len__(self):
+        return len(self.window)
+
+    def __iter__(self):
+        return iter(self.window)
+
+class LRUMemory:
+    def __init__(self, size):
+        self.size = size
+        self.edges = OrderedDict()
+
+    def add(self, edge, now=0.0):
+        k = _key(edge)
+        self.edges[k] = None
+        self.edges.move_to_end(k)
+        if len(self.edges) > self.size:
+            self.edges.popitem(last=False)
+
+    def __contains__(self, edge):
+        return _key(edge) in self.edges
+
+    def __len__(self):
+        return len(self.edges)
+
+    def __iter__(self):
+        return iter(self.edges)
+
+class DecayMemory:
+    """Forgets an edge `horizon` hours after the agent last drove it."""
+
+    def __init__(self, horizon):
+        self.horizon = horizon
+        self.last = {}                  # edge -> time of the last visit
+        self.visits = deque()           # (time, edge), oldest first, for lazy expiry
+        self.now = 0.0
+
+    def add(self, edge, now=0.0):
+        k = _key(edge)
+        self.now = now
+        self.last[k] = now
+        self.visits.append((now, k))
+        while self.visits and now - self.visits[0][0] >= self.horizon:
+            t, old = self.visits.popleft()
+            if self.last.get(old) == t:
+                del self.last[old]
+
+    def __contains__(self, edge):
+        t = self.last.get(_key(edge))
+        return t is not None and self.now - t < self.horizon
+
+    def __len__(self):
+        return len(self.last)
+
+    def __iter__(self):
+        return iter(self.last)
+
+class UnlimitedMemory:
+    def __init__(self):
+        self.edges = set()
+
+    def add(self, edge, now=0.0):
+        self.edges.add(_key(edge))
+
+    def __contains__(self, edge):
+        return _key(edge) in self.edges
+
+    def __len__(self):
+        return len(self.edges)
+
+    def __iter__(self):
+        return iter(self.edges)
+
+POLICIES = ("fifo", "lru", "decay", "unlimited")
+
+def make_memory(config):
+    policy = config.get("memory_policy", "fifo")
+    if policy == "fifo":
+        return FIFOMemory(config["memory_size"])
+    if policy == "lru":
+        return LRUMemory(config["memory_size"])
+    if policy == "decay":
+        return DecayMemory(config.get("memory_decay_h", 1.0))
+    if policy == "unlimited":
+        return UnlimitedMemory()
+    raise ValueError(f"unknown memory_policy: {policy} (expected one of {POLICIES})")
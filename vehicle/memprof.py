@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Opt-in memory profiling of the graph-heavy stages (tracemalloc).
+
+Off unless the MEMPROF environment variable is set; when it is off,
+borough() and stage() return a shared no-op context:
+
+    with memprof.borough(slug, "drone_recon"):   # one report per borough and run
+        with memprof.stage("pair_distances"):
+            ...
+            memprof.snapshot()              # optional point inside the stage
+
+For every stage the report gives the peak traced memory above the
+stage's starting point, the memory still held when it ends, and the top
+allocation sites -- the innermost frame of this repository in the
+allocating traceback, so a G_un.copy() is charged to the line that
+calls copy(), not to networkx internals.  Sites are measured at the
+stage's end or at its largest snapshot(), whichever held more, so
+short-lived lists (combinations of odd nodes) are caught by placing a
+snapshot() while they are alive.  Repeated stages (one postman route per
+vehicle) keep their worst call.
+
+Reports are written to resources/memprof/<run>/<borough>.json when the
+borough ends (run: drone_recon, vehicle_recon_oriented, simulate), and
+summarised by
+
+    MEMPROF=1 make drone_recon
+    python3 vehicle/memprof.py                # every borough report
+    python3 vehicle/memprof.py anjou -n 10
+
+Tracebacks keep MEMPROF_FRAMES frames (8 by default): enough to reach
+the calling line through networkx, at the price of slowing
+allocation-heavy code (all-pairs Dijkstra) down 10-30 times; fewer
+frames are faster but charge more to library lines.  Tracing is
+process-wide: the oriented recon runs its boroughs one after
+the other instead of in threads when MEMPROF is set.
+"""
+import os
+import json
+import time
+import glob
+import argparse
+import linecache
+import tracemalloc
+from contextlib import nullcontext
+
+ENV = "MEMPROF"
+OUT_DIR = "resources/memprof"
+FRAMES = int(os.environ.get("MEMPROF_FRAMES", 8))     # profondeur des tracebacks
+TOP = 10
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MB = 2 ** 20
+
+enabled = bool(os.environ.get(ENV))
+_off = nullcontext()
+_borough = None
+_stack = []
+_SELF = {tracemalloc.__file__, __file__}
+_paths = {}                                 # nom affiché -> fichier, pour linecache
+
+def _sites():
+    """{site: (octets, blocs)} des allocations vivantes, par ligne du dépôt qui les a faites."""
+    sites, names = {}, {}
+    for stat in tracemalloc.take_snapshot().statistics("traceback"):
+        frames = stat.traceback
+        if any(f.filename in _SELF for f in frames):    # les relevés eux-mêmes
+            continue
+        site = next((f for f in reversed(frames) if f.filename.startswith(REPO)), frames[-1])
+        if site.filename not in names:
+            names[site.filename] = _display(site.filename)
+        key = f"{names[site.filename]}:{site.lineno}"
+        size, count = sites.get(key, (0, 0))
+        sites[key] = (size + stat.size, count + stat.count)
+    return sites
+
+def _display(filename):
+    """Chemin relatif au dépôt, ou paquet/fichier pour les bibliothèques."""
+    if filename.startswith(REPO):
+        name = os.path.relpath(filename, REPO)
+    else:
+        name = os.path.join(os.path.basename(os.path.dirname(filename)), os.path.basename(filename))
+    _paths[name] = filename
+    return name
+
+def _source(key):
+    name, lineno = key.rsplit(":", 1)
+    return linecache.getline(_paths.get(name, name), int(lineno)).strip()
+
+def _measure():
+    """Relevé des sites sans que la capture elle-même ne compte dans les pics."""
+    _fold()
+    sites = _sites()
+    tracemalloc.reset_peak()
+    return sites
+
+def _fold():
+    peak = tracemalloc.get_traced_memory()[1]
+    for s in _stack + [_borough]:
+        s.peak = max(s.peak, peak)
+
+class _Stage:
+    __slots__ = ("name", "start", "peak", "base", "best", "best_total", "t0")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.base = _measure()
+        self.start = tracemalloc.get_traced_memory()[0]
+        self.peak = self.start
+        self.best, self.best_total = {}, -1
+        self.t0 = time.perf_counter()
+        _stack.append(self)
+
+    def mark(self):
+        sites = _measure()
+        total = sum(size for size, _ in sites.values())
+        if total > self.best_total:
+            self.best, self.best_total = sites, total
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.t0
+        self.mark()
+        _stack.remove(self)
+        end = tracemalloc.get_traced_memory()[0]
+        _borough.record(self, seconds, end)
+
+class _Borough:
+    def __init__(self, name, run):
+        self.name = name
+        self.run = run
+        self.stages = {}
+        self.started = False
+
+    def __enter__(self):
+        global _borough
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(FRAMES)
+            self.started = True
+        tracemalloc.reset_peak()
+        self.peak = 0
+        self.t0 = time.perf_counter()
+        _borough = self
+        return self
+
+    def record(self, stage, seconds, end):
+        diff = [(key, size - stage.base.get(key, (0, 0))[0], count - stage.base.get(key, (0, 0))[1])
+                for key, (size, count) in stage.best.items()]
+        diff = sorted((d for d in diff if d[1] > 0), key=lambda d: -d[1])[:TOP]
+        peak = (stage.peak - stage.start) / MB
+        entry = self.stages.setdefault(stage.name, {"calls": 0, "seconds": 0.0, "peak_mb": -1.0})
+        entry["calls"] += 1
+        entry["seconds"] = round(entry["seconds"] + seconds, 3)
+        if peak > entry["peak_mb"]:                     # appel le plus gourmand
+            entry.update(peak_mb=round(peak, 2), net_mb=round((end - stage.start) / MB, 2),
+                         top=[{"site": key, "mb": round(size / MB, 2), "blocks": count,
+                               "line": _source(key)} for key, size, count in diff])
+
+    def report(self):
+        _fold()
+        return {"borough": self.name, "run": self.run, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "seconds": round(time.perf_counter() - self.t0, 3),
+                "peak_mb": round(self.peak / MB, 2),
+                "stages": dict(sorted(self.stages.items(), key=lambda kv: -kv[1]["peak_mb"]))}
+
+    def __exit__(self, *exc):
+        global _borough
+        report = self.report()
+        _borough = None
+        if self.started:
+            tracemalloc.stop()
+        os.makedirs(os.path.join(OUT_DIR, self.run), exist_ok=True)
+        path = os.path.join(OUT_DIR, self.run, f"{self.name}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"🧠 {self.name}: pic {report['peak_mb']:.1f} Mo → {path}")
+
+def borough(name, run):
+    """Profil mémoire d'un quartier pour une étape du pipeline (no-op si MEMPROF absent ou déjà en cours)."""
+    if not enabled or _borough is not None:
+        return _off
+    return _Borough(name, run)
+
+def stage(name):
+    return _Stage(name) if _borough is not None else _off
+
+def snapshot():
+    """Point de mesure supplémentaire dans l'étape en cours (objets temporaires vivants)."""
+    if _borough is not None and _stack:
+        _stack[-1].mark()
+
+# ---------------------------------------------------------------------------
+def show(report, top=3):
+    print(f"\n🏘️  {report['run']} / {report['borough']}: pic {report['peak_mb']:.1f} Mo ({report['seconds']:.1f} s tracés)")
+    for name, s in report["stages"].items():
+        print(f"  {name:22} pic {s['peak_mb']:>9.2f} Mo   reste {s['net_mb']:>9.2f} Mo"
+              f"   ×{s['calls']}")
+        for site in s["top"][:top]:
+            print(f"      {site['mb']:>9.2f} Mo  {site['site']:40} {site['line'][:60]}")
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Résumé des profils mémoire (resources/memprof/).")
+    p.add_argument("boroughs", nargs="*", help="quartiers (défaut : tous)")
+    p.add_argument("-n", "--top", type=int, default=3, help="sites par étape")
+    args = p.parse_args()
+    paths = sorted(glob.glob(os.path.join(OUT_DIR, "*", "*.json")))
+    if args.boroughs:
+        paths = [p for p in paths if os.path.basename(p)[:-5] in args.boroughs]
+    if not paths:
+        raise SystemExit(f"⚠ Aucun profil dans {OUT_DIR} (lancer une étape avec {ENV}=1).")
+    for path in paths:
+        with open(path) as f:
+            show(json.load(f), args.top)
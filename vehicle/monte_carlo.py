@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo over snow scenarios: one fleet, N seeded Perlin snow maps.
+
+The borough graph is loaded once into shared memory; each seed's snow map
+is generated in the worker (same noise as drone_generate_snow.py) and
+lives only as the snow array of a GraphView, so nothing is written per
+seed.  Planned routes do not depend on the snow, so each worker computes
+them once and reuses them for all its seeds.
+
+Reports mean / p50 / p95 / max of cost, time and distance, printed and
+written to resources/<borough>/monte_carlo.json.
+
+    python3 vehicle/monte_carlo.py anjou -n 200 --fleet 2 1
+    python3 vehicle/monte_carlo.py anjou -n 200 --coverage 0.3 --strategy economie_temps --budget 8000
+"""
+import os
+import sys
+import json
+import pickle
+import argparse
+import numpy as np
+from multiprocessing import Pool, cpu_count
+from simulation import ROOT, CONFIG_PATH, run_simulation, calculate_vehicle_distribution
+from brain import load_config
+from cost_model import vehicle_types
+from shared_graph import SharedGraph
+from placement import depot_nodes
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "drone"))
+from drone_generate_snow import THRESHOLD, edge_midpoints, noise_field, calibrate_threshold
+
+METRICS = {"cost": "total_cost", "time_h": "max_time_hours",
+           "distance": "total_distance", "snow_cleared": "total_snow_cleared",
+           "remaining_snow": "remaining_snow"}
+
+# ---------------------------------------------------------------------------
+def snow_layout(G):
+    """
+    Per-edge inputs of the noise, in G.edges(keys=True) order (the order of
+    the shared arrays): normalised midpoints, and the (u,v) pair of each
+    edge since a snowy pair marks all its parallel edges, as
+    load_graph_with_snow does.
+    """
+    edges, mx, my = edge_midpoints(G)
+    mids = {}
+    for (u, v), x, y in zip(edges, mx, my):
+        mids.setdefault((u, v), []).append((x, y))
+    pair_ids, pts, has_pt = {}, [], []
+    pair_of_edge = []
+    for u, v, _ in G.edges(keys=True):
+        pair_of_edge.append(pair_ids.setdefault(frozenset((u, v)), len(pair_ids)))
+        queue = mids.get((u, v))
+        has_pt.append(bool(queue))
+        pts.append(queue.pop() if queue else (0.0, 0.0))
+    pts = np.array(pts).reshape(-1, 2)
+    return {"mx": pts[:, 0], "my": pts[:, 1], "valid": np.array(has_pt),
+            "pair": np.array(pair_of_edge), "n_pairs": len(pair_ids)}
+
+def snow_for_seed(layout, seed, coverage=None):
+    """uint8 snow flag per edge for Perlin base `seed`."""
+    valid = layout["valid"]
+    intensity = noise_field(layout["mx"][valid], layout["my"][valid], seed)
+    threshold = THRESHOLD if coverage is None else calibrate_threshold(intensity, coverage)
+    edge_snow = np.zeros(len(valid), dtype=bool)
+    edge_snow[valid] = intensity > threshold
+    pair_snow = np.zeros(layout["n_pairs"], dtype=bool)
+    np.logical_or.at(pair_snow, layout["pair"], edge_snow)
+    return pair_snow[layout["pair"]].astype(np.uint8)
+
+# ---------------------------------------------------------------------------
+_worker = {}
+
+def init_worker(meta, layout, neighborhood, strategy, budget, config, fleet, coverage):
+    sys.stdout = open(os.devnull, "w")
+    config = {**config, "result_cache": {"enabled": False}}     # une entrée par graine sinon
+    _worker.update(shared=SharedGraph.attach(meta), layout=layout,
+                   neighborhood=neighborhood, strategy=strategy, budget=budget,
+                   config=config, fleet=fleet, coverage=coverage, routes={})
+
+def run_seed(seed):
+    w = _worker
+    G = w["shared"].view(snow_for_seed(w["layout"], seed, w["coverage"]))
+    stats = run_simulation(w["neighborhood"], w["strategy"], w["budget"], w["config"],
+                           seed, G=G, fleet=w["fleet"], route_cache=w["routes"])
+    return seed, {k: stats["global_stats"][v] for k, v in METRICS.items()} | \
+        {"completed": stats["snow_clearing_completed"],
+         "budget_respected": stats["budget_respected"]}
+
+def summarise(rows):
+    out = {}
+    for k in METRICS:
+        vals = np.array([r[k] for r in rows], dtype=float)
+        out[k] = {"mean": round(float(vals.mean()), 2),
+                  "p50": round(float(np.percentile(vals, 50)), 2),
+                  "p95": round(float(np.percentile(vals, 95)), 2),
+                  "max": round(float(vals.max()), 2)}
+    out["completion_rate"] = round(sum(r["completed"] for r in rows) / len(rows), 4)
+    out["budget_respected_rate"] = round(sum(r["budget_respected"] for r in rows) / len(rows), 4)
+    return out
+
+def monte_carlo(neighborhood, n, seed0=0, fleet=None, strategy="economie_argent",
+                budget=None, coverage=None, config=CONFIG_PATH, workers=None):
+    with open(os.path.join(ROOT, neighborhood, "eulerized_graph.pkl"), "rb") as f:
+        G = pickle.load(f)
+    layout = snow_layout(G)
+    seeds = list(range(seed0, seed0 + n))
+    rows = []
+    with SharedGraph.create(G) as shared:
+        del G
+        if fleet is None:               # sized on the first scenario
+            view = shared.view(snow_for_seed(layout, seeds[0], coverage))
+            fleet = calculate_vehicle_distribution(strategy, budget, view, config, neighborhood,
+                                                   depots=depot_nodes(view, load_config(config)),
+                                                   seed=seeds[0])
+        names = list(vehicle_types(config))
+        print(f"🎲 {neighborhood}: {n} scénarios de neige, flotte "
+              + " + ".join(f"{c}×Type {t}" for t, c in zip(names, fleet)))
+        init = (shared.meta, layout, neighborhood, strategy, budget,
+                load_config(config), fleet, coverage)
+        with Pool(processes=workers or cpu_count(), initializer=init_worker,
+                  initargs=init) as pool:
+            for seed, row in pool.imap_unordered(run_seed, seeds):
+                rows.append({"seed": seed, **row})
+
+    rows.sort(key=lambda r: r["seed"])
+    report = {"neighborhood": neighborhood, "runs": n, "seeds": [seeds[0], seeds[-1]],
+              "fleet": {f"type_{t}": c for t, c in zip(names, fleet)},
+              "coverage": coverage, "summary": summarise(rows), "per_seed": rows}
+    return report
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Monte Carlo over snow scenarios.")
+    p.add_argument("neighborhood")
+    p.add_argument("-n", "--runs", type=int, default=100)
+    p.add_argument("--seed0", type=int, default=0, help="first Perlin base")
+    p.add_argument("--fleet", type=int, nargs="+", metavar="N",
+                   help="vehicles per type, in config.json order")
+    p.add_argument("--strategy", default="economie_argent",
+                   choices=("economie_argent", "economie_temps"),
+                   help="picks the fleet when --fleet is not given")
+    p.add_argument("--budget", type=float)
+    p.add_argument("--coverage", type=float,
+                   help="calibrate every map to this snowy fraction")
+    p.add_argument("-c", "--config", default=CONFIG_PATH)
+    p.add_argument("-j", "--workers", type=int)
+    return p.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = monte_carlo(args.neighborhood, args.runs, args.seed0,
+                         tuple(args.fleet) if args.fleet else None, args.strategy,
+                         args.budget, args.coverage, args.config, args.workers)
+    print(f"\n{'':16}{'mean':>12}{'p50':>12}{'p95':>12}{'max':>12}")
+    for k in METRICS:
+        s = report["summary"][k]
+        print(f"{k:16}{s['mean']:>12.2f}{s['p50']:>12.2f}{s['p95']:>12.2f}{s['max']:>12.2f}")
+    print(f"✔ Déneigement complet dans {report['summary']['completion_rate']:.0%} des scénarios")
+    out = os.path.join(ROOT, args.neighborhood, "monte_carlo.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 {out}")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Cost / completion-time Pareto front per borough.
+
+"economie_argent" and "economie_temps" are two points of a wider trade-off.
+This explores fleet mix (count per vehicle type) x start depot x per-vehicle
+capacities (snow_capacity, fuel_capacity, applied to every vehicle as in
+config.json) and keeps the configurations no other one beats on both cost
+and time, among those that clear all the snow.
+
+1. Every configuration is priced by the fleet_optimizer surrogate (one dry
+   walk of the route per depot, shared by all capacity settings).
+2. Dominance pruning: a configuration whose estimate is dominated by a
+   point of the estimated front, even after a --slack margin, is never
+   simulated.
+3. The survivors are simulated for real in a process pool on one
+   shared-memory graph; the front is taken on the simulated numbers.
+
+Every simulated configuration is appended to resources/<borough>/
+pareto_cache.jsonl, keyed by snow state + config + depot + fleet, so an
+interrupted or repeated run only simulates what is missing.  The front is
+written to resources/<borough>/pareto.json.
+
+    python3 vehicle/pareto.py anjou verdun --depots 4 --snow-capacity 20 50 500
+"""
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+from multiprocessing import Pool, cpu_count
+from simulation import ROOT, CONFIG_PATH, load_graph_with_snow
+from brain import load_config
+from cost_model import vehicle_types
+from shared_graph import SharedGraph
+from fleet_optimizer import (MAX_PER_TYPE, Surrogate, route_profile, snow_signature,
+                             graph_source, init_verify, verify_job)
+
+CACHE_FILE = "pareto_cache.jsonl"
+FRONT_FILE = "pareto.json"
+SPEC_FIELDS = ("depot", "fleet", "snow_capacity", "fuel_capacity")
+
+# ---------------------------------------------------------------------------
+def spread_depots(G, k):
+    """
+    k start nodes spread over the borough: the default depot (first node)
+    then farthest-point sampling on the node coordinates.
+    """
+    nodes = list(G.nodes())
+    xy = np.array([(G.nodes[n].get("x", 0.0), G.nodes[n].get("y", 0.0)) for n in nodes])
+    picked = [0]
+    dist = np.hypot(*(xy - xy[0]).T)
+    while len(picked) < min(k, len(nodes)):
+        i = int(np.argmax(dist))
+        if dist[i] == 0:
+            break
+        picked.append(i)
+        dist = np.minimum(dist, np.hypot(*(xy - xy[i]).T))
+    return [nodes[i] for i in picked]
+
+def pareto_front(points):
+    """Non-dominated points on (cost, time_h), both minimised."""
+    front, best_time = [], float("inf")
+    for p in sorted(points, key=lambda p: (p["cost"], p["time_h"])):
+        if p["time_h"] < best_time:
+            front.append(p)
+            best_time = p["time_h"]
+    return front
+
+def prune(points, slack):
+    """
+    Drop points clearly dominated by the estimated front: some front point
+    is better on both objectives even when inflated by (1 + slack).
+    """
+    front = pareto_front(points)
+    fc = np.array([p["cost"] for p in front]) * (1 + slack)
+    ft = np.array([p["time_h"] for p in front]) * (1 + slack)
+    return [p for p in points
+            if not np.any((fc <= p["cost"]) & (ft <= p["time_h"])
+                          & ((fc < p["cost"]) | (ft < p["time_h"])))]
+
+def spec(depot, fleet, cfg):
+    return (depot, tuple(fleet), cfg["snow_capacity"], cfg["fuel_capacity"])
+
+def cache_key(snow_sig, config, depot, mix):
+    blob = json.dumps([snow_sig, config, depot, list(mix)], sort_keys=True)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+def load_cache(path):
+    cache = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:          # partial line of an interrupted run
+                    continue
+                cache[row["key"]] = row
+    return cache
+
+# ---------------------------------------------------------------------------
+def explore(neighborhood, config=CONFIG_PATH, depots=1, snow_capacities=None,
+            fuel_capacities=None, max_per_type=MAX_PER_TYPE, slack=0.05, workers=None):
+    base = load_config(config)
+    folder = os.path.join(ROOT, neighborhood)
+    G = load_graph_with_snow(folder)
+    snow_sig = snow_signature(G)
+    settings = [{**base, "snow_capacity": sc, "fuel_capacity": fc}
+                for sc in snow_capacities or [base["snow_capacity"]]
+                for fc in fuel_capacities or [base["fuel_capacity"]]]
+
+    # 1-2. surrogate over the whole space, then dominance pruning
+    points = []
+    for depot in spread_depots(G, depots):
+        profile = route_profile(G, base, depot)
+        for cfg in settings:
+            for mix, est in Surrogate(G, cfg, depot, profile).mixes(max_per_type):
+                if est["completed"]:
+                    points.append({"depot": depot, "fleet": list(mix),
+                                   "snow_capacity": cfg["snow_capacity"],
+                                   "fuel_capacity": cfg["fuel_capacity"],
+                                   "cost": est["cost"], "time_h": est["time_h"],
+                                   "key": cache_key(snow_sig, cfg, depot, mix), "cfg": cfg})
+    survivors = prune(points, slack) if points else []
+    print(f"📐 {neighborhood}: {len(points)} configurations complètes estimées, "
+          f"{len(survivors)} non dominées à simuler")
+
+    # 3. real simulations, skipping the cached ones
+    cache_path = os.path.join(folder, CACHE_FILE)
+    cache = load_cache(cache_path)
+    todo = {spec(p["depot"], p["fleet"], p["cfg"]): p
+            for p in survivors if p["key"] not in cache}
+    if todo:
+        jobs = [(tuple(p["fleet"]), p["cfg"], p["depot"]) for p in todo.values()]
+        with SharedGraph.create(G) as shared, open(cache_path, "a") as f, \
+                Pool(processes=min(workers or cpu_count(), len(jobs)), initializer=init_verify,
+                     initargs=(graph_source(shared.view()), neighborhood, base)) as pool:
+            for done, ((mix, cfg, depot), sim) in enumerate(
+                    pool.imap_unordered(verify_job, jobs), 1):
+                p = todo[spec(depot, mix, cfg)]
+                row = {"key": p["key"], **{k: p[k] for k in SPEC_FIELDS}, **sim}
+                cache[p["key"]] = row
+                f.write(json.dumps(row) + "\n")
+                f.flush()
+                if done % 20 == 0 or done == len(jobs):
+                    print(f"   {done}/{len(jobs)} simulées")
+
+    simulated = [cache[p["key"]] for p in survivors]
+    front = pareto_front([r for r in simulated if r["completed"]])
+    return {"neighborhood": neighborhood,
+            "space": {"depots": depots, "vehicle_types": list(vehicle_types(base)),
+                      "snow_capacity": sorted({s["snow_capacity"] for s in settings}),
+                      "fuel_capacity": sorted({s["fuel_capacity"] for s in settings}),
+                      "max_per_type": max_per_type, "slack": slack},
+            "estimated": len(points), "pruned": len(points) - len(survivors),
+            "simulated": len(todo), "from_cache": len(survivors) - len(todo),
+            "front": [{k: v for k, v in r.items() if k != "key"} for r in front]}
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Cost / time Pareto front per borough.")
+    p.add_argument("neighborhoods", nargs="*",
+                   help="borough folders under resources/ (default: all ready ones)")
+    p.add_argument("-c", "--config", default=CONFIG_PATH)
+    p.add_argument("--depots", type=int, default=1, help="candidate start depots")
+    p.add_argument("--snow-capacity", type=int, nargs="+")
+    p.add_argument("--fuel-capacity", type=float, nargs="+")
+    p.add_argument("--max-per-type", type=int, default=MAX_PER_TYPE)
+    p.add_argument("--slack", type=float, default=0.05,
+                   help="surrogate error margin kept when pruning dominated points")
+    p.add_argument("-j", "--workers", type=int)
+    return p.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    hoods = args.neighborhoods or sorted(
+        n for n in os.listdir(ROOT)
+        if all(os.path.isfile(os.path.join(ROOT, n, f)) for f in ("eulerized_graph.pkl", "snow_map.csv")))
+    for hood in hoods:
+        report = explore(hood, args.config, args.depots, args.snow_capacity,
+                         args.fuel_capacity, args.max_per_type, args.slack, args.workers)
+        print(f"\n{'cost':>10}{'time_h':>9}{'fleet':>10}{'depot':>12}{'snow cap':>10}{'fuel cap':>10}")
+        for r in report["front"]:
+            fleet = "+".join(map(str, r["fleet"]))
+            print(f"{r['cost']:>10.2f}{r['time_h']:>9.2f}{fleet:>10}"
+                  f"{r['depot']:>12}{r['snow_capacity']:>10}{r['fuel_capacity']:>10}")
+        out = os.path.join(ROOT, hood, FRONT_FILE)
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 {out} ({report['simulated']} simulées, {report['from_cache']} en cache, "
+              f"{report['pruned']} écartées par dominance)\n")
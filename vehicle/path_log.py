@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Streaming vehicle path log (vehicle_path.ndjson.gz).
+
+Paths are no longer kept in RAM and dumped at the end: each agent gets a
+VehicleTrack as its `path`, which only counts steps, remembers the
+visited nodes (bounded by the graph, not the run) and hands chunks of
+CHUNK nodes to a PathWriter while the vehicle drives.  One gzip NDJSON
+line per chunk:
+
+    {"vehicle": "vehicle_typeI_1", "seq": 0, "d": [123456, 3, -3, ...]}
+
+"d" holds delta-encoded node ids: the first delta is relative to the
+last node of the vehicle's previous chunk (0 for its first chunk).
+Chunks of different vehicles may interleave; the reader keeps one
+running node per vehicle, so memory stays flat however long the run.
+
+    python3 vehicle/path_log.py resources/anjou/runs/economie_argent/vehicle_path.ndjson.gz
+"""
+import os
+import gzip
+import json
+import argparse
+import profiler
+
+CHUNK = 1024
+FILENAME = "vehicle_path.ndjson.gz"
+
+class VehicleTrack:
+    """Sink list-like pour agent.path : append / len, sans garder le chemin"""
+
+    def __init__(self, name, writer=None, chunk=CHUNK):
+        self.name = name
+        self.writer = writer
+        self.chunk = chunk
+        self.length = 0
+        self.visited = set()
+        self.buffer = []
+        self.last = 0
+        self.seq = 0
+
+    def append(self, node):
+        self.length += 1
+        self.visited.add(node)
+        if self.writer is not None:
+            self.buffer.append(node)
+            if len(self.buffer) >= self.chunk:
+                self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.writer.write_chunk(self.name, self.seq, self.last, self.buffer)
+            self.last, self.seq, self.buffer = self.buffer[-1], self.seq + 1, []
+
+    def __len__(self):
+        return self.length
+
+class PathWriter:
+    def __init__(self, path, chunk=CHUNK, keep_lines=None):
+        """keep_lines : reprise (checkpoint.py), garder les keep_lines premières lignes du log existant."""
+        old = None
+        if keep_lines is not None and os.path.exists(path):
+            old = f"{path}.partial"
+            os.replace(path, old)
+        self.f = gzip.open(path, "wt")
+        self.chunk = chunk
+        self.tracks = []
+        self.lines = 0
+        if old:
+            with gzip.open(old, "rt") as src:
+                for _, line in zip(range(keep_lines), src):
+                    self.f.write(line)
+                    self.lines += 1
+            os.remove(old)
+
+    def track(self, name):
+        t = VehicleTrack(name, self, self.chunk)
+        self.tracks.append(t)
+        return t
+
+    def write_chunk(self, name, seq, base, nodes):
+        p = profiler.active
+        if p:
+            p.count("path_chunks")
+        deltas = [nodes[0] - base] + [b - a for a, b in zip(nodes, nodes[1:])]
+        self.f.write(json.dumps({"vehicle": name, "seq": seq, "d": deltas},
+                                separators=(",", ":")) + "\n")
+        self.lines += 1
+
+    def close(self):
+        for t in self.tracks:
+            t.flush()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ---------------------------------------------------------------------------
+def iter_chunks(path):
+    """(vehicle, [nodes]) per chunk, in file order."""
+    last = {}
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            chunk = json.loads(line)
+            node, nodes = last.get(chunk["vehicle"], 0), []
+            for d in chunk["d"]:
+                node += d
+                nodes.append(node)
+            last[chunk["vehicle"]] = node
+            yield chunk["vehicle"], nodes
+
+def iter_paths(path):
+    """(vehicle, node) one step at a time."""
+    for vehicle, nodes in iter_chunks(path):
+        for n in nodes:
+            yield vehicle, n
+
+def read_paths(path):
+    """{vehicle: [nodes]} en mémoire (l'ancien vehicle_path.json), pour les petits runs."""
+    paths = {}
+    for vehicle, nodes in iter_chunks(path):
+        paths.setdefault(vehicle, []).extend(nodes)
+    return paths
+
+# ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Résumé d'un vehicle_path.ndjson.gz (lecture en flux).")
+    p.add_argument("path")
+    args = p.parse_args()
+    steps, ends = {}, {}
+    for vehicle, nodes in iter_chunks(args.path):
+        steps[vehicle] = steps.get(vehicle, 0) + len(nodes)
+        ends[vehicle] = nodes[-1]
+    for vehicle in steps:
+        print(f"🚜 {vehicle}: {steps[vehicle]} nœuds, fin en {ends[vehicle]}")
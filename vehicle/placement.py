@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Start depots for the fleet.
+
+By default every vehicle starts at list(G.nodes())[0], an arbitrary node.
+The "depots" section of config.json can instead ask for
+
+    "depots": {"count": 3}                                  # placed here (1 too)
+    "depots": {"coords": [[-73.58, 45.52], [-73.56, 45.50]]} # real sites, snapped
+
+Placement is a weighted k-center on the snowy edges (greedy farthest
+point, each snowy edge weighted by its number of snowy parallel edges),
+refined by a few k-medians rounds; the result and any real coordinates
+are snapped to the nearest node through a uniform grid index over the
+node x / y, so nearest-node queries stay cheap on city-sized graphs.
+Vehicles are then spread round-robin over the depots.
+
+    python3 vehicle/placement.py anjou -k 3
+    python3 vehicle/placement.py anjou --at -73.58,45.52 --at -73.56,45.50
+"""
+import os
+import argparse
+import numpy as np
+
+M_PER_DEG_LAT = 110_540
+M_PER_DEG_LON = 111_320
+
+# ---------------------------------------------------------------------------
+def node_coords(G):
+    """(node ids, n x 2 array of metres) with a local equirectangular projection."""
+    nodes = list(G.nodes())
+    lon = np.array([G.nodes[n].get("x", 0.0) for n in nodes], dtype=float)
+    lat = np.array([G.nodes[n].get("y", 0.0) for n in nodes], dtype=float)
+    return nodes, project(lon, lat, np.nanmean(lat) if len(lat) else 0.0)
+
+def project(lon, lat, lat0):
+    return np.column_stack([np.asarray(lon) * M_PER_DEG_LON * np.cos(np.radians(lat0)),
+                            np.asarray(lat) * M_PER_DEG_LAT])
+
+class GridIndex:
+    """Uniform grid over 2-D points: nearest point by growing rings of cells."""
+
+    def __init__(self, xy, cell=None):
+        self.xy = np.asarray(xy, dtype=float)
+        self.origin = self.xy.min(axis=0)
+        span = np.ptp(self.xy, axis=0).max() if len(self.xy) > 1 else 1.0
+        # ~2 points per cell on average
+        self.cell = cell or max(span / max(np.sqrt(len(self.xy) / 2), 1), 1e-9)
+        keys = np.floor((self.xy - self.origin) / self.cell).astype(np.int64)
+        self.cells = {}
+        for i, (cx, cy) in enumerate(keys.tolist()):
+            self.cells.setdefault((cx, cy), []).append(i)
+        self.extent = keys.max(axis=0) if len(keys) else np.zeros(2, dtype=np.int64)
+
+    def nearest(self, p):
+        """Index of the point closest to p."""
+        cx, cy = np.floor((np.asarray(p) - self.origin) / self.cell).astype(np.int64)
+        best, best_d = None, np.inf
+        max_ring = int(max(abs(cx), abs(cy), *(self.extent - (cx, cy)).tolist())) + 1
+        for r in range(max_ring + 1):
+            # a point found within ring r can still be beaten up to ring r+1
+            if best is not None and (r - 1) * self.cell > best_d:
+                break
+            for i in self._ring(cx, cy, r):
+                d = np.hypot(*(self.xy[i] - p))
+                if d < best_d:
+                    best, best_d = i, d
+        return best
+
+    def _ring(self, cx, cy, r):
+        for x in range(cx - r, cx + r + 1):
+            for y in (cy - r, cy + r) if r else (cy,):
+                yield from self.cells.get((x, y), ())
+        for y in range(cy - r + 1, cy + r):
+            for x in (cx - r, cx + r) if r else ():
+                yield from self.cells.get((x, y), ())
+
+# ---------------------------------------------------------------------------
+def snowy_points(G, index_of, xy):
+    """Midpoints and weights of the snowy edges (weight = snowy parallel edges)."""
+    weights = {}
+    for u, v, k, d in G.edges(keys=True, data=True):
+        if d.get("snow", False):
+            pair = (u, v) if u <= v else (v, u)
+            weights[pair] = weights.get(pair, 0) + 1
+    if not weights:
+        return np.zeros((0, 2)), np.zeros(0)
+    pairs = list(weights)
+    mid = np.array([(xy[index_of[u]] + xy[index_of[v]]) / 2 for u, v in pairs])
+    return mid, np.array([weights[p] for p in pairs], dtype=float)
+
+def k_center(points, weights, k, first=0):
+    """Greedy weighted farthest-point centers (indices into points)."""
+    centers = [first]
+    dist = np.hypot(*(points - points[first]).T)
+    while len(centers) < min(k, len(points)):
+        i = int(np.argmax(weights * dist))
+        if dist[i] == 0:
+            break
+        centers.append(i)
+        dist = np.minimum(dist, np.hypot(*(points - points[i]).T))
+    return points[centers]
+
+def k_medians(points, weights, centers, rounds=10):
+    """Lloyd-style rounds: assign to nearest center, move to the weighted median."""
+    for _ in range(rounds):
+        assign = np.argmin(np.linalg.norm(points[:, None, :] - centers[None], axis=2), axis=1)
+        moved = centers.copy()
+        for c in range(len(centers)):
+            mask = assign == c
+            if mask.any():
+                moved[c] = [weighted_median(points[mask, a], weights[mask]) for a in (0, 1)]
+        if np.allclose(moved, centers):
+            break
+        centers = moved
+    return centers
+
+def weighted_median(values, weights):
+    order = np.argsort(values)
+    cum = np.cumsum(weights[order])
+    return values[order][np.searchsorted(cum, cum[-1] / 2)]
+
+def place_depots(G, k):
+    """k depot nodes spread over the snowy edges (default start if no snow)."""
+    nodes, xy = node_coords(G)
+    index_of = {n: i for i, n in enumerate(nodes)}
+    points, weights = snowy_points(G, index_of, xy)
+    if len(points) == 0:
+        return nodes[:1]
+    first = int(np.argmax(weights))
+    centers = k_medians(points, weights, k_center(points, weights, k, first))
+    grid = GridIndex(xy)
+    depots = []
+    for c in centers:
+        n = nodes[grid.nearest(c)]
+        if n not in depots:
+            depots.append(n)
+    return depots
+
+def snap(G, coords):
+    """Nearest node of each (lon, lat)."""
+    nodes, xy = node_coords(G)
+    lat0 = np.nanmean([G.nodes[n].get("y", 0.0) for n in nodes])
+    grid = GridIndex(xy)
+    targets = project([c[0] for c in coords], [c[1] for c in coords], lat0)
+    return [nodes[grid.nearest(p)] for p in targets]
+
+def depot_nodes(G, config):
+    """Start depots requested by config["depots"] (first node only when absent)."""
+    spec = config.get("depots") or {}
+    if spec.get("coords"):
+        return list(dict.fromkeys(snap(G, spec["coords"])))
+    if spec.get("count", 0) >= 1:
+        return place_depots(G, spec["count"])
+    return [next(iter(G.nodes()))]
+
+# ---------------------------------------------------------------------------
+def parse_args():
+    p = argparse.ArgumentParser(description="Place or snap start depots.")
+    p.add_argument("neighborhood")
+    p.add_argument("-k", "--count", type=int, default=3)
+    p.add_argument("--at", action="append", metavar="LON,LAT",
+                   help="real depot coordinates to snap (repeatable)")
+    return p.parse_args()
+
+if __name__ == "__main__":
+    from simulation import ROOT, load_graph_with_snow
+    args = parse_args()
+    G = load_graph_with_snow(os.path.join(ROOT, args.neighborhood))
+    if args.at:
+        depots = snap(G, [tuple(map(float, a.split(","))) for a in args.at])
+    else:
+        depots = place_depots(G, args.count)
+    print(f"🏭 {len(depots)} dépôts pour {args.neighborhood}:")
+    for n in depots:
+        print(f"   {n:>12}  ({G.nodes[n].get('x')}, {G.nodes[n].get('y')})")
+    print(f'\n   "depots": {{"coords": {[[G.nodes[n]["x"], G.nodes[n]["y"]] for n in depots]}}}')
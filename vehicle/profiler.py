@@ -0,0 +1,83 @@
+"""
+Built-in profiling of the simulator: per-phase wall time and counters.
+
+Enabled by config["profile"] (run_simulation) -- when it is off,
+`profiler.active` is None and every instrumentation point costs one
+attribute lookup and a falsy test:
+
+    p = profiler.active
+    if p:
+        p.count("dijkstra_calls")
+
+    with profiler.phase("planning"):        # shared no-op context when off
+        ...
+
+Phases are inclusive: a phase run inside another (replan inside
+stepping) counts in both.  Runs nested in a profiled run (fleet sizing
+verifications) add to the outer profile.  report() gives seconds and
+call count per phase, the counters and steps per second of stepping;
+run_simulation writes it to vehicle_profile.json next to
+vehicle_stats.json.
+"""
+import time
+from contextlib import nullcontext
+
+active = None
+_off = nullcontext()
+
+class _Phase:
+    __slots__ = ("prof", "name", "t0")
+
+    def __init__(self, prof, name):
+        self.prof, self.name = prof, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.prof.add(self.name, time.perf_counter() - self.t0)
+
+class Profiler:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.seconds = {}
+        self.calls = {}
+        self.counters = {}
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def add(self, name, seconds):
+        """Temps mesuré à la main (boucles trop longues pour un with)."""
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        stepping = self.seconds.get("stepping", 0.0)
+        steps = self.counters.get("steps", 0)
+        return {
+            "wall_s": round(time.perf_counter() - self.t0, 4),
+            "phases": {name: {"s": round(s, 4), "calls": self.calls[name]}
+                       for name, s in sorted(self.seconds.items(), key=lambda kv: -kv[1])},
+            "counters": dict(sorted(self.counters.items())),
+            "steps_per_s": round(steps / stepping, 1) if stepping else None,
+        }
+
+def phase(name):
+    return active.phase(name) if active else _off
+
+def enable():
+    """Démarre un profil, sauf si un run englobant en a déjà un (renvoie None)."""
+    global active
+    if active is not None:
+        return None
+    active = Profiler()
+    return active
+
+def disable():
+    global active
+    prof, active = active, None
+    return prof
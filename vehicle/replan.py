@@ -0,0 +1,144 @@
+"""
+Online repair of a vehicle's planned route when the snow changes.
+
+The Chinese-postman route is planned once on the whole graph; streets
+cleared meanwhile (by earlier vehicles, or snow added by an event) make
+parts of it useless.  Instead of re-solving the CPP, repair_route keeps
+the snowy edges of the residual route in their planned order and only
+re-solves the clean stretches between them:
+
+- each clean run between two snowy edges is replaced by a shortest path
+  when one exists that is shorter than the run (Dijkstra bounded by the
+  run's own length, so the search stays local);
+- the clean tail after the last snowy edge is dropped;
+- snowy edges the residual route does not cover are appended by a
+  nearest-first walk (multi-target Dijkstra, as in _fallback_route).
+
+Distances are step_length() so the repair optimises what the simulator
+counts.  Any code changing snow flags outside the agent's own clearing
+bumps G.graph["snow_version"] (bump_snow_version) to trigger a repair.
+"""
+import heapq
+import time
+import profiler
+
+def snow_version(G):
+    return G.graph.get("snow_version", 0)
+
+def bump_snow_version(G):
+    G.graph["snow_version"] = snow_version(G) + 1
+
+def _pair(u, v):
+    return (u, v) if u <= v else (v, u)
+
+def is_snowy(G, u, v):
+    return any(G[u][v][k].get("snow", False) for k in G[u][v])
+
+def _lengths(G):
+    """step_length memoised per (u, v) for the duration of one repair."""
+    from simulation import step_length
+    memo = {}
+    def length(u, v):
+        if (u, v) not in memo:
+            memo[u, v] = step_length(G, u, v)
+        return memo[u, v]
+    return length
+
+def shortest_path(G, source, target, cutoff, length=None):
+    """Dijkstra source -> target, giving up beyond `cutoff`; None if no shorter path."""
+    length = length or _lengths(G)
+    p = profiler.active
+    if p:
+        p.count("dijkstra_calls")
+    if source == target:
+        return [source]
+    dist, parent = {source: 0.0}, {source: None}
+    heap, done, tie = [(0.0, 0, source)], set(), 1
+    while heap:
+        d, _, u = heapq.heappop(heap)
+        if u in done:
+            continue
+        if u == target:
+            path = [u]
+            while parent[path[-1]] is not None:
+                path.append(parent[path[-1]])
+            return path[::-1]
+        done.add(u)
+        for v in G[u]:
+            nd = d + length(u, v)
+            if nd < cutoff and v not in done and nd < dist.get(v, float("inf")):
+                dist[v], parent[v] = nd, u
+                heapq.heappush(heap, (nd, tie, v))
+                tie += 1
+    return None
+
+def repair_route(G, residual, current_node, snowy_pairs=None):
+    """
+    Repaired residual route (list of (u, v)) starting at current_node.
+    snowy_pairs: all snowy (min, max) pairs of G, to also cover snow that
+    is not on the residual route (None: only the residual is repaired).
+    """
+    from brain import VehicleAgent
+    length = _lengths(G)
+
+    # snowy edges of the residual route, first traversal only
+    needed, seen = [], set()
+    for i, (u, v) in enumerate(residual):
+        p = _pair(u, v)
+        if p not in seen and is_snowy(G, u, v):
+            needed.append(i)
+        seen.add(p)
+
+    route, pos, run_start = [], current_node, 0
+    for i in needed:
+        run = residual[run_start:i]
+        target = residual[i][0]
+        run_len = sum(length(a, b) for a, b in run)
+        if run and run[0][0] == pos:
+            path = shortest_path(G, pos, target, run_len, length)
+            route += list(zip(path[:-1], path[1:])) if path else run
+        else:               # the agent is off its plan: reconnect without bound
+            path = shortest_path(G, pos, target, float("inf"), length) or [pos]
+            route += list(zip(path[:-1], path[1:]))
+        route.append(residual[i])
+        pos, run_start = residual[i][1], i + 1
+
+    # snow off the residual route: nearest-first walk
+    if snowy_pairs:
+        covered = {_pair(u, v) for u, v in route}
+        missing = [p for p in snowy_pairs if p not in covered]
+        remaining = {}
+        for u, v in missing:
+            remaining.setdefault(u, set()).add((u, v))
+            remaining.setdefault(v, set()).add((u, v))
+        counts = {n: len(ps) for n, ps in remaining.items()}
+        left = set(missing)
+        while left:
+            path = VehicleAgent._path_to_remaining(G, pos, counts)
+            if path is None:
+                break
+            route += list(zip(path[:-1], path[1:]))
+            pos = path[-1]
+            p = next(iter(remaining[pos] & left))
+            nxt = p[1] if p[0] == pos else p[0]
+            route.append((pos, nxt))
+            left.discard(p)
+            for n in set(p):
+                counts[n] -= 1
+            pos = nxt
+    return route
+
+def snowy_pair_set(G):
+    return {_pair(u, v) for u, v, d in G.edges(data=True) if d.get("snow", False)}
+
+def replan(agent, G):
+    """Repair agent.planned_route from route_index on; returns the latency in ms."""
+    t0 = time.perf_counter()
+    done = agent.planned_route[:agent.route_index]
+    residual = agent.planned_route[agent.route_index:]
+    agent.planned_route = done + repair_route(G, residual, agent.current_node,
+                                              snowy_pair_set(G))
+    agent.seen_snow_version = snow_version(G)
+    ms = (time.perf_counter() - t0) * 1000
+    agent.replan_latencies_ms.append(ms)
+    return ms
@@ -0,0 +1,141 @@
+"""
+On-disk cache of simulation results (resources/.sim_cache/).
+
+A run is fully determined by the graph, its snow, config.json, the
+strategy / budget / fleet, the depots, the RNG seed (agents draw from
+their own seeded random.Random) and the simulator code itself, so the
+SHA-1 of all of these keys a cache entry:
+
+    <key>/stats.json              vehicle_stats.json of the run
+    <key>/cleared.json            cleared (u, v) pairs, re-applied to G on a hit
+    <key>/vehicle_path.ndjson.gz  path log, when the run wrote one
+
+A hit skips the simulation entirely.  Entries are touched on every hit
+and evicted least recently used first once there are more than
+max_entries of them or they weigh more than max_mb.  Writers build an
+entry in a private temporary folder and rename it into place, so
+parallel workers never see half an entry.
+
+Configured by config["result_cache"]: {"enabled", "max_entries", "max_mb"};
+off by default.  Worth it for repeated single runs (make simulate on an
+unchanged borough); the batch runners (Monte Carlo, sweep, fleet
+verification, job server) turn it off, since their runs are never
+repeated and the key hashes the whole graph before any work.
+"""
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from shared_graph import GraphView
+from fleet_optimizer import snow_signature
+
+CACHE_DIR = "resources/.sim_cache"
+MAX_ENTRIES = 500
+MAX_MB = 512
+HERE = os.path.dirname(os.path.abspath(__file__))
+# modules dont dépend le résultat d'une simulation
+SIM_MODULES = ("brain.py", "simulation.py", "vehicles.py", "cost_model.py", "memory.py",
+               "depot.py", "replan.py", "placement.py", "fleet_optimizer.py", "path_log.py")
+
+_code_hash = None
+
+def code_hash():
+    global _code_hash
+    if _code_hash is None:
+        h = hashlib.sha1()
+        for name in SIM_MODULES:
+            with open(os.path.join(HERE, name), "rb") as f:
+                h.update(f.read())
+        _code_hash = h.hexdigest()
+    return _code_hash
+
+def graph_hash(G):
+    """Topologie + longueurs, dans l'ordre d'adjacence (qui fixe la route planifiée)."""
+    h = hashlib.sha1()
+    if isinstance(G, GraphView):
+        for name in ("nodes", "indptr", "adj_node", "adj_edge", "length"):
+            h.update(np.ascontiguousarray(G.a[name]).tobytes())
+        return h.hexdigest()
+    for u, v, k, d in G.edges(keys=True, data=True):
+        h.update(f"{u},{v},{k},{d.get('length', 1.0)};".encode())
+    return h.hexdigest()
+
+def run_key(G, config, **inputs):
+    blob = json.dumps({"code": code_hash(), "graph": graph_hash(G),
+                       "snow": snow_signature(G), "config": config, **inputs},
+                      sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+class ResultCache:
+    def __init__(self, root=CACHE_DIR, max_entries=MAX_ENTRIES, max_mb=MAX_MB):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_bytes = max_mb * 2**20
+
+    @classmethod
+    def from_config(cls, config):
+        """None si config["result_cache"] est absent ou désactivé."""
+        spec = config.get("result_cache") or {}
+        if not spec.get("enabled"):
+            return None
+        return cls(spec.get("root", CACHE_DIR), spec.get("max_entries", MAX_ENTRIES),
+                   spec.get("max_mb", MAX_MB))
+
+    def get(self, key, with_paths=False):
+        """(stats, cleared pairs, path log or None), or None on a miss."""
+        folder = os.path.join(self.root, key)
+        path_log = os.path.join(folder, "vehicle_path.ndjson.gz")
+        try:
+            with open(os.path.join(folder, "stats.json")) as f:
+                stats = json.load(f)
+            with open(os.path.join(folder, "cleared.json")) as f:
+                cleared = [tuple(e) for e in json.load(f)]
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if with_paths and not os.path.exists(path_log):
+            return None
+        os.utime(folder)                                # LRU : dernier accès
+        return stats, cleared, path_log if os.path.exists(path_log) else None
+
+    def put(self, key, stats, cleared, path_log=None):
+        os.makedirs(self.root, exist_ok=True)
+        folder = os.path.join(self.root, key)
+        tmp = f"{folder}.tmp-{os.getpid()}"
+        os.makedirs(tmp, exist_ok=True)
+        with open(os.path.join(tmp, "stats.json"), "w") as f:
+            json.dump(stats, f)
+        with open(os.path.join(tmp, "cleared.json"), "w") as f:
+            json.dump(sorted(cleared), f)
+        if path_log and os.path.exists(path_log):
+            shutil.copyfile(path_log, os.path.join(tmp, "vehicle_path.ndjson.gz"))
+        shutil.rmtree(folder, ignore_errors=True)       # entrée sans chemins remplacée
+        try:
+            os.rename(tmp, folder)
+        except OSError:                                 # un autre processus l'a écrite
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.root):
+            folder = os.path.join(self.root, name)
+            if ".tmp-" in name or not os.path.isdir(folder):
+                continue
+            try:
+                size = sum(e.stat().st_size for e in os.scandir(folder))
+                entries.append((os.stat(folder).st_mtime, size, folder))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, folder = entries.pop(0)
+            shutil.rmtree(folder, ignore_errors=True)
+            total -= size
+
+def apply_cleared(G, cleared):
+    """Rejoue le déneigement d'un résultat en cache sur G (comme simulate_vehicle)."""
+    for u, v in cleared:
+        for key in G[u][v]:
+            G[u][v][key]["snow"] = False
@@ -0,0 +1,330 @@
+"""
+Read-only borough graph in shared memory for multi-process simulations.
+
+The parent process packs the topology (CSR adjacency), node coordinates,
+edge lengths and the initial snow flags of an undirected MultiGraph into
+one multiprocessing.shared_memory block.  Workers attach to it without
+unpickling anything and get a GraphView: the subset of the networkx
+MultiGraph API used by simulation.py / brain.py, backed by the shared
+arrays.  Only the snow flags are private to each view (one byte per
+edge, copied on creation), so N concurrent simulations on one borough
+cost about one graph plus N small snow arrays.
+
+    with SharedGraph.create(G) as shared:          # parent
+        pool = Pool(initializer=..., initargs=(shared.meta,))
+    shared = SharedGraph.attach(meta)              # worker
+    G = shared.view()                              # fresh snow state per run
+"""
+from collections.abc import Mapping, MutableMapping
+from multiprocessing import shared_memory
+import numpy as np
+import networkx as nx
+
+# ---------------------------------------------------------------------------
+def _copied_adjacency(adj):
+    """
+    {u: {v: {key: None}}} in the order G.copy() would have: nodes first,
+    then edges re-added in adjacency order, so a neighbour is listed where
+    its first edge with u is met (networkx shares the key dict of both
+    directions).  Keys only -- no attribute dicts are copied.
+    """
+    new = {u: {} for u in adj}
+    for u, nbrs in adj.items():
+        for v, keys in nbrs.items():
+            kd = new[u].get(v)
+            if kd is None:
+                kd = new[u][v] = new[v][u] = {}
+            for k in keys:
+                kd[k] = None
+    return new
+
+class SharedGraph:
+    FIELDS = ("nodes", "sorted_nodes", "sorted_pos", "x", "y", "indptr",
+              "adj_node", "adj_edge", "edge_u", "edge_v", "edge_key",
+              "length", "snow")
+
+    def __init__(self, shm, layout, owner):
+        self.shm, self.layout, self.owner = shm, layout, owner
+        self.arrays = {}
+        for name, (offset, dtype, shape) in layout.items():
+            arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            arr.flags.writeable = False
+            self.arrays[name] = arr
+
+    @property
+    def meta(self):
+        """Small picklable handle to pass to worker processes."""
+        return {"name": self.shm.name, "layout": self.layout}
+
+    @classmethod
+    def create(cls, G):
+        """Pack an undirected (Multi)Graph with integer node ids."""
+        nodes = np.array(list(G.nodes()), dtype=np.int64)     # keeps G's order
+        index = {int(n): i for i, n in enumerate(nodes)}
+        sorted_pos = np.argsort(nodes, kind="stable")
+
+        edges = list(G.edges(keys=True, data=True)) if G.is_multigraph() \
+            else [(u, v, 0, d) for u, v, d in G.edges(data=True)]
+        edge_u = np.array([index[u] for u, _, _, _ in edges], dtype=np.int64)
+        edge_v = np.array([index[v] for _, v, _, _ in edges], dtype=np.int64)
+
+        # CSR in the adjacency order networkx.eulerian_circuit walks (it runs
+        # on a copy of the copy brain.py makes), so both give the same route
+        eid = {}
+        for e, (u, v, k, _) in enumerate(edges):
+            eid[(u, v, k)] = eid[(v, u, k)] = e
+        adj = G.adj if G.is_multigraph() else {u: dict.fromkeys(nbrs, (0,)) for u, nbrs in G.adj.items()}
+        H = _copied_adjacency(_copied_adjacency(adj))
+        adj_node, adj_edge, indptr = [], [], [0]
+        for u in nodes.tolist():
+            for v, keys in H[u].items():
+                for k in keys:
+                    adj_node.append(index[v])
+                    adj_edge.append(eid[(u, v, k)])
+            indptr.append(len(adj_node))
+
+        arrays = {
+            "nodes": nodes,
+            "sorted_nodes": nodes[sorted_pos],
+            "sorted_pos": sorted_pos.astype(np.int64),
+            "x": np.array([G.nodes[n].get("x", np.nan) for n in nodes.tolist()]),
+            "y": np.array([G.nodes[n].get("y", np.nan) for n in nodes.tolist()]),
+            "indptr": np.array(indptr, dtype=np.int64),
+            "adj_node": np.array(adj_node, dtype=np.int64),
+            "adj_edge": np.array(adj_edge, dtype=np.int64),
+            "edge_u": edge_u,
+            "edge_v": edge_v,
+            "edge_key": np.array([k for _, _, k, _ in edges], dtype=np.int64),
+            "length": np.array([d.get("length", 1.0) for *_, d in edges], dtype=np.float64),
+            "snow": np.array([bool(d.get("snow", False)) for *_, d in edges], dtype=np.uint8),
+        }
+
+        layout, offset = {}, 0
+        for name in cls.FIELDS:
+            arr = arrays[name]
+            offset = -(-offset // 8) * 8                  # 8-byte alignment
+            layout[name] = (offset, arr.dtype.str, arr.shape)
+            offset += arr.nbytes
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name in cls.FIELDS:
+            o, dtype, shape = layout[name]
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=o)[...] = arrays[name]
+        return cls(shm, layout, owner=True)
+
+    @classmethod
+    def attach(cls, meta):
+        # only the creating process unlinks the block (see close())
+        shm = shared_memory.SharedMemory(name=meta["name"])
+        return cls(shm, meta["layout"], owner=False)
+
+    def view(self, snow=None):
+        """GraphView with its own copy of the snow flags."""
+        return GraphView(self, self.arrays["snow"].copy() if snow is None else snow)
+
+    def close(self):
+        self.arrays.clear()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ---------------------------------------------------------------------------
+class _EdgeData(MutableMapping):
+    """Attribute dict of one edge: shared `length`, private `snow`."""
+    __slots__ = ("_g", "_e")
+
+    def __init__(self, g, e):
+        self._g, self._e = g, e
+
+    def __getitem__(self, attr):
+        if attr == "snow":
+            return bool(self._g.snow[self._e])
+        if attr == "length":
+            return float(self._g.a["length"][self._e])
+        raise KeyError(attr)
+
+    def __setitem__(self, attr, value):
+        if attr != "snow":
+            raise TypeError(f"shared graph attribute '{attr}' is read-only")
+        self._g.snow[self._e] = bool(value)
+
+    def __delitem__(self, attr):
+        raise TypeError("shared graph attributes cannot be deleted")
+
+    def __iter__(self):
+        return iter(("length", "snow"))
+
+    def __len__(self):
+        return 2
+
+    def copy(self):
+        return dict(self)
+
+class _KeyView(Mapping):
+    """G[u][v]: edge key -> attribute dict."""
+    __slots__ = ("_g", "_eids")
+
+    def __init__(self, g, eids):
+        self._g, self._eids = g, eids
+
+    def __getitem__(self, key):
+        for e in self._eids:
+            if self._g.a["edge_key"][e] == key:
+                return _EdgeData(self._g, e)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (int(self._g.a["edge_key"][e]) for e in self._eids)
+
+    def __len__(self):
+        return len(self._eids)
+
+class _AdjView(Mapping):
+    """G[u]: neighbour -> _KeyView."""
+    __slots__ = ("_g", "_nbrs", "_eids")
+
+    def __init__(self, g, i):
+        lo, hi = g.a["indptr"][i], g.a["indptr"][i + 1]
+        self._g = g
+        self._nbrs = g.a["adj_node"][lo:hi]
+        self._eids = g.a["adj_edge"][lo:hi]
+
+    def __getitem__(self, v):
+        j = self._g._index(v)
+        mask = self._nbrs == j
+        if not mask.any():
+            raise KeyError(v)
+        return _KeyView(self._g, self._eids[mask].tolist())
+
+    def __iter__(self):
+        nodes = self._g.a["nodes"]
+        _, first = np.unique(self._nbrs, return_index=True)
+        return iter(nodes[self._nbrs[np.sort(first)]].tolist())
+
+    def __len__(self):
+        return len(np.unique(self._nbrs))
+
+class _NodeView(Mapping):
+    def __init__(self, g):
+        self._g = g
+
+    def __call__(self, data=False):
+        if not data:
+            return self
+        return ((n, self[n]) for n in self)
+
+    def __getitem__(self, n):
+        i = self._g._index(n)
+        return {"x": float(self._g.a["x"][i]), "y": float(self._g.a["y"][i])}
+
+    def __iter__(self):
+        return iter(self._g.a["nodes"].tolist())
+
+    def __len__(self):
+        return len(self._g.a["nodes"])
+
+    def __contains__(self, n):
+        try:
+            self._g._index(n)
+            return True
+        except KeyError:
+            return False
+
+class GraphView:
+    """MultiGraph-like access to a SharedGraph with private snow flags."""
+
+    def __init__(self, shared, snow):
+        self.shared = shared
+        self.a = shared.arrays
+        self.snow = snow
+        self.graph = {}
+        self.nodes = _NodeView(self)
+
+    def _index(self, n):
+        nodes = self.a["sorted_nodes"]
+        i = int(np.searchsorted(nodes, n))
+        if i >= len(nodes) or nodes[i] != n:
+            raise KeyError(n)
+        return int(self.a["sorted_pos"][i])
+
+    # --- networkx-compatible subset -------------------------------------
+    def __getitem__(self, u):
+        return _AdjView(self, self._index(u))
+
+    def __contains__(self, n):
+        return n in self.nodes
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def is_directed(self):
+        return False
+
+    def is_multigraph(self):
+        return True
+
+    def number_of_edges(self):
+        return len(self.a["edge_u"])
+
+    def has_edge(self, u, v):
+        try:
+            return self._index(v) in self[u]._nbrs
+        except KeyError:
+            return False
+
+    def degree(self, n):
+        i = self._index(n)
+        lo, hi = self.a["indptr"][i], self.a["indptr"][i + 1]
+        loops = int(np.count_nonzero(self.a["adj_node"][lo:hi] == i))
+        return int(hi - lo) + loops
+
+    def edges(self, keys=False, data=False):
+        nodes, eu, ev, ek = (self.a[f] for f in ("nodes", "edge_u", "edge_v", "edge_key"))
+        for e in range(len(eu)):
+            item = (int(nodes[eu[e]]), int(nodes[ev[e]]))
+            if keys:
+                item += (int(ek[e]),)
+            if data:
+                item += (_EdgeData(self, e),)
+            yield item
+
+    def copy(self):
+        """Private networkx MultiGraph (only for algorithms needing one)."""
+        G = nx.MultiGraph()
+        G.add_nodes_from((n, d) for n, d in self.nodes(data=True))
+        G.add_edges_from((u, v, k, dict(d)) for u, v, k, d in
+                         self.edges(keys=True, data=True))
+        return G
+
+    # --- fast paths used by the simulator -------------------------------
+    def snow_remaining(self):
+        return int(np.count_nonzero(self.snow))
+
+    def eulerian_circuit(self, source):
+        """Hierholzer on the CSR arrays; same (u, v) pairs as networkx."""
+        nodes, indptr = self.a["nodes"], self.a["indptr"]
+        adj_node, adj_edge = self.a["adj_node"], self.a["adj_edge"]
+        used = np.zeros(self.number_of_edges(), dtype=bool)
+        cursor = indptr[:-1].copy()
+        stack, circuit = [self._index(source)], []
+        while stack:
+            i = stack[-1]
+            while cursor[i] < indptr[i + 1] and used[adj_edge[cursor[i]]]:
+                cursor[i] += 1
+            if cursor[i] == indptr[i + 1]:
+                circuit.append(stack.pop())
+            else:
+                used[adj_edge[cursor[i]]] = True
+                stack.append(int(adj_node[cursor[i]]))
+        if not used.all():
+            raise nx.NetworkXError("G is not connected/Eulerian")
+        ids = nodes[circuit].tolist()        # pop order, as networkx yields it
+        return list(zip(ids[:-1], ids[1:]))
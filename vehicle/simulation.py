@@ -1,17 +1,39 @@
 # simulate_vehicle.py
 import os
+import sys
 import csv
 import json
+import time
+import shutil
 import pickle
 import networkx as nx
-from brain import VehicleAgent
-from vehicles import VehicleTypeI, VehicleTypeII
-
+import profiler
+import memprof
+from brain import VehicleAgent, load_config, snow_scan
+from vehicles import vehicle_classes
+from cost_model import vehicle_types, cheapest_fleet
+from fleet_optimizer import optimize_fleet
+from depot import depot_tree
+from placement import depot_nodes
+from replan import replan, snow_version, bump_snow_version
+from path_log import PathWriter, VehicleTrack, FILENAME as PATH_LOG
+from result_cache import ResultCache, run_key, apply_cleared
+from checkpoint import Checkpointer, checkpoint_path, restore_agent
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "reports"))
+import run_store
+
+ROOT = "resources/"
+CONFIG_PATH = "vehicle/config.json"
+DEFAULT_SEED = 0    # graine des agents quand aucune n'est donnée : runs reproductibles
+SUMMARY_FILE = "reports/runs.sqlite"    # run_store.py (importe l'ancien all_runs.json)
+
+def list_neighborhoods(root_dir=ROOT):
+    return [n for n in os.listdir(root_dir)
+            if os.path.isdir(os.path.join(root_dir, n))]
 
 def prompt_for_neighborhood():
-    root_dir = "resources/"
-    neighborhoods = [n for n in os.listdir(root_dir)
-                     if os.path.isdir(os.path.join(root_dir, n))]
+    neighborhoods = list_neighborhoods()
 
     print("\n📍 Available neighborhoods:")
     for idx, name in enumerate(neighborhoods):
@@ -52,76 +74,47 @@ def load_graph_with_snow(input_dir):
 
 def estimate_total_snow_edges(G):
     """Estime le nombre total d'arêtes avec de la neige"""
+    if hasattr(G, "snow_remaining"):
+        return G.snow_remaining()
+    p = profiler.active
+    if p:
+        p.count("edges_scanned", G.number_of_edges())
     snow_edges = 0
     for u, v, key in G.edges(keys=True):
         if G[u][v][key].get('snow', False):
             snow_edges += 1
     return snow_edges
 
+def step_length(G, u, v):
+    """Distance comptée pour le passage u -> v"""
+    edge_data = G[u][v][0] if isinstance(G[u][v], dict) else G[u][v]
+    return edge_data.get("length", 1.0)
+
 def has_snow_remaining(G):
     """Vérifie s'il reste de la neige dans le graphe"""
-    for u, v, key in G.edges(keys=True):
-        if G[u][v][key].get('snow', False):
-            return True
-    return False
-
-def calculate_vehicle_distribution(strategy, budget=None, total_snow_edges=0):
-    """Calcule la distribution optimale des véhicules selon la stratégie"""
+    return snow_scan(G)
+
+def calculate_vehicle_distribution(strategy, budget=None, G=None, config=CONFIG_PATH,
+                                   neighborhood=None, start_node=None, depots=None, seed=None):
+    """
+    Calcule la distribution optimale des véhicules selon la stratégie
+    (depots, seed : ceux du run, pour que la vérification simule le même run)
+    """
     if strategy == "economie_argent":
-        # Un seul véhicule Type I (le moins cher) pour minimiser les coûts
-        return 1, 0
+        # Un seul véhicule, du type le moins cher, pour minimiser les coûts
+        return cheapest_fleet(config)
 
     elif strategy == "economie_temps":
-        # Optimiser le temps en respectant strictement le budget
-        return optimize_for_time_with_budget(budget, total_snow_edges)
-
-def optimize_for_time_with_budget(budget, total_snow_edges):
-    """Optimise le nombre de véhicules pour minimiser le temps en respectant le budget"""
-    # Coûts fixes des véhicules
-    type1_fixed_cost = 500
-    type2_fixed_cost = 800
-
-    # Estimation grossière : 1 véhicule peut traiter ~50 arêtes, ~100km, ~10h
-    edges_per_vehicle = 50
-    km_per_vehicle = 100
-
-    # Coût estimé par véhicule (fixe + variable)
-    type1_estimated_cost = type1_fixed_cost + (1.1 * km_per_vehicle) + (1.1 * 8 + 1.3 * 2)  # ~8h + 2h sup
-    type2_estimated_cost = type2_fixed_cost + (1.3 * km_per_vehicle) + (1.3 * 5)  # 5h (plus rapide)
-
-    best_time = float('inf')
-    best_config = (1, 0)  # Au minimum 1 véhicule Type I
-
-    max_vehicles = min(10, int(budget // type1_estimated_cost))
-
-    for num_type1 in range(0, max_vehicles + 1):
-        for num_type2 in range(0, max_vehicles + 1):
-            if num_type1 + num_type2 == 0:
-                continue
-
-            # Estimation du coût total
-            estimated_cost = (num_type1 * type1_estimated_cost +
-                              num_type2 * type2_estimated_cost)
-
-            if estimated_cost > budget:
-                continue
-
-            # Estimation du temps (limité par le véhicule le plus lent)
-            # Répartition du travail entre les véhicules
-            total_vehicles = num_type1 + num_type2
-            edges_per_this_config = total_snow_edges / total_vehicles
-            km_per_this_config = edges_per_this_config * 2  # Estimation
-
-            time_type1 = km_per_this_config / 10 if num_type1 > 0 else 0  # 10 km/h
-            time_type2 = km_per_this_config / 20 if num_type2 > 0 else 0  # 20 km/h
-
-            max_time = max(time_type1, time_type2)
-
-            if max_time < best_time:
-                best_time = max_time
-                best_config = (num_type1, num_type2)
-
-    return best_config
+        # Flotte la plus rapide dont le coût simulé respecte le budget
+        fleet, info = optimize_fleet(G, budget, config, neighborhood,
+                                     start_node=start_node, depots=depots, seed=seed)
+        if "simulated" in info:
+            sim = info["simulated"]
+            print(f"   🧮 Flotte vérifiée par simulation ({info['simulation_runs']} runs): "
+                  f"{sim['cost']:.2f}€, {sim['time_h']:.2f} h")
+        else:
+            print(f"   ⚠️  {info['reason']} - repli sur 1 seul véhicule")
+        return fleet
 
 def prompt_for_strategy():
     """Demande à l'utilisateur de choisir une stratégie d'optimisation"""
@@ -148,24 +141,84 @@ def prompt_for_strategy():
             pass
         print("❌ Invalid input. Please enter 1 or 2.")
 
-def simulate_vehicle(vehicle_class, start_node, config_path, G_shared, vehicle_id):
-    """Simule un véhicule individuel sur le graphe partagé"""
-    agent = vehicle_class(start_node, config_path)
-    cleared_edges = set()
+def depot_trip(agent, tree, G, resume_at=None):
+    """Aller au dépôt le plus proche (plein + vidage), puis revenir à resume_at"""
+    p = profiler.active
+    if p:
+        p.count("depot_trips")
+    home = tree.path_home(agent.current_node)
+    for a, b in zip(home, home[1:]):
+        agent.move_to(b, step_length(G, a, b))
+    if resume_at is None:
+        return
+    agent.refill()
+    out = tree.path_out(G, home[-1], resume_at)
+    for a, b in zip(out, out[1:]):
+        agent.move_to(b, step_length(G, a, b))
+
+def simulate_vehicle(vehicle_class, start_node, config, G_shared, vehicle_id, route_cache=None,
+                     tree=None, track=None, seed=DEFAULT_SEED, checkpoint=None, resumed=None):
+    """
+    Simule un véhicule individuel sur le graphe partagé.
+    tree (DepotTree, si return_to_base) : le véhicule repasse au dépôt faire
+    le plein / vider sa benne au lieu de s'arrêter, et y rentre à la fin.
+    config["replan"] : la route restante est réparée (replan.py) dès que la
+    neige a changé depuis la dernière réparation, au départ compris.
+    track (path_log.VehicleTrack) : remplace la liste agent.path, le chemin
+    part en flux vers vehicle_path.ndjson.gz au lieu de rester en mémoire.
+    seed : graine du hasard de l'agent, combinée à vehicle_id.
+    checkpoint (checkpoint.Checkpointer) : appelé à chaque pas, sauvegarde si dû.
+    resumed : (agent, arêtes déjà déneigées) restaurés d'un checkpoint.
+    """
+    if resumed is not None:
+        agent, cleared_edges = resumed
+        agent.route_cache = route_cache
+    else:
+        agent = vehicle_class(start_node, config)
+        agent.route_cache = route_cache
+        agent.rng.seed(f"{seed}:{vehicle_id}")
+        if track is not None:
+            track.append(start_node)
+            agent.path = track
+        cleared_edges = set()
+
+    prof = profiler.active
+    t_steps = time.perf_counter() if prof else 0.0
 
     while agent.can_continue():
+        if prof:
+            prof.count("steps")
+        if checkpoint is not None:
+            checkpoint(agent, cleared_edges)
         # Vérifier s'il reste de la neige dans le graphe
         if not has_snow_remaining(G_shared):
             print(f"      ❄️ Plus de neige détectée - Arrêt du véhicule {vehicle_id}")
             break
+        if agent.replan:
+            if not agent.planned_route:
+                agent.plan_route(G_shared)
+            if agent.seen_snow_version != snow_version(G_shared):
+                with profiler.phase("replan"):
+                    replan(agent, G_shared)
+            if agent.route_index >= len(agent.planned_route):
+                break   # plus de neige sur la route réparée
+        if tree is not None and agent.planned_route and agent.route_index >= len(agent.planned_route):
+            break   # route terminée : pas d'errance entre deux pleins
 
         next_node = agent.choose_next(G_shared)
         if not next_node:
             break
 
         u, v = agent.current_node, next_node
-        edge_data = G_shared[u][v][0] if isinstance(G_shared[u][v], dict) else G_shared[u][v]
-        length = edge_data.get("length", 1.0)
+        length = step_length(G_shared, u, v)
+
+        if tree is not None:
+            # Faire demi-tour juste à temps : u -> v puis retour au dépôt doit rester possible
+            needed = (length + tree.distance(v)) * agent.fuel_per_meter
+            if needed > agent.fuel_left():
+                depot_trip(agent, tree, G_shared, resume_at=u)
+                if needed > agent.fuel_left():
+                    break   # arête hors de portée même avec le plein
 
         # Vérifier et déneiger les arêtes (sur le graphe partagé)
         if any(G_shared[u][v][key].get("snow", False) for key in G_shared[u][v]):
@@ -175,81 +228,187 @@ def simulate_vehicle(vehicle_class, start_node, config_path, G_shared, vehicle_i
                     # Déneiger sur le graphe partagé - tous les véhicules verront ce changement
                     G_shared[u][v][key]["snow"] = False
                     agent.snow_cleared += 1
+                    agent.load += 1
+            # Changement déjà prévu par la route de l'agent : pas de réparation
+            bump_snow_version(G_shared)
+            if agent.seen_snow_version is not None:
+                agent.seen_snow_version = snow_version(G_shared)
 
         agent.move_to(next_node, length)
 
-    return agent, cleared_edges
-
-def simulate():
-    neighborhood = prompt_for_neighborhood()
-    input_dir = os.path.join("resources/", neighborhood)
-    config_path = "vehicle/config.json"
-
-    # Chemins de sortie
-    cleared_csv = os.path.join(input_dir, "vehicle_cleared.csv")
-    path_json = os.path.join(input_dir, "vehicle_path.json")
-    stats_json = os.path.join(input_dir, "vehicle_stats.json")
+        if tree is not None and agent.load >= agent.snow_capacity and has_snow_remaining(G_shared):
+            depot_trip(agent, tree, G_shared, resume_at=next_node)
 
-    # Charger le graphe
-    G = load_graph_with_snow(input_dir)
-    start_node = list(G.nodes())[0]
+    if prof:
+        prof.add("stepping", time.perf_counter() - t_steps)
+    if tree is not None:
+        depot_trip(agent, tree, G_shared)    # fin de service : retour au dépôt
 
-    # Estimer le travail total
-    total_snow_edges = estimate_total_snow_edges(G)
+    return agent, cleared_edges
 
-    # Choisir la stratégie
-    strategy, budget = prompt_for_strategy()
+def replan_stats(agents):
+    """Nombre de réparations de route et latence par événement (ms)"""
+    lat = sorted(ms for agent in agents for ms in agent.replan_latencies_ms)
+    if not lat:
+        return {"replan_events": 0}
+    pct = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))], 3)
+    return {"replan_events": len(lat), "replan_ms_p50": pct(0.5),
+            "replan_ms_p95": pct(0.95), "replan_ms_max": round(lat[-1], 3)}
+
+def run_simulation(neighborhood, strategy, budget=None, config=CONFIG_PATH,
+                   seed=None, output_dir=None, G=None, fleet=None, route_cache=None,
+                   start_node=None, resume=None, checkpoint_file=None, depots=None):
+    """
+    Lance une simulation complète sans interaction et renvoie le dict de
+    statistiques (le contenu de vehicle_stats.json).
+
+    - config    : chemin vers config.json ou dict déjà chargé
+    - seed      : graine du hasard (choix de repli des agents, DEFAULT_SEED si None)
+    - output_dir: si fourni, y écrit vehicle_cleared.csv / vehicle_path.ndjson.gz
+                  / vehicle_stats.json
+    - G         : graphe enneigé déjà chargé (modifié en place)
+    - fleet     : nombre de véhicules par type (ordre de config["vehicle_types"]),
+                  imposé au lieu de la stratégie
+    - route_cache: dict réutilisé entre simulations sur la même topologie
+                  (routes planifiées par nœud de départ)
+    - start_node: dépôt unique imposé (défaut : config["depots"], voir placement.py)
+    - depots    : liste de dépôts imposée (prioritaire sur start_node)
+    - resume    : snapshot de checkpoint.py dont reprendre (G déjà restauré),
+                  checkpoint_file : son fichier
+
+    Avec config["result_cache"] activé, un run déjà fait avec les mêmes
+    entrées est relu depuis result_cache.py au lieu d'être simulé.
+    Avec config["checkpoint"] activé, l'état du run est sauvegardé
+    périodiquement (checkpoint.py) pour pouvoir le reprendre.
+    Avec config["profile"], temps par phase et compteurs (profiler.py) dans
+    stats["profile"] et output_dir/vehicle_profile.json.
+    Avec la variable d'environnement MEMPROF, profil mémoire du quartier
+    (memprof.py) dans resources/memprof/simulate/<neighborhood>.json.
+    """
+    t0 = time.perf_counter()
+    config = load_config(config)
+    prof = profiler.enable() if config.get("profile") else None
+    try:
+        with memprof.borough(neighborhood, "simulate"):
+            stats = _run_simulation(neighborhood, strategy, budget, config, seed, output_dir, G,
+                                    fleet, route_cache, start_node, resume, checkpoint_file, depots, t0)
+    finally:
+        if prof:
+            profiler.disable()
+    if prof:
+        stats["profile"] = prof.report()
+        if output_dir:
+            with open(os.path.join(output_dir, "vehicle_profile.json"), "w") as f:
+                json.dump(stats["profile"], f, indent=2)
+    return stats
+
+def _run_simulation(neighborhood, strategy, budget, config, seed, output_dir, G, fleet,
+                    route_cache, start_node, resume, checkpoint_file, depots, t0):
+    agent_seed = DEFAULT_SEED if seed is None else seed
+
+    if G is None:
+        with profiler.phase("load_graph"), memprof.stage("load_graph"):
+            G = load_graph_with_snow(os.path.join(ROOT, neighborhood))
+    if resume:
+        depots = resume["args"]["depots"]
+    elif depots:
+        depots = list(depots)
+    else:
+        depots = [start_node] if start_node is not None else depot_nodes(G, config)
+    start_node = depots[0]
+
+    cache = ResultCache.from_config(config) if not resume else None
+    if cache:
+        key = run_key(G, config, neighborhood=neighborhood, strategy=strategy, budget=budget,
+                      fleet=fleet and list(fleet), depots=depots, seed=agent_seed)
+        with profiler.phase("result_cache"):
+            hit = cache.get(key, with_paths=bool(output_dir))
+        if hit:
+            stats, cleared, path_log = hit
+            apply_cleared(G, cleared)
+            stats.update(seed=seed, cached=True, runtime_s=round(time.perf_counter() - t0, 3))
+            if output_dir:
+                write_outputs(output_dir, stats, cleared)
+                shutil.copyfile(path_log, os.path.join(output_dir, PATH_LOG))
+            return stats
 
     # Calculer la distribution des véhicules
-    num_type1, num_type2 = calculate_vehicle_distribution(strategy, budget, total_snow_edges)
+    if not fleet:
+        with profiler.phase("fleet_sizing"):
+            fleet = calculate_vehicle_distribution(strategy, budget, G, config,
+                                                   neighborhood, start_node, depots, seed)
+    fleet = tuple(fleet)
+    classes = vehicle_classes(config)
+    types = vehicle_types(config)
 
-    print(f"\n🚗 Distribution optimale des véhicules:")
-    if strategy == "economie_argent":
-        print(f"   💰 Stratégie économie d'argent: 1 seul véhicule Type I (optimal)")
-    else:
-        print(f"   ⏱️  Stratégie économie de temps avec budget {budget}€:")
-    print(f"   - Véhicules Type I: {num_type1}")
-    print(f"   - Véhicules Type II: {num_type2}")
+    # Retours au dépôt : arbre des plus courts chemins calculé une fois pour tous les véhicules
+    tree = depot_tree(G, depots, route_cache) if config.get("return_to_base") else None
 
     # Simulation des véhicules sur le graphe partagé
     all_agents = []
     all_cleared_edges = set()
-    all_paths = {}
-
-    print(f"\n🚧 Début de la simulation...")
-
-    # Simuler les véhicules Type I
-    for i in range(num_type1):
-        if not has_snow_remaining(G):
-            print(f"   ❄️ Plus de neige - Arrêt des véhicules restants")
-            break
-
-        print(f"   🚗 Véhicule Type I #{i+1} en cours...")
-        agent, cleared_edges = simulate_vehicle(VehicleTypeI, start_node, config_path, G, f"TypeI_{i+1}")
-        all_agents.append(agent)
-        all_cleared_edges.update(cleared_edges)
-        all_paths[f"vehicle_typeI_{i+1}"] = agent.path
-        print(f"      ✅ Terminé - {agent.snow_cleared} arêtes déneigées")
-
-    # Simuler les véhicules Type II
-    for i in range(num_type2):
-        if not has_snow_remaining(G):
-            print(f"   ❄️ Plus de neige - Arrêt des véhicules restants")
-            break
-
-        print(f"   🚛 Véhicule Type II #{i+1} en cours...")
-        agent, cleared_edges = simulate_vehicle(VehicleTypeII, start_node, config_path, G, f"TypeII_{i+1}")
-        all_agents.append(agent)
-        all_cleared_edges.update(cleared_edges)
-        all_paths[f"vehicle_typeII_{i+1}"] = agent.path
-        print(f"      ✅ Terminé - {agent.snow_cleared} arêtes déneigées")
+    all_visited = set()
+
+    # Chemins écrits en flux pendant la simulation (path_log.py)
+    writer = None
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        writer = PathWriter(os.path.join(output_dir, PATH_LOG),
+                            keep_lines=resume["log_lines"] if resume else None)
+
+    # Reprise : véhicules terminés restaurés, le véhicule en cours repart de son état
+    if resume:
+        for state in resume["finished"]:
+            agent = restore_agent(state, classes, config, VehicleTrack(state["track"]["name"]))
+            all_agents.append(agent)
+            all_visited |= agent.path.visited
+        all_cleared_edges.update(map(tuple, resume["cleared"].tolist()))
+
+    checkpoint = Checkpointer.from_config(config, checkpoint_file or
+                                          checkpoint_path(neighborhood, strategy, agent_seed))
+    if checkpoint:
+        checkpoint.bind(G, {"neighborhood": neighborhood, "strategy": strategy, "budget": budget,
+                            "config": config, "seed": seed, "output_dir": output_dir,
+                            "fleet": fleet, "depots": depots},
+                        all_agents, all_cleared_edges, writer)
+
+    slot = 0
+    for vehicle_class, count in zip(classes, fleet):
+        label = vehicle_class.type_name
+        icon = types[label].get("icon", "🚜")
+        for i in range(count):
+            slot += 1
+            if resume and slot <= len(resume["finished"]):
+                continue        # terminé avant le checkpoint
+            if not has_snow_remaining(G):
+                print(f"   ❄️ Plus de neige - Arrêt des véhicules restants")
+                break
+
+            print(f"   {icon} Véhicule Type {label} #{i+1} en cours...")
+            depot = depots[len(all_agents) % len(depots)]   # véhicules répartis sur les dépôts
+            name = f"vehicle_type{label}_{i+1}"
+            track = writer.track(name) if writer else VehicleTrack(name)
+            resumed = None
+            if resume and slot == len(resume["finished"]) + 1:
+                resumed = (restore_agent(resume["current"], classes, config, track),
+                           set(map(tuple, resume["current_cleared"].tolist())))
+            agent, cleared_edges = simulate_vehicle(vehicle_class, depot, config, G, f"Type{label}_{i+1}",
+                                                    route_cache, tree, track, agent_seed,
+                                                    checkpoint, resumed)
+            if writer:
+                track.flush()
+            all_agents.append(agent)
+            all_cleared_edges.update(cleared_edges)
+            all_visited |= track.visited
+            returns = f", {agent.depot_returns} retours au dépôt" if tree else ""
+            print(f"      ✅ Terminé - {agent.snow_cleared} arêtes déneigées{returns}")
+
+    if writer:
+        with profiler.phase("io"):
+            writer.close()
 
     # Vérifier s'il reste de la neige
     remaining_snow = estimate_total_snow_edges(G)
-    if remaining_snow == 0:
-        print(f"\n🎉 DÉNEIGEMENT TERMINÉ ! Toute la neige a été enlevée.")
-    else:
-        print(f"\n❄️  Neige restante: {remaining_snow} arêtes")
 
     # Calculs des statistiques globales
     total_cost = sum(agent.compute_cost() for agent in all_agents)
@@ -269,32 +428,19 @@ def simulate():
     # Vérification stricte du budget si stratégie économie de temps
     budget_respected = True
     if strategy == "economie_temps" and budget:
-        if total_cost > budget:
-            budget_respected = False
-            print(f"\n⚠️  ERREUR: Budget dépassé ! ({total_cost:.2f}€ > {budget}€)")
-            print("La configuration n'est pas valide. Réessayez avec un budget plus élevé.")
-        else:
-            budget_respected = True
-
-    # Sauvegarde des résultats
-    with open(cleared_csv, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["u", "v"])
-        writer.writerows(all_cleared_edges)
-
-    with open(path_json, "w") as f:
-        json.dump(all_paths, f)
+        budget_respected = total_cost <= budget
 
     # Statistiques détaillées
     detailed_stats = {
+        "neighborhood": neighborhood,
         "strategy": strategy,
         "budget": budget,
+        "seed": seed,
+        "config_hash": run_store.config_hash(config),
         "budget_respected": budget_respected,
         "snow_clearing_completed": remaining_snow == 0,
-        "vehicle_distribution": {
-            "type_I": num_type1,
-            "type_II": num_type2
-        },
+        "vehicle_distribution": {f"type_{c.type_name}": n for c, n in zip(classes, fleet)},
+        "depots": depots,
         "global_stats": {
             "total_cost": round(total_cost, 2),
             "total_snow_cleared": total_snow_cleared,
@@ -302,20 +448,99 @@ def simulate():
             "total_distance": round(total_distance, 2),
             "total_fuel_used": round(total_fuel_used, 2),
             "max_time_hours": round(max_time, 2),
-            "slowest_vehicle_type": slowest_vehicle
+            "slowest_vehicle_type": slowest_vehicle,
+            "visited_nodes": len(all_visited),
+            "total_depot_returns": sum(agent.depot_returns for agent in all_agents),
+            **replan_stats(all_agents)
         },
         "individual_vehicles": []
     }
 
-    for i, agent in enumerate(all_agents):
+    for agent in all_agents:
         vehicle_stats = agent.log_stats()
         vehicle_stats["cost"] = agent.compute_cost()
+        vehicle_stats["distance"] = round(agent.distance_traveled, 2)
         vehicle_stats["time_hours"] = round(agent.distance_traveled / agent.speed_kmph, 2)
         vehicle_stats["vehicle_type"] = type(agent).__name__
         detailed_stats["individual_vehicles"].append(vehicle_stats)
 
-    with open(stats_json, "w") as f:
-        json.dump(detailed_stats, f, indent=2)
+    detailed_stats["cached"] = False
+    detailed_stats["runtime_s"] = round(time.perf_counter() - t0, 3)
+
+    if output_dir:
+        with profiler.phase("io"):
+            write_outputs(output_dir, detailed_stats, all_cleared_edges)
+    if checkpoint:
+        checkpoint.done()
+        detailed_stats["checkpoints"] = {"saves": checkpoint.saves,
+                                         "seconds": round(checkpoint.seconds, 3)}
+    if cache:
+        cache.put(key, detailed_stats, all_cleared_edges,
+                  os.path.join(output_dir, PATH_LOG) if output_dir else None)
+
+    return detailed_stats
+
+def write_outputs(output_dir, stats, cleared_edges):
+    """Écrit vehicle_cleared.csv et vehicle_stats.json (les chemins sont déjà en flux)"""
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "vehicle_cleared.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["u", "v"])
+        writer.writerows(sorted(cleared_edges))
+
+    with open(os.path.join(output_dir, "vehicle_stats.json"), "w") as f:
+        json.dump(stats, f, indent=2)
+
+def run_summary(stats):
+    """Résumé d'une simulation tel qu'enregistré dans le run store"""
+    g = stats["global_stats"]
+    return {
+        "vehicles_used": len(stats["individual_vehicles"]),
+        "snow_cleared": g["total_snow_cleared"],
+        "visited_nodes": g["visited_nodes"],
+        "distance_km": g["total_distance"],
+        "time_h": g["max_time_hours"],
+        "cost_total": g["total_cost"],
+        "strategy": "eco" if stats["strategy"] == "economie_argent" else "time",
+        "neighborhood": stats["neighborhood"],
+        "config_hash": stats.get("config_hash")
+    }
+
+def append_run_summaries(summaries, summary_file=SUMMARY_FILE):
+    """Ajout en fin de store, sans relire l'historique (sûr entre processus)"""
+    run_store.append(summaries, summary_file)
+
+def simulate():
+    neighborhood = prompt_for_neighborhood()
+    input_dir = os.path.join(ROOT, neighborhood)
+
+    # Choisir la stratégie
+    strategy, budget = prompt_for_strategy()
+
+    print(f"\n🚧 Début de la simulation...")
+    stats = run_simulation(neighborhood, strategy, budget, output_dir=input_dir)
+    g = stats["global_stats"]
+    distribution = stats["vehicle_distribution"]
+    total_cost = g["total_cost"]
+    remaining_snow = g["remaining_snow"]
+    budget_respected = stats["budget_respected"]
+
+    print(f"\n🚗 Distribution optimale des véhicules:")
+    if strategy == "economie_argent":
+        print(f"   💰 Stratégie économie d'argent: 1 seul véhicule, le moins cher (optimal)")
+    else:
+        print(f"   ⏱️  Stratégie économie de temps avec budget {budget}€:")
+    for key, count in distribution.items():
+        print(f"   - Véhicules Type {key[len('type_'):]}: {count}")
+
+    if remaining_snow == 0:
+        print(f"\n🎉 DÉNEIGEMENT TERMINÉ ! Toute la neige a été enlevée.")
+    else:
+        print(f"\n❄️  Neige restante: {remaining_snow} arêtes")
+
+    if not budget_respected:
+        print(f"\n⚠️  ERREUR: Budget dépassé ! ({total_cost:.2f}€ > {budget}€)")
+        print("La configuration n'est pas valide. Réessayez avec un budget plus élevé.")
 
     # Affichage des résultats
     print(f"\n✅ Simulation completed for: {neighborhood}")
@@ -327,59 +552,35 @@ def simulate():
             print(f"💰 Budget: {budget}€ ❌ DÉPASSÉ (coût réel: {total_cost:.2f}€)")
 
     print(f"\n📊 RÉSULTATS GLOBAUX:")
-    print(f"🧹 Neige nettoyée: {total_snow_cleared} arêtes")
+    print(f"🧹 Neige nettoyée: {g['total_snow_cleared']} arêtes")
     if remaining_snow == 0:
         print(f"🎉 Neige restante: {remaining_snow} arêtes - DÉNEIGEMENT COMPLET !")
     else:
         print(f"❄️  Neige restante: {remaining_snow} arêtes")
     print(f"💸 Coût total: {total_cost:.2f} €")
-    print(f"📏 Distance totale: {total_distance:.2f} km")
-    print(f"⛽ Carburant total: {total_fuel_used:.2f}")
-    print(f"⏱️  Temps total: {max_time:.2f} heures (limité par {slowest_vehicle})")
+    print(f"📏 Distance totale: {g['total_distance']:.2f} km")
+    print(f"⛽ Carburant total: {g['total_fuel_used']:.2f}")
+    print(f"⏱️  Temps total: {g['max_time_hours']:.2f} heures (limité par {g['slowest_vehicle_type']})")
 
     if strategy == "economie_argent":
         print(f"\n💡 Économie d'argent: Solution optimale avec 1 seul véhicule!")
     elif strategy == "economie_temps":
-        print(f"\n💡 Économie de temps: {num_type1 + num_type2} véhicules pour minimiser le temps")
+        print(f"\n💡 Économie de temps: {sum(distribution.values())} véhicules pour minimiser le temps")
 
     print(f"\n🚗 DÉTAIL PAR VÉHICULE:")
-    for i, agent in enumerate(all_agents):
-        vehicle_time = agent.distance_traveled / agent.speed_kmph
-        print(f"   {type(agent).__name__} #{i+1}:")
-        print(f"      - Coût: {agent.compute_cost():.2f} €")
-        print(f"      - Distance: {agent.distance_traveled:.2f} km")
-        print(f"      - Temps: {vehicle_time:.2f} heures")
-        print(f"      - Neige nettoyée: {agent.snow_cleared} arêtes")
+    for i, v in enumerate(stats["individual_vehicles"]):
+        print(f"   {v['vehicle_type']} #{i+1}:")
+        print(f"      - Coût: {v['cost']:.2f} €")
+        print(f"      - Distance: {v['distance']:.2f} km")
+        print(f"      - Temps: {v['time_hours']:.2f} heures")
+        print(f"      - Neige nettoyée: {v['snow_cleared']} arêtes")
 
     # -----------------------------------------------------------------
     # 🔄  AJOUT D’UN RÉSUMÉ DANS runs_summary.json
     # -----------------------------------------------------------------
-    summary_obj = {
-        "vehicles_used": len(all_agents),
-        "snow_cleared": total_snow_cleared,
-        "visited_nodes": len({n for p in all_paths.values() for n in p}),
-        "distance_km": round(total_distance, 2),
-        "time_h": round(max_time, 2),
-        "cost_total": round(total_cost, 2),
-        "strategy": "eco" if strategy == "economie_argent" else "time",
-        "neighborhood": neighborhood
-    }
-
-    summary_file = "reports/all_runs.json"
-    try:
-        with open(summary_file, "r") as f:
-            runs = json.load(f)
-            if not isinstance(runs, list):
-                raise ValueError
-    except (FileNotFoundError, json.JSONDecodeError, ValueError):
-        runs = []
-
-    runs.append(summary_obj)
-
-    with open(summary_file, "w") as f:
-        json.dump(runs, f, indent=2)
+    append_run_summaries([run_summary(stats)])
 
-    print(f"\n📝 Résumé ajouté dans {summary_file}")
+    print(f"\n📝 Résumé ajouté dans {SUMMARY_FILE}")
 
 
 
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Parameter sweeps over vehicle/config.json and the fleet mix.
+
+A sweep spec (JSON) names the borough, the sampling mode and the
+parameters to vary:
+
+    {
+      "neighborhood": "anjou",
+      "strategy": "economie_argent",
+      "mode": "grid",                      # grid | random | lhs
+      "samples": 200,                      # random / lhs only
+      "seed": 0,
+      "params": {
+        "memory_size":   [1, 5, 20, 100],  # grid: list of values
+        "fuel_capacity": {"min": 2000, "max": 20000},
+        "type_I":        {"min": 1, "max": 4, "int": true},
+        "type_II":       [0, 1, 2]            # type_<name>: one per vehicle type
+      }
+    }
+
+Lists are enumerated as-is; {"min","max"} ranges are sampled (random /
+Latin hypercube) or, in grid mode, need a "steps" count.  "type_<name>"
+sets the number of vehicles of each type of config["vehicle_types"]
+(missing types: 0), every other name overrides a config.json field.
+
+Workers load the borough graph once and only reset the snow flags between
+runs; with --shared-memory the parent loads it once for all of them
+(shared_graph.py) and each run gets a private copy of the snow flags.
+Rows are appended to reports/sweeps/<spec name>.csv as soon as each run
+finishes, one column per parameter / metric, so a sweep can be inspected
+(pandas.read_csv) while it runs.
+
+    python3 vehicle/sweep.py sweeps/memory.json -j 8
+"""
+import os
+import sys
+import csv
+import json
+import random
+import argparse
+import itertools
+import numpy as np
+from multiprocessing import Pool, cpu_count
+from simulation import ROOT, CONFIG_PATH, load_graph_with_snow, run_simulation
+from brain import load_config
+from cost_model import vehicle_types
+from shared_graph import SharedGraph
+
+OUT_DIR = "reports/sweeps"
+METRICS = ("total_cost", "max_time_hours", "total_distance",
+           "total_snow_cleared", "remaining_snow", "total_fuel_used")
+
+# ---------------------------------------------------------------------------
+def _is_range(spec):
+    return isinstance(spec, dict)
+
+def _cast(spec, val):
+    return int(round(val)) if spec.get("int") else float(val)
+
+def grid_points(params):
+    axes = []
+    for name, spec in params.items():
+        if _is_range(spec):
+            vals = np.linspace(spec["min"], spec["max"], spec.get("steps", 5))
+            axes.append([_cast(spec, v) for v in vals])
+        else:
+            axes.append(list(spec))
+    for combo in itertools.product(*axes):
+        yield dict(zip(params, combo))
+
+def random_points(params, n, rng):
+    for _ in range(n):
+        yield {name: (_cast(spec, rng.uniform(spec["min"], spec["max"]))
+                      if _is_range(spec) else rng.choice(spec))
+               for name, spec in params.items()}
+
+def lhs_points(params, n, rng):
+    """Latin hypercube: each parameter's range split in n strata, one sample each."""
+    cols = {}
+    for name, spec in params.items():
+        strata = (rng.permutation(n) + rng.uniform(size=n)) / n
+        if _is_range(spec):
+            cols[name] = [_cast(spec, spec["min"] + u * (spec["max"] - spec["min"]))
+                          for u in strata]
+        else:
+            cols[name] = [spec[min(int(u * len(spec)), len(spec) - 1)] for u in strata]
+    for i in range(n):
+        yield {name: cols[name][i] for name in params}
+
+def expand(spec):
+    params, mode = spec["params"], spec.get("mode", "grid")
+    seed = spec.get("seed")
+    if mode == "grid":
+        return list(grid_points(params))
+    if mode == "random":
+        return list(random_points(params, spec["samples"], random.Random(seed)))
+    if mode == "lhs":
+        return list(lhs_points(params, spec["samples"], np.random.default_rng(seed)))
+    raise ValueError(f"unknown sweep mode: {mode}")
+
+# ---------------------------------------------------------------------------
+_worker = {}
+
+def init_worker(neighborhood, strategy, budget, base_config, shared_meta=None):
+    """Load the borough graph once per process (or attach to shared memory)."""
+    sys.stdout = open(os.devnull, "w")              # agents are chatty
+    base_config = {**base_config, "result_cache": {"enabled": False}}   # points never repeat
+    if shared_meta:
+        _worker["shared"] = SharedGraph.attach(shared_meta)
+    else:
+        G = load_graph_with_snow(os.path.join(ROOT, neighborhood))
+        snowy = [(u, v, k) for u, v, k, d in G.edges(keys=True, data=True) if d["snow"]]
+        _worker.update(G=G, snowy=snowy)
+    # routes planifiées par nœud de départ : ne dépendent que de la topologie,
+    # réutilisées par tous les points du worker (comme monte_carlo.py)
+    _worker.update(neighborhood=neighborhood, strategy=strategy,
+                   budget=budget, config=base_config, routes={})
+
+def reset_snow(G, snowy):
+    for _, _, d in G.edges(data=True):
+        d["snow"] = False
+    for u, v, k in snowy:
+        G[u][v][k]["snow"] = True
+
+def run_point(job):
+    point_id, point, seed = job
+    w = _worker
+    if "shared" in w:
+        G = w["shared"].view()                      # private snow copy
+    else:
+        G = w["G"]
+        reset_snow(G, w["snowy"])
+    fleet_keys = [f"type_{name}" for name in vehicle_types(w["config"])]
+    config = {**w["config"], **{k: v for k, v in point.items() if k not in fleet_keys}}
+    fleet = None
+    if any(k in point for k in fleet_keys):
+        fleet = tuple(int(point.get(k, 0)) for k in fleet_keys)
+    try:
+        stats = run_simulation(w["neighborhood"], w["strategy"], w["budget"],
+                               config, seed, G=G, fleet=fleet, route_cache=w["routes"])
+    except Exception as e:
+        return point_id, point, None, repr(e)
+    return point_id, point, stats, None
+
+def sweep(spec, out_csv, workers=None, config=CONFIG_PATH, shared_memory=False):
+    points = expand(spec)
+    base_config = load_config(config)
+    names = list(spec["params"])
+    seed = spec.get("seed")
+    jobs = [(i, p, seed) for i, p in enumerate(points)]
+    columns = ["point", *names, *METRICS, "budget_respected", "runtime_s", "error"]
+
+    os.makedirs(os.path.dirname(out_csv) or ".", exist_ok=True)
+    print(f"🧪 {len(points)} points → {out_csv}")
+    shared = None
+    if shared_memory:
+        shared = SharedGraph.create(
+            load_graph_with_snow(os.path.join(ROOT, spec["neighborhood"])))
+    init = (spec["neighborhood"], spec.get("strategy", "economie_argent"),
+            spec.get("budget"), base_config, shared.meta if shared else None)
+    try:
+        with open(out_csv, "w", newline="") as f, \
+                Pool(processes=workers or cpu_count(), initializer=init_worker,
+                     initargs=init) as pool:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for done, (i, point, stats, err) in enumerate(
+                    pool.imap_unordered(run_point, jobs, chunksize=4), 1):
+                g = stats["global_stats"] if stats else {}
+                writer.writerow([i, *(point[n] for n in names),
+                                 *(g.get(m) for m in METRICS),
+                                 stats["budget_respected"] if stats else None,
+                                 stats["runtime_s"] if stats else None, err])
+                f.flush()
+                if done % 50 == 0 or done == len(jobs):
+                    print(f"   {done}/{len(jobs)}")
+    finally:                            # Ctrl-C / erreur : libérer /dev/shm
+        if shared:
+            shared.close()
+    print(f"✅ Sweep written to {out_csv}")
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Parallel sweep over config.json fields.")
+    p.add_argument("spec", help="sweep spec JSON")
+    p.add_argument("-o", "--out", help=f"CSV output (default: {OUT_DIR}/<spec>.csv)")
+    p.add_argument("-c", "--config", default=CONFIG_PATH, help="base config")
+    p.add_argument("-j", "--workers", type=int)
+    p.add_argument("--shared-memory", action="store_true",
+                   help="one graph in shared memory for all workers")
+    return p.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    with open(args.spec) as f:
+        spec = json.load(f)
+    name = os.path.splitext(os.path.basename(args.spec))[0]
+    sweep(spec, args.out or os.path.join(OUT_DIR, f"{name}.csv"),
+          args.workers, args.config, args.shared_memory)
@@ -1,38 +1,37 @@
-from brain import VehicleAgent
+from brain import VehicleAgent, load_config
+from cost_model import CostModel, vehicle_types
 
-class VehicleTypeI(VehicleAgent):
-    def __init__(self, start_node, config_path):
-        super().__init__(start_node, config_path)
-        self.fixed_cost = 500
-        self.km_cost = 1.1
-        self.hour_cost_first_8 = 1.1
-        self.hour_cost_after_8 = 1.3
-        self.speed_kmph = 10
+class Vehicle(VehicleAgent):
+    """Véhicule dont les tarifs et la vitesse viennent de config["vehicle_types"]"""
+    type_name = None
 
-    def compute_cost(self):
-        distance_km = self.distance_traveled
-        hours = distance_km / self.speed_kmph
-        if hours <= 8:
-            hourly_cost = self.hour_cost_first_8 * hours
-        else:
-            hourly_cost = self.hour_cost_first_8 * 8 + self.hour_cost_after_8 * (hours - 8)
-        return round(self.fixed_cost + self.km_cost * distance_km + hourly_cost, 2)
-
-
-class VehicleTypeII(VehicleAgent):
-    def __init__(self, start_node, config_path):
-        super().__init__(start_node, config_path)
-        self.fixed_cost = 800
-        self.km_cost = 1.3
-        self.hour_cost_first_8 = 1.3
-        self.hour_cost_after_8 = 1.5
-        self.speed_kmph = 20
+    def __init__(self, start_node, config):
+        config = load_config(config)
+        super().__init__(start_node, config)
+        spec = vehicle_types(config)[self.type_name]
+        self.cost_model = CostModel(config)
+        self.type_index = self.cost_model.index(self.type_name)
+        self.fixed_cost = spec["fixed_cost"]
+        self.km_cost = spec["km_cost"]
+        self.speed_kmph = spec["speed_kmph"]
 
     def compute_cost(self):
-        distance_km = self.distance_traveled
-        hours = distance_km / self.speed_kmph
-        if hours <= 8:
-            hourly_cost = self.hour_cost_first_8 * hours
-        else:
-            hourly_cost = self.hour_cost_first_8 * 8 + self.hour_cost_after_8 * (hours - 8)
-        return round(self.fixed_cost + self.km_cost * distance_km + hourly_cost, 2)
+        return float(self.cost_model.cost(self.type_index, self.distance_traveled))
+
+
+class VehicleTypeI(Vehicle):
+    type_name = "I"
+
+
+class VehicleTypeII(Vehicle):
+    type_name = "II"
+
+
+_classes = {"I": VehicleTypeI, "II": VehicleTypeII}
+
+def vehicle_classes(config):
+    """Une classe par type déclaré dans la config, dans l'ordre des flottes"""
+    for name in vehicle_types(config):
+        if name not in _classes:
+            _classes[name] = type(f"VehicleType{name}", (Vehicle,), {"type_name": name})
+    return [_classes[name] for name in vehicle_types(config)]